@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Sharded Telegram Nutrition Bot
+A front process receives updates (polling or webhook) and routes each user
+to one of BOT_WORKERS worker processes running TelegramNutritionBot
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import signal
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from telegram import Bot, Update
+
+from data.data_loader import get_shared_data_loader
+from core.webhook_server import create_webhook_server
+from core.worker_supervisor import WorkerSupervisor
+from telegram_bot_integrated import TelegramNutritionBot
+
+logger = logging.getLogger(__name__)
+
+
+def run_bot_worker(index: int, sock) -> None:
+    """Entry point of one worker process"""
+    # The supervisor stops workers by closing their socket, after which they drain
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logger.info(f"Worker {index} starting")
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        os.environ['METRICS_PORT'] = str(int(metrics_port) + index)  # One endpoint per worker
+    bot = TelegramNutritionBot(os.environ['TELEGRAM_BOT_TOKEN'])
+    asyncio.run(bot.serve_worker(sock))
+
+
+async def _poll_updates(bot: Bot, supervisor: WorkerSupervisor) -> None:
+    """Long-poll Telegram and hand every update to its worker"""
+    await bot.delete_webhook()
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=Update.ALL_TYPES)
+        except Exception as e:
+            logger.warning(f"getUpdates failed, retrying: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            await supervisor.dispatch(update.to_dict())
+
+
+async def _log_stats_periodically(supervisor: WorkerSupervisor, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"Worker stats: {await supervisor.collect_stats()}")
+
+
+async def run_sharded(token: str, worker_count: int) -> None:
+    """Run the front process until SIGINT/SIGTERM (BOT_MODE selects polling or webhook)"""
+    # Build (or refresh) the catalog snapshot once so every worker starts from it
+    get_shared_data_loader()
+    # Telegram's global limit is per bot, so each worker's send queue gets an equal share
+    global_rate = float(os.getenv('SEND_GLOBAL_RATE', '30'))
+    os.environ['SEND_GLOBAL_RATE'] = str(global_rate / worker_count)
+
+    supervisor = WorkerSupervisor(worker_count, run_bot_worker)
+    await supervisor.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    server = None
+    stats_task = loop.create_task(_log_stats_periodically(
+        supervisor, float(os.getenv('SUPERVISOR_STATS_INTERVAL', '300'))))
+    api_base_url = (os.getenv('TELEGRAM_API_BASE_URL') or 'https://api.telegram.org').rstrip('/')
+    async with Bot(token, base_url=f"{api_base_url}/bot", base_file_url=f"{api_base_url}/file/bot") as bot:
+        if os.getenv('BOT_MODE', 'polling').lower() == 'webhook':
+            server = create_webhook_server(supervisor.dispatch)
+            await server.start()
+            public_url = os.getenv('WEBHOOK_URL')
+            if public_url:
+                await bot.set_webhook(public_url.rstrip('/') + server.path,
+                                      secret_token=server.secret_token, allowed_updates=Update.ALL_TYPES)
+            server.ready = True
+            source = None
+        else:
+            source = loop.create_task(_poll_updates(bot, supervisor))
+
+        logger.info(f"Sharded bot running with {worker_count} workers")
+        try:
+            await stop.wait()
+        finally:
+            if source is not None:
+                source.cancel()
+            if server is not None:
+                await server.stop()
+            stats_task.cancel()
+            logger.info(f"Worker stats: {await supervisor.collect_stats()}")
+            await supervisor.stop()
+
+
+def main(worker_count: int):
+    """Main function"""
+    token = os.getenv('TELEGRAM_BOT_TOKEN')
+
+    if not token:
+        print("❌ TELEGRAM_BOT_TOKEN not found!")
+        print("Please check your .env file")
+        return
+
+    print(f"🚀 Starting Sharded Telegram Nutrition Bot with {worker_count} workers...")
+    asyncio.run(run_sharded(token, worker_count))
+
+if __name__ == '__main__':
+    main(int(os.getenv('BOT_WORKERS', '2')))
@@ -3,7 +3,11 @@ Main Chatbot Manager
 Orchestrates conversation flow and routes to appropriate journey modules
 """
 
-from typing import Optional
+import logging
+import time
+from typing import Any, Dict, Optional, Union
+from core.metrics import JOURNEY_STEP_ERRORS, JOURNEY_STEP_SECONDS
+from core.outbound import StreamedReply
 from core.session_manager import SessionManager
 from core.intent_classifier import IntentClassifier
 from journeys.recipe_discovery import RecipeDiscoveryJourney
@@ -12,6 +16,9 @@ from journeys.meal_planning import MealPlanningJourney
 from journeys.grocery_assistance import GroceryAssistanceJourney
 from journeys.cooking_guidance import CookingGuidanceJourney
 from journeys.food_calorie_tracking import FoodCalorieTrackingJourney
+from journeys.base_journey import get_journey_state, restore_journey_state
+
+logger = logging.getLogger(__name__)
 
 class ChatbotManager:
     """Main chatbot orchestrator"""
@@ -21,8 +28,8 @@ class ChatbotManager:
         self.intent_classifier = intent_classifier
         self.data_loader = data_loader
         self.journeys = {
-            'recipe_discovery': RecipeDiscoveryJourney(session_manager),
-            'calorie_meal_recommendation': CalorieMealRecommendationJourney(session_manager),
+            'recipe_discovery': RecipeDiscoveryJourney(session_manager, data_loader),
+            'calorie_meal_recommendation': CalorieMealRecommendationJourney(session_manager, data_loader),
             'meal_planning': MealPlanningJourney(data_loader, session_manager),
             'grocery_assistance': GroceryAssistanceJourney(data_loader, session_manager),
             'cooking_guidance': CookingGuidanceJourney(data_loader, session_manager),
@@ -30,6 +37,22 @@ class ChatbotManager:
         }
         self.greeting_given = False
     
+    def get_state(self) -> Dict[str, Any]:
+        """Get the persistable state: session data, greeting flag and every journey's in-flight state"""
+        return {
+            'session_data': self.session_manager.session_data,
+            'greeting_given': self.greeting_given,
+            'journeys': {name: get_journey_state(journey) for name, journey in self.journeys.items()}
+        }
+    
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restore the state saved by get_state onto this freshly built manager"""
+        self.session_manager.session_data = state['session_data']
+        self.greeting_given = state.get('greeting_given', False)
+        for name, journey_state in state.get('journeys', {}).items():
+            if name in self.journeys:
+                restore_journey_state(self.journeys[name], journey_state)
+    
     def start_conversation(self) -> None:
         """Start the main conversation loop"""
         if not self.greeting_given:
@@ -53,7 +76,7 @@ class ChatbotManager:
                 
                 if response:
                     print(f"🤖 Bot: {response}")
-                    self.session_manager.add_message('bot', response)
+                    self.session_manager.add_message('bot', str(response))
                 
             except KeyboardInterrupt:
                 self._show_goodbye()
@@ -77,25 +100,40 @@ class ChatbotManager:
         """Display goodbye message"""
         print("\n🤖 Bot: Thanks for using the nutrition assistant! Stay healthy! 👋")
     
-    def _process_user_input(self, user_input: str) -> Optional[str]:
+    def _process_user_input(self, user_input: str) -> Optional[Union[str, StreamedReply]]:
         """Process user input and route to appropriate handler"""
         current_journey = self.session_manager.get_current_journey()
         
         # If user is already in a journey, continue with that journey
         if current_journey and current_journey in self.journeys:
-            return self.journeys[current_journey].process_input(user_input)
+            journey = self.journeys[current_journey]
+            step = getattr(journey, 'current_step', None) or self.session_manager.get_current_step()
+            return self._run_step(journey, str(step), journey.process_input, user_input)
         
         # Otherwise, classify intent and start appropriate journey
         intent = self.intent_classifier.classify_intent(user_input)
+        logger.debug(f"Classified {user_input!r} as {intent}")
         
         if intent and intent in self.journeys:
             # Start the identified journey
             self.session_manager.start_journey(intent)
-            return self.journeys[intent].start_journey()
+            return self._run_step(self.journeys[intent], 'start_journey', self.journeys[intent].start_journey)
         
         # No intent detected - provide help
         return self._provide_help_options()
     
+    def _run_step(self, journey, step: str, handler, *args) -> Optional[Union[str, StreamedReply]]:
+        """Run a journey step, recording its latency and failures per journey and step"""
+        labels = {'journey': type(journey).__name__, 'step': step}
+        start = time.perf_counter()
+        try:
+            return handler(*args)
+        except Exception:
+            JOURNEY_STEP_ERRORS.inc(**labels)
+            raise
+        finally:
+            JOURNEY_STEP_SECONDS.observe(time.perf_counter() - start, **labels)
+    
     def _provide_help_options(self) -> str:
         """Provide help when intent is unclear"""
         return ("I'm not sure what you'd like to do. Try saying things like:\n"
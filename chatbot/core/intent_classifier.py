@@ -4,12 +4,229 @@ Maps user input to specific journey intents
 """
 
 import re
-from typing import Dict, Optional
+import string
+import threading
+from collections import OrderedDict
+from itertools import islice
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+_STRIP_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop ASCII punctuation and collapse whitespace: ' Log my  breakfast!' -> 'log my breakfast'"""
+    return ' '.join(text.lower().translate(_STRIP_PUNCTUATION).split())
+
+class IntentMatch(NamedTuple):
+    """Result of one pass over a message"""
+    intent: Optional[str]          # Highest-priority intent with a matching pattern
+    match_counts: Dict[str, int]   # Intent -> number of its patterns that matched
+
+class IntentScores(NamedTuple):
+    """Batch result for one message"""
+    intent: Optional[str]              # Same as classify_intent
+    confidences: Dict[str, float]      # Intent -> get_confidence_score for every intent
+
+def required_fragments(pattern: str) -> Set[str]:
+    """
+    Literal pieces between the top-level '.*' wildcards of a pattern, e.g.
+    {'find', 'recipe'} for r'find.*recipe'. Every match contains all of them.
+    Patterns with alternation or with a '.*' inside a group give none, since
+    a piece there may be optional.
+    """
+    pieces = []
+    start = depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '|':
+            return set()
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif pattern.startswith('.*', i):
+            if depth:
+                return set()
+            pieces.append(pattern[start:i])
+            start = i = i + 2
+            continue
+        i += 1
+    pieces.append(pattern[start:])
+    return {piece for piece in pieces if piece and re.escape(piece) == piece}  # Plain literal text
+
+class CompiledIntentMatcher:
+    """
+    Matches a message against every intent pattern in one pass.
+
+    Each pattern is compiled once, and its required literal fragments
+    (e.g. 'find' and 'recipe' in r'find.*recipe') are recorded. A pattern
+    can only match if all of its fragments occur in the message, so patterns
+    are filed under their longest fragment: one substring check per distinct
+    anchor picks the few candidate patterns, and only those regexes run.
+    Patterns without safe fragments (alternation, case-insensitive or
+    verbose flags) are always run. Results are the same as searching every
+    pattern, in the same intent priority order.
+    """
+
+    def __init__(self, intent_patterns: Dict[str, List[str]]):
+        self.intents: Tuple[str, ...] = tuple(intent_patterns)
+        self.pattern_counts = {intent: len(patterns) for intent, patterns in intent_patterns.items()}
+        # (intent, compiled pattern, its other literal fragments), in priority order
+        self._patterns: List[Tuple[str, re.Pattern, Tuple[str, ...]]] = []
+        self._unanchored: List[int] = []  # Patterns without required literal fragments
+
+        by_anchor: Dict[str, List[int]] = {}
+        for intent, patterns in intent_patterns.items():
+            for pattern in patterns:
+                compiled = re.compile(pattern)
+                fragments = set()
+                if not compiled.flags & (re.IGNORECASE | re.VERBOSE):
+                    fragments = required_fragments(pattern)
+                index = len(self._patterns)
+                if fragments:
+                    # Anchor on the longest fragment, the least likely to occur
+                    anchor = max(sorted(fragments), key=len)
+                    by_anchor.setdefault(anchor, []).append(index)
+                    fragments.discard(anchor)
+                else:
+                    self._unanchored.append(index)
+                self._patterns.append((intent, compiled, tuple(sorted(fragments))))
+
+        self._anchors: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple(
+            (anchor, tuple(indexes)) for anchor, indexes in by_anchor.items()
+        )
+
+    def match(self, text: str) -> IntentMatch:
+        """Find the winning intent and per-intent match counts for lowercased text"""
+        # Only patterns whose anchor occurs can match; sorting restores priority order
+        candidates = list(self._unanchored)
+        for anchor, indexes in self._anchors:
+            if anchor in text:
+                candidates.extend(indexes)
+        candidates.sort()
+
+        counts = dict.fromkeys(self.intents, 0)
+        winner = None
+        for index in candidates:
+            intent, compiled, fragments = self._patterns[index]
+            for fragment in fragments:
+                if fragment not in text:
+                    break
+            else:
+                if compiled.search(text):
+                    counts[intent] += 1
+                    if winner is None:
+                        winner = intent
+        return IntentMatch(winner, counts)
+
+    def score_chunk(self, texts: List[str]) -> List[IntentScores]:
+        """Score a list of messages, matching each distinct normalized text once"""
+        totals = self.pattern_counts
+        seen: Dict[str, IntentScores] = {}
+        results = []
+        for text in texts:
+            text = normalize_text(text)
+            scores = seen.get(text)
+            if scores is None:
+                intent, counts = self.match(text)
+                scores = seen[text] = IntentScores(intent, {
+                    name: count / totals[name] if totals[name] else 0.0
+                    for name, count in counts.items()
+                })
+            results.append(scores)
+        return results
+
+class IntentCache:
+    """
+    Bounded LRU cache of normalized message -> intent.
+
+    Most traffic is a handful of canned phrases and button labels, so
+    messages are normalized first and equivalent spellings share one entry.
+    None (no intent) is cached like any other answer. clear() must be called
+    whenever the rules behind the cached answers change.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def classify(self, text: str, classify_normalized: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Get the cached intent of text, computing it from the normalized text on a miss"""
+        key = normalize_text(text)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        intent = classify_normalized(key)
+        with self._lock:
+            self._entries[key] = intent
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return intent
+
+    def clear(self) -> None:
+        """Drop every cached answer (after the pattern tables changed)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit rate counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+# Matcher of a classify_batch worker process, received once per process
+_worker_matcher: Optional[CompiledIntentMatcher] = None
+
+def _init_worker(matcher: CompiledIntentMatcher) -> None:
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _score_in_worker(texts: List[str]) -> List[IntentScores]:
+    return _worker_matcher.score_chunk(texts)
+
+def _chunks(texts: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 class IntentClassifier:
     """Simple rule-based intent classifier for customer journeys"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 4096):
+        self.cache = IntentCache(cache_size)
         self.intent_patterns = {
             # More specific patterns come first to avoid false matches
             'cooking_guidance': [
@@ -52,6 +269,27 @@ class IntentClassifier:
             ]
         }
     
+    @property
+    def intent_patterns(self) -> Dict[str, List[str]]:
+        return self._intent_patterns
+    
+    @intent_patterns.setter
+    def intent_patterns(self, patterns: Dict[str, List[str]]) -> None:
+        self._intent_patterns = patterns
+        self.compile_patterns()
+    
+    def compile_patterns(self) -> None:
+        """Compile intent_patterns into the single-pass matcher (call again after editing them in place)"""
+        self._matcher = CompiledIntentMatcher(self._intent_patterns)
+        self.cache.clear()
+    
+    def match(self, user_input: str) -> IntentMatch:
+        """Get the winning intent and how many patterns of each intent matched"""
+        return self._matcher.match(normalize_text(user_input))
+    
+    def _classify_normalized(self, text: str) -> Optional[str]:
+        return self._matcher.match(text).intent
+    
     def classify_intent(self, user_input: str) -> Optional[str]:
         """
         Classify user input into one of the journey intents
@@ -62,26 +300,53 @@ class IntentClassifier:
         Returns:
             Intent name or None if no match
         """
-        user_input_lower = user_input.lower()
-        
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, user_input_lower):
-                    return intent
-        
-        return None
+        return self.cache.classify(user_input, self._classify_normalized)
     
     def get_confidence_score(self, user_input: str, intent: str) -> float:
         """Get confidence score for a specific intent"""
         if intent not in self.intent_patterns:
             return 0.0
         
-        user_input_lower = user_input.lower()
-        matches = 0
-        total_patterns = len(self.intent_patterns[intent])
+        matches = self.match(user_input).match_counts.get(intent, 0)
+        total_patterns = self._matcher.pattern_counts.get(intent, 0)
         
-        for pattern in self.intent_patterns[intent]:
-            if re.search(pattern, user_input_lower):
-                matches += 1
+        return matches / total_patterns if total_patterns > 0 else 0.0
+    
+    def iter_classify_batch(self, texts: Iterable[str], chunk_size: int = 10000,
+                            processes: Optional[int] = None) -> Iterator[IntentScores]:
+        """
+        Classify a stream of messages lazily, in input order
         
-        return matches / total_patterns if total_patterns > 0 else 0.0
\ No newline at end of file
+        Args:
+            texts: Any iterable of messages (list, generator, open file...)
+            chunk_size: Messages read and scored at a time
+            processes: Worker processes to spread chunks over (None or 1 = this process)
+            
+        Yields:
+            IntentScores with the intent and the confidence for every intent
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        chunks = _chunks(texts, chunk_size)
+
+        if not processes or processes <= 1:
+            for chunk in chunks:
+                yield from self._matcher.score_chunk(chunk)
+            return
+
+        # Each worker gets a copy of the compiled matcher once, then only chunks travel
+        with Pool(processes, initializer=_init_worker, initargs=(self._matcher,)) as pool:
+            for scores in pool.imap(_score_in_worker, chunks):
+                yield from scores
+    
+    def classify_batch(self, texts: Iterable[str], chunk_size: int = 10000,
+                       processes: Optional[int] = None) -> List[IntentScores]:
+        """Classify many messages at once; see iter_classify_batch"""
+        return list(self.iter_classify_batch(texts, chunk_size, processes))
+    
+    def classify_file(self, path: str, chunk_size: int = 10000, processes: Optional[int] = None,
+                      encoding: str = 'utf-8') -> Iterator[IntentScores]:
+        """Stream a text file with one message per line through iter_classify_batch"""
+        with open(path, encoding=encoding) as lines:
+            yield from self.iter_classify_batch((line.rstrip('\r\n') for line in lines),
+                                                chunk_size, processes)
@@ -0,0 +1,359 @@
+"""
+Metrics for Nutrition Chatbot
+Prometheus-style counters, gauges and latency histograms, and an endpoint
+that serves them in the Prometheus text format
+"""
+
+import asyncio
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from core.webhook_server import serve_http_connection
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, as in Prometheus' default latency buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets (cumulative upper bounds, plus
+    +Inf) and keeps their sum. Percentiles are estimated by linear
+    interpolation inside the bucket that holds them, like Prometheus'
+    histogram_quantile.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.bounds) + 1)  # Last one is +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation (seconds)"""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative_counts(self) -> Sequence[int]:
+        """Observations at or below each bound, then the total (+Inf)"""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        cumulative = []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Estimated value below which fraction (0-1) of observations fall; None if empty"""
+        cumulative = self.cumulative_counts()
+        total = cumulative[-1]
+        if total == 0:
+            return None
+        rank = fraction * total
+        index = bisect.bisect_left(cumulative, rank)
+        if index >= len(self.bounds):
+            return self.bounds[-1]  # Beyond the last finite bound
+        lower = self.bounds[index - 1] if index > 0 else 0.0
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bucket = cumulative[index] - below
+        if in_bucket == 0:
+            return self.bounds[index]
+        return lower + (self.bounds[index] - lower) * (rank - below) / in_bucket
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean and p50/p95/p99 in milliseconds"""
+        def ms(value):
+            return None if value is None else round(value * 1000, 2)
+
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.sum / self.count) if self.count else None,
+            'p50_ms': ms(self.percentile(0.50)),
+            'p95_ms': ms(self.percentile(0.95)),
+            'p99_ms': ms(self.percentile(0.99))
+        }
+
+
+# ========================================
+# LABELED METRICS
+# ========================================
+
+Sample = Tuple[str, Dict[str, str], float]  # Name suffix, labels, value
+
+
+class _Family:
+    """A named metric whose values are kept per combination of label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class _ValueFamily(_Family):
+    """Counters and gauges: one number per label combination, or a function read at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        """Report function() as the value, e.g. a size or counter another object keeps"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def _add(self, amount: float, labels: Dict[str, Any]) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        function = self._functions.get(key)
+        return float(function()) if function is not None else self._values.get(key, 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        samples = [('', self._labels(key), value) for key, value in values.items() if key not in functions]
+        for key, function in functions.items():
+            try:
+                samples.append(('', self._labels(key), float(function())))
+            except Exception as e:
+                logger.warning(f"Could not read {self.name}{self._labels(key)}: {e}")
+        return samples
+
+
+class Counter(_ValueFamily):
+    """A total that only goes up (requests, errors, cache hits)"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._add(amount, labels)
+
+
+class Gauge(_ValueFamily):
+    """A value that goes up and down (active sessions, queue depth, load time)"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self._add(-amount, labels)
+
+
+class HistogramFamily(_Family):
+    """A Histogram per label combination, e.g. latency per journey and step"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Tuple[str, ...], Histogram] = {}
+
+    def labels(self, **labels) -> Histogram:
+        """The histogram of one label combination, created on first use"""
+        key = self._key(labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def attach(self, histogram: Histogram, **labels) -> None:
+        """Export a Histogram another object already fills (e.g. the send queue's)"""
+        key = self._key(labels)
+        with self._lock:
+            self._histograms[key] = histogram
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the with block took"""
+        histogram = self.labels(**labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            histograms = list(self._histograms.items())
+        samples = []
+        for key, histogram in histograms:
+            labels = self._labels(key)
+            cumulative = histogram.cumulative_counts()
+            for bound, count in zip(histogram.bounds + (math.inf,), cumulative):
+                samples.append(('_bucket', dict(labels, le=_format_value(bound)), count))
+            samples.append(('_sum', labels, histogram.sum))
+            samples.append(('_count', labels, cumulative[-1]))
+        return samples
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)  # Bucket counts
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """
+    The metrics of one process, by name.
+
+    counter(), gauge() and histogram() return the existing metric when the
+    name is already registered, so modules and objects created more than
+    once (tests, several bots in one process) share a metric instead of
+    failing; asking for it with another type or label set is an error.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **options) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **options)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind} "
+                                 f"with labels {metric.labelnames}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> HistogramFamily:
+        return self._get_or_create(HistogramFamily, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Family]:
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                label_text = ','.join(f'{name}="{_escape(str(label))}"' for name, label in labels.items())
+                name = metric.name + suffix
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry served by the metrics endpoint
+REGISTRY = MetricsRegistry()
+
+# Journey steps are timed by both front ends (Telegram bot and console chatbot)
+JOURNEY_STEP_SECONDS = REGISTRY.histogram(
+    'chatbot_journey_step_seconds', 'Time to handle one journey step', ('journey', 'step'))
+JOURNEY_STEP_ERRORS = REGISTRY.counter(
+    'chatbot_journey_step_errors_total', 'Journey steps that raised or timed out', ('journey', 'step'))
+
+
+# ========================================
+# EXPOSITION ENDPOINT
+# ========================================
+
+class MetricsServer:
+    """Serves GET /metrics from a registry on its own port, for Prometheus to scrape"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = '0.0.0.0', port: int = 9100):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.scrapes = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            lambda reader, writer: serve_http_connection(reader, writer, self._respond),
+            self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port 0 in tests
+        logger.info(f"Metrics endpoint listening on {self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str], body: Optional[bytes]):
+        if target.split('?', 1)[0] != '/metrics':
+            return 404, {'error': 'not found'}
+        if method != 'GET':
+            return 405, {'error': 'method not allowed'}
+        self.scrapes += 1
+        return 200, self.registry.exposition()
+
+
+def create_metrics_server(registry: MetricsRegistry = REGISTRY) -> Optional[MetricsServer]:
+    """
+    Build the metrics endpoint configured by METRICS_PORT and METRICS_HOST;
+    None when METRICS_PORT is not set.
+    """
+    port = os.getenv('METRICS_PORT')
+    if not port:
+        return None
+    return MetricsServer(registry, host=os.getenv('METRICS_HOST', '0.0.0.0'), port=int(port))
@@ -0,0 +1,391 @@
+"""
+Outbound Delivery for Nutrition Chatbot
+Rate-limited, coalescing, retrying send queue for Telegram messages
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Awaitable, Callable, Deque, Iterable, Iterator, List, Optional
+
+from core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for one message
+
+
+class SendError(Exception):
+    """A failed Bot API call, described the way the Bot API reports it"""
+
+    def __init__(self, status: int, description: str = '', retry_after: Optional[float] = None):
+        super().__init__(f"{status} {description}".strip())
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+    @property
+    def is_parse_error(self) -> bool:
+        return self.status == 400 and 'parse entities' in self.description.lower()
+
+
+class TokenBucket:
+    """Allows rate events per second on average, with bursts of up to burst"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._clock = clock
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long to wait before using it (0 if available now)"""
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+def is_valid_markdown(text: str) -> bool:
+    """
+    Check that text parses as Telegram's (legacy) Markdown: *bold*, _italic_,
+    `code`, ```pre``` and [text](url) must all be closed. Markers inside an
+    open entity are taken literally, and backslash escapes a marker.
+    """
+    length = len(text)
+    open_marker = None
+    i = 0
+    while i < length:
+        if open_marker == '```':
+            if text.startswith('```', i):
+                open_marker = None
+                i += 3
+            else:
+                i += 1
+            continue
+        char = text[i]
+        if open_marker is not None:
+            if char == open_marker:
+                open_marker = None
+            i += 1
+            continue
+
+        if char == '\\' and i + 1 < length and text[i + 1] in '_*`[':
+            i += 2
+        elif text.startswith('```', i):
+            open_marker = '```'
+            i += 3
+        elif char in '*_`':
+            open_marker = char
+            i += 1
+        elif char == '[':
+            close = text.find('](', i + 1)
+            if close == -1 or text.find(')', close + 2) == -1:
+                return False
+            i = text.find(')', close + 2) + 1
+        else:
+            i += 1
+    return open_marker is None
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split text into chunks of at most limit characters, at line breaks where possible"""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+def escape_markdown(text: str) -> str:
+    """Escape Telegram (legacy) Markdown markers in free text such as meal names"""
+    for marker in ('_', '*', '`', '['):
+        text = text.replace(marker, '\\' + marker)
+    return text
+
+
+def pack_messages(blocks: Iterable[str], limit: int = MAX_MESSAGE_LENGTH) -> Iterator[str]:
+    """
+    Pack text blocks (e.g. one day of a meal plan each) into messages of at
+    most limit characters, joined by line breaks, never cutting through a
+    block. A block longer than limit on its own is split at line breaks.
+    Lazy: a message is yielded as soon as the next block does not fit.
+    """
+    message = None
+    for block in blocks:
+        if message is not None and len(message) + 1 + len(block) <= limit:
+            message += '\n' + block
+            continue
+        if message is not None:
+            yield message
+        *full, message = split_message(block, limit)
+        yield from full
+    if message is not None:
+        yield message
+
+
+class StreamedReply:
+    """
+    A reply rendered lazily as Markdown-safe blocks, each closing its own
+    entities, so it can be sent part by part while the rest is rendered.
+
+    render(*args) must return an iterable of blocks. Only the function and
+    its arguments are stored, so a reply produced in a worker process
+    pickles cheaply when render is a module-level function or staticmethod.
+    str() gives the whole text, for callers that need one string.
+    """
+
+    def __init__(self, render: Callable[..., Iterable[str]], *args):
+        self.render = render
+        self.args = args
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.render(*self.args))
+
+    def messages(self, limit: int = MAX_MESSAGE_LENGTH) -> Iterator[str]:
+        """The reply as message-sized chunks of whole blocks"""
+        return pack_messages(self, limit)
+
+    def __str__(self) -> str:
+        return '\n'.join(self)
+
+
+class _Outgoing:
+    """One message waiting to be sent, possibly several coalesced chunks"""
+
+    __slots__ = ('text', 'parse_mode', 'options', 'futures')
+
+    def __init__(self, text: str, parse_mode: Optional[str], options: Dict[str, Any], future: asyncio.Future):
+        self.text = text
+        self.parse_mode = parse_mode
+        self.options = options
+        self.futures = [future]
+
+
+class OutboundQueue:
+    """
+    Delivers bot replies without blocking handlers on Telegram.
+
+    Each chat has a FIFO queue drained by its own task, so messages to one
+    chat keep their order while chats are sent to in parallel. Before a send
+    the task waits for a token from the chat's bucket (Telegram allows about
+    one message per second per chat) and from the global bucket (about 30
+    per second per bot). 429 answers are retried after the retry_after
+    Telegram gives, 5xx and network errors with exponential backoff; other
+    errors fail the message.
+
+    Long texts are split at line breaks. Markdown is validated once per
+    chunk, and a chunk that would not parse goes out as plain text instead
+    of costing a failed round trip. Chunks still waiting in a chat's queue
+    are coalesced when they fit in one message together.
+
+    send(chat_id, text, parse_mode, **options) performs the actual Bot API
+    call and raises SendError on failure.
+    """
+
+    def __init__(self, send: Callable[..., Awaitable[Any]],
+                 per_chat_rate: float = 1.0, per_chat_burst: float = 3,
+                 global_rate: float = 30.0, global_burst: float = 30,
+                 max_retries: int = 5, base_backoff: float = 0.5, max_backoff: float = 30.0,
+                 max_tracked_chats: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.send = send
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_tracked_chats = max_tracked_chats
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_burst, clock)
+        self._buckets: "OrderedDict[Any, TokenBucket]" = OrderedDict()
+        self._queues: Dict[Any, Deque[_Outgoing]] = {}
+        self._senders: Dict[Any, asyncio.Task] = {}
+        self.latency = Histogram()  # From submit to delivery, including rate-limit waits
+        self.send_latency = Histogram()  # Bot API call time of successful sends
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.markdown_fallbacks = 0
+
+    def submit(self, chat_id: Any, text: str, parse_mode: Optional[str] = None,
+               **options) -> asyncio.Future:
+        """
+        Queue a message; returns a future that becomes True once every chunk
+        was delivered, False if any failed. options (e.g. reply_markup) go to
+        the last chunk.
+        """
+        loop = asyncio.get_running_loop()
+        queue = self._queues.setdefault(chat_id, deque())
+        chunks = split_message(text)
+        futures = []
+        for number, chunk in enumerate(chunks, 1):
+            chunk_mode = parse_mode
+            if parse_mode == 'Markdown' and not is_valid_markdown(chunk):
+                chunk_mode = None
+                self.markdown_fallbacks += 1
+            chunk_options = options if number == len(chunks) else {}
+            future = loop.create_future()
+            futures.append(future)
+
+            last = queue[-1] if queue else None
+            if (last is not None and not last.options and not chunk_options
+                    and last.parse_mode == chunk_mode
+                    and len(last.text) + 1 + len(chunk) <= MAX_MESSAGE_LENGTH):
+                last.text += '\n' + chunk
+                last.futures.append(future)
+                self.coalesced += 1
+            else:
+                queue.append(_Outgoing(chunk, chunk_mode, chunk_options, future))
+
+        if chat_id not in self._senders:
+            self._senders[chat_id] = loop.create_task(self._drain(chat_id, queue))
+
+        submitted = self._clock()
+        done = loop.create_future()
+
+        def finish(_):
+            if all(f.done() for f in futures) and not done.done():
+                self.latency.observe(self._clock() - submitted)
+                done.set_result(all(f.result() for f in futures))
+
+        for future in futures:
+            future.add_done_callback(finish)
+        return done
+
+    async def submit_stream(self, chat_id: Any, blocks: Iterable[str], parse_mode: Optional[str] = None,
+                            **options) -> asyncio.Future:
+        """
+        Queue blocks one by one as they are produced, yielding to the event
+        loop in between so the first part is on its way while later blocks
+        are still being rendered. Blocks that are still waiting coalesce into
+        message-sized chunks. Returns the combined delivery future, like submit().
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        pending = None
+        for block in blocks:
+            if pending is not None:
+                futures.append(self.submit(chat_id, pending, parse_mode))
+                await asyncio.sleep(0)
+            pending = block
+        if pending is not None:
+            futures.append(self.submit(chat_id, pending, parse_mode, **options))
+
+        done = loop.create_future()
+        if not futures:
+            done.set_result(True)
+            return done
+        results = asyncio.gather(*futures)
+        results.add_done_callback(
+            lambda gathered: done.done() or done.set_result(all(gathered.result())))
+        return done
+
+    def _bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst, self._clock)
+            if len(self._buckets) > self.max_tracked_chats:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(chat_id)
+        return bucket
+
+    async def _drain(self, chat_id: Any, queue: Deque[_Outgoing]) -> None:
+        try:
+            while queue:
+                message = queue[0]
+                # Taking it off the queue only now lets later chunks coalesce into it while we wait
+                await asyncio.sleep(self._bucket(chat_id).reserve())
+                await asyncio.sleep(self._global.reserve())
+                queue.popleft()
+                delivered = await self._deliver(chat_id, message)
+                for future in message.futures:
+                    if not future.done():
+                        future.set_result(delivered)
+        finally:
+            del self._senders[chat_id]
+            if not queue:
+                del self._queues[chat_id]
+
+    async def _deliver(self, chat_id: Any, message: _Outgoing) -> bool:
+        attempt = 0
+        while True:
+            start = self._clock()
+            try:
+                await self.send(chat_id, message.text, message.parse_mode, **message.options)
+                self.send_latency.observe(self._clock() - start)
+                self.sent += 1
+                return True
+            except SendError as e:
+                if e.is_parse_error and message.parse_mode:
+                    self.markdown_fallbacks += 1
+                    message.parse_mode = None  # The validator let it through; send it plain
+                    continue
+                if not e.retryable or attempt >= self.max_retries:
+                    self.failed += 1
+                    logger.error(f"Could not deliver message to chat {chat_id}: {e}")
+                    return False
+                delay = e.retry_after if e.retry_after is not None else min(
+                    self.max_backoff, self.base_backoff * 2 ** attempt)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Could not deliver message to chat {chat_id}: {e}")
+                return False
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def pending_count(self) -> int:
+        """Messages waiting to be sent"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Wait until queued messages are delivered (or timeout)"""
+        senders = list(self._senders.values())
+        if senders:
+            await asyncio.wait(senders, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get delivery counters and latency percentiles"""
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'coalesced': self.coalesced,
+            'markdown_fallbacks': self.markdown_fallbacks,
+            'pending': self.pending_count(),
+            'active_chats': len(self._senders),
+            'latency': self.latency.summary(),
+            'send_latency': self.send_latency.summary()
+        }
+
+
+def create_outbound_queue(send: Callable[..., Awaitable[Any]]) -> OutboundQueue:
+    """
+    Build the send queue configured by SEND_CHAT_RATE, SEND_GLOBAL_RATE
+    (messages per second) and SEND_MAX_RETRIES.
+    """
+    chat_rate = float(os.getenv('SEND_CHAT_RATE', '1'))
+    global_rate = float(os.getenv('SEND_GLOBAL_RATE', '30'))
+    return OutboundQueue(
+        send,
+        per_chat_rate=chat_rate,
+        per_chat_burst=max(1.0, 3 * chat_rate),
+        global_rate=global_rate,
+        global_burst=max(1.0, global_rate),
+        max_retries=int(os.getenv('SEND_MAX_RETRIES', '5'))
+    )
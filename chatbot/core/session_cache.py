@@ -0,0 +1,140 @@
+"""
+Session Cache for Nutrition Chatbot
+Bounded in-memory cache of live user sessions with LRU and idle-TTL eviction
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterator, Optional
+
+
+class SessionCache:
+    """
+    Holds live sessions, bounded by size and idle time.
+
+    Entries are kept in access order, so the least recently used session is
+    always at the front: going over max_size evicts from the front, and idle
+    sessions are found by walking the front until one is still fresh. Every
+    evicted session is handed to on_evict (for example to spill it to the
+    session store) before it is dropped.
+    """
+
+    def __init__(self, max_size: int = 1000, idle_ttl: Optional[float] = 1800.0,
+                 on_evict: Optional[Callable[[Any, Any], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl if idle_ttl and idle_ttl > 0 else None
+        self.on_evict = on_evict
+        self._clock = clock
+        self._entries: "OrderedDict[Any, list]" = OrderedDict()  # Key -> [session, last_access]
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0   # Dropped to stay within max_size
+        self.expirations = 0  # Dropped after idle_ttl
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a live session and mark it as just used; None if not cached"""
+        with self._lock:
+            now = self._clock()
+            self._expire_idle(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry[1] = now
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Any, session: Any) -> None:
+        """Add or replace a session, evicting the least recently used ones if full"""
+        with self._lock:
+            now = self._clock()
+            self._entries[key] = [session, now]
+            self._entries.move_to_end(key)
+            self._expire_idle(now)
+            while len(self._entries) > self.max_size:
+                old_key, (old_session, _) = self._entries.popitem(last=False)
+                self.evictions += 1
+                self._evict(old_key, old_session)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """Remove a session without calling on_evict"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def expire_idle(self) -> int:
+        """Evict every session idle for longer than idle_ttl; returns how many"""
+        with self._lock:
+            return self._expire_idle(self._clock())
+
+    def _expire_idle(self, now: float) -> int:
+        if self.idle_ttl is None:
+            return 0
+        expired = 0
+        while self._entries:
+            key, (session, last_access) = next(iter(self._entries.items()))
+            if now - last_access <= self.idle_ttl:
+                break
+            del self._entries[key]
+            self.expirations += 1
+            expired += 1
+            self._evict(key, session)
+        return expired
+
+    def _evict(self, key: Any, session: Any) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, session)
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __getitem__(self, key: Any) -> Any:
+        session = self.get(key)
+        if session is None:
+            raise KeyError(key)
+        return session
+
+    def __setitem__(self, key: Any, session: Any) -> None:
+        self.put(key, session)
+
+    def __delitem__(self, key: Any) -> None:
+        with self._lock:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Any]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, hit rate and eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+def create_session_cache(on_evict: Optional[Callable[[Any, Any], None]] = None) -> SessionCache:
+    """Build the session cache configured by SESSION_CACHE_SIZE and SESSION_IDLE_TTL (seconds)"""
+    return SessionCache(
+        max_size=int(os.getenv('SESSION_CACHE_SIZE', '1000')),
+        idle_ttl=float(os.getenv('SESSION_IDLE_TTL', '1800')),
+        on_evict=on_evict
+    )
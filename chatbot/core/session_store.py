@@ -0,0 +1,296 @@
+"""
+Session Store for Nutrition Chatbot
+Persists per-user session state with write-behind batching
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBackend:
+    """Storage interface for serialized session state"""
+
+    def load(self, key: str) -> Optional[bytes]:
+        """Get the stored state of one session, or None"""
+        raise NotImplementedError
+
+    def save_many(self, items: Iterable[Tuple[str, Optional[bytes]]]) -> None:
+        """Store (key, state) pairs in one batch; a None state deletes the key"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the backend"""
+
+
+class MemorySessionBackend(SessionBackend):
+    """Keeps serialized sessions in a dict (tests, or SESSION_BACKEND=memory)"""
+
+    def __init__(self):
+        self.rows: Dict[str, bytes] = {}
+        self.batches = 0
+
+    def load(self, key: str) -> Optional[bytes]:
+        return self.rows.get(key)
+
+    def save_many(self, items: Iterable[Tuple[str, Optional[bytes]]]) -> None:
+        for key, state in items:
+            if state is None:
+                self.rows.pop(key, None)
+            else:
+                self.rows[key] = state
+        self.batches += 1
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Stores serialized sessions in one SQLite table (the default backend)"""
+
+    def __init__(self, path: str, table: str = 'sessions'):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid session table name: {table}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} '
+            '(session_key TEXT PRIMARY KEY, state BLOB NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def load(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT state FROM {self.table} WHERE session_key = ?', (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, items: Iterable[Tuple[str, Optional[bytes]]]) -> None:
+        now = time.time()
+        upserts = []
+        deletes = []
+        for key, state in items:
+            if state is None:
+                deletes.append((key,))
+            else:
+                upserts.append((key, state, now))
+
+        # One transaction, and so one fsync, per batch
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    f'INSERT OR REPLACE INTO {self.table} (session_key, state, updated_at) VALUES (?, ?, ?)',
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany(f'DELETE FROM {self.table} WHERE session_key = ?', deletes)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SessionStore:
+    """
+    Write-behind persistence for user sessions.
+
+    Sessions are read from the backend lazily, the first time a user shows
+    up. Handlers only mark a session dirty; dirty sessions are serialized and
+    written together by flush(), which runs periodically and once more on
+    shutdown. Serialization happens on the caller's thread (the event loop),
+    so state is never read while a handler is changing it, and only the
+    batched backend write moves to a worker thread.
+
+    States are pickled, so the backend must only ever hold data written by
+    this bot.
+    """
+
+    def __init__(self, backend: SessionBackend, export_state: Callable[[Any], Dict[str, Any]],
+                 flush_interval: float = 5.0):
+        self.backend = backend
+        self.export_state = export_state
+        self.flush_interval = flush_interval
+        self._dirty: Dict[str, Any] = {}  # Key -> live session object (None = delete)
+        self._inflight: Dict[str, Optional[bytes]] = {}  # Serialized states being written
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.flushes = 0
+        self.writes = 0
+        self.errors = 0
+
+    def load(self, key: Any) -> Optional[Dict[str, Any]]:
+        """Get the stored state of a session, or None if it was never saved"""
+        key = str(key)
+        with self._lock:
+            pending = self._dirty.get(key, _NOT_PENDING)
+
+        try:
+            # A session still waiting for its flush is newer than the stored copy
+            if pending is None:
+                return None
+            if isinstance(pending, _Serialized):
+                data = pending.data
+            elif pending is not _NOT_PENDING:
+                data = pickle.dumps(self.export_state(pending), protocol=pickle.HIGHEST_PROTOCOL)
+            elif key in self._inflight:
+                data = self._inflight[key]  # Collected, but its write has not finished
+            else:
+                data = self.backend.load(key)
+            if data is None:
+                return None
+            self.loads += 1
+            return pickle.loads(data)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Could not load session {key}: {e}")
+            return None
+
+    def mark_dirty(self, key: Any, session: Any) -> None:
+        """Queue a session to be written on the next flush"""
+        with self._lock:
+            self._dirty[str(key)] = session
+
+    def delete(self, key: Any) -> None:
+        """Queue a session to be removed on the next flush"""
+        with self._lock:
+            self._dirty[str(key)] = None
+
+    def pending_count(self) -> int:
+        """Number of sessions waiting to be written"""
+        with self._lock:
+            return len(self._dirty)
+
+    def _collect(self) -> Dict[str, Optional[bytes]]:
+        """Serialize and clear the dirty set"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+
+        batch = {}
+        for key, session in dirty.items():
+            if session is None or isinstance(session, _Serialized):
+                batch[key] = None if session is None else session.data
+                continue
+            try:
+                batch[key] = pickle.dumps(self.export_state(session), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Could not serialize session {key}: {e}")
+
+        with self._lock:
+            self._inflight.update(batch)
+        return batch
+
+    def _write(self, batch: Dict[str, Optional[bytes]]) -> None:
+        """Write a serialized batch to the backend"""
+        if not batch:
+            return
+        with self._write_lock:
+            try:
+                self.backend.save_many(batch.items())
+                self.flushes += 1
+                self.writes += len(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Session flush failed, will retry: {e}")
+                with self._lock:
+                    for key, state in batch.items():
+                        self._dirty.setdefault(key, _Serialized(state))
+            finally:
+                with self._lock:
+                    for key, state in batch.items():
+                        if self._inflight.get(key) is state:
+                            del self._inflight[key]
+
+    def flush(self) -> int:
+        """Write every dirty session now; returns the number of sessions written"""
+        batch = self._collect()
+        self._write(batch)
+        return len(batch)
+
+    async def flush_async(self) -> int:
+        """Serialize dirty sessions here, then write them from a worker thread"""
+        batch = self._collect()
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, batch)
+        return len(batch)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_async()
+
+    def start(self) -> None:
+        """Start periodic write-behind flushing on the running event loop"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write everything still pending"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+
+    def close(self) -> None:
+        """Flush synchronously and close the backend"""
+        self.flush()
+        self.backend.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get persistence counters"""
+        return {
+            'loads': self.loads,
+            'flushes': self.flushes,
+            'writes': self.writes,
+            'errors': self.errors,
+            'pending': self.pending_count()
+        }
+
+
+class _Serialized:
+    """A state that was already serialized but failed to write"""
+
+    def __init__(self, data: Optional[bytes]):
+        self.data = data
+
+
+_NOT_PENDING = object()
+
+
+def create_session_store(table: str, export_state: Callable[[Any], Dict[str, Any]]) -> Optional[SessionStore]:
+    """
+    Build the session store configured by the environment:
+    SESSION_BACKEND (sqlite, memory or off), SESSION_DB_PATH and
+    SESSION_FLUSH_INTERVAL (seconds).
+    """
+    backend_name = os.getenv('SESSION_BACKEND', 'sqlite').lower()
+    flush_interval = float(os.getenv('SESSION_FLUSH_INTERVAL', '5'))
+
+    if backend_name in ('off', 'none', '0', 'false'):
+        return None
+    if backend_name == 'memory':
+        backend = MemorySessionBackend()
+    elif backend_name == 'sqlite':
+        backend = SQLiteSessionBackend(os.getenv('SESSION_DB_PATH', 'sessions.db'), table)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend_name}")
+
+    return SessionStore(backend, export_state, flush_interval)
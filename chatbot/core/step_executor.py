@@ -0,0 +1,133 @@
+"""
+Step Executor for Nutrition Chatbot
+Runs slow journey steps in a worker pool so the event loop only does I/O
+"""
+
+import asyncio
+import copy
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
+
+EXECUTOR_MODES = ('thread', 'process', 'inline')
+
+
+class StepTimeout(Exception):
+    """A journey step did not finish within the executor timeout"""
+
+
+def _timed_call(func: Callable, args: Tuple) -> Tuple[float, Any]:
+    """Run func in the worker and measure only its own run time (no queueing)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+class StepExecutor:
+    """
+    Decides per step whether to run inline or in a worker pool.
+
+    Every step is identified by a key (e.g. 'SimpleMealPlanning.handle_input:3')
+    and its run time is tracked as a moving average. Steps that have never
+    run, or whose average reaches offload_threshold seconds, go to the pool
+    and are awaited with a timeout; fast steps keep running inline, where a
+    thread hop would cost more than the step itself.
+
+    Offloaded steps never touch the caller's objects: in 'thread' mode the
+    arguments are deep-copied before the hand-off (read-only catalog records
+    copy as themselves), in 'process' mode they are
+    pickled, so func must return everything the caller needs to apply. A
+    timed-out step cannot be interrupted: its worker finishes in the
+    background on its own copy and the result is dropped. Inline steps work
+    on the live objects.
+    """
+
+    def __init__(self, mode: str = 'thread', max_workers: Optional[int] = None,
+                 timeout: Optional[float] = 10.0, offload_threshold: float = 0.005,
+                 smoothing: float = 0.3):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.offload_threshold = offload_threshold
+        self.smoothing = smoothing
+        self._latency: Dict[str, float] = {}  # Step key -> moving average run time (seconds)
+        self._lock = threading.Lock()
+        self.inline_runs = 0
+        self.offloaded_runs = 0
+        self.timeouts = 0
+
+        if mode == 'thread':
+            self._pool: Optional[Executor] = ThreadPoolExecutor(max_workers, thread_name_prefix='journey-step')
+        elif mode == 'process':
+            self._pool = ProcessPoolExecutor(max_workers)
+        else:
+            self._pool = None
+
+    def should_offload(self, key: str) -> bool:
+        """True if the step is unmeasured or has been slower than offload_threshold"""
+        if self._pool is None:
+            return False
+        latency = self._latency.get(key)
+        return latency is None or latency >= self.offload_threshold
+
+    def _record(self, key: str, elapsed: float) -> None:
+        with self._lock:
+            previous = self._latency.get(key)
+            self._latency[key] = elapsed if previous is None else (
+                previous + self.smoothing * (elapsed - previous))
+
+    async def run(self, key: str, func: Callable, *args) -> Any:
+        """Run func(*args) inline or in the pool; raises StepTimeout if it takes too long"""
+        if not self.should_offload(key):
+            self.inline_runs += 1
+            elapsed, result = _timed_call(func, args)
+            self._record(key, elapsed)
+            return result
+
+        self.offloaded_runs += 1
+        if self.mode == 'thread':
+            args = copy.deepcopy(args)
+        future = asyncio.get_running_loop().run_in_executor(self._pool, _timed_call, func, args)
+        try:
+            elapsed, result = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._record(key, self.timeout)
+            raise StepTimeout(f"{key} took longer than {self.timeout}s") from None
+        self._record(key, elapsed)
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get run counters and the slowest steps by average run time (ms)"""
+        with self._lock:
+            slowest = sorted(self._latency.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            'mode': self.mode,
+            'inline_runs': self.inline_runs,
+            'offloaded_runs': self.offloaded_runs,
+            'timeouts': self.timeouts,
+            'slowest_steps_ms': {key: round(latency * 1000, 2) for key, latency in slowest}
+        }
+
+
+def create_step_executor() -> StepExecutor:
+    """
+    Build the step executor configured by the environment:
+    STEP_EXECUTOR (thread, process or inline), STEP_EXECUTOR_WORKERS,
+    STEP_TIMEOUT (seconds, 0 = none) and STEP_OFFLOAD_THRESHOLD_MS.
+    """
+    workers = os.getenv('STEP_EXECUTOR_WORKERS')
+    return StepExecutor(
+        mode=os.getenv('STEP_EXECUTOR', 'thread').lower(),
+        max_workers=int(workers) if workers else None,
+        timeout=float(os.getenv('STEP_TIMEOUT', '10')),
+        offload_threshold=float(os.getenv('STEP_OFFLOAD_THRESHOLD_MS', '5')) / 1000
+    )
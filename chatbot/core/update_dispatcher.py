@@ -0,0 +1,107 @@
+"""
+Update Dispatcher for Nutrition Chatbot
+Processes different users' updates concurrently and each user's in order
+"""
+
+import asyncio
+import os
+from typing import Dict, Any, Awaitable, Hashable, List, Optional
+
+
+class _UserQueue:
+    """Lock that orders one user's updates, plus how many are queued behind it"""
+
+    __slots__ = ('lock', 'depth')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class UserOrderedDispatcher:
+    """
+    Runs update coroutines concurrently across users, one at a time per user.
+
+    Each user has a FIFO lock, so a user's updates run in arrival order and
+    never overlap (their session and journey are not shared with anyone
+    else). A global semaphore caps how many updates run at once; it is only
+    taken once the user's turn has come, so a user with a backlog does not
+    hold slots other users could use. Users are spread over shards by key,
+    and the dispatcher reports the number of queued and running updates per
+    shard. Updates without a user key are only subject to the global cap.
+    """
+
+    def __init__(self, max_in_flight: int = 64, shards: int = 16):
+        if max_in_flight < 1 or shards < 1:
+            raise ValueError("max_in_flight and shards must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.shard_count = shards
+        self._shards: List[Dict[Hashable, _UserQueue]] = [{} for _ in range(shards)]
+        self._shard_depths = [0] * shards
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.processed = 0
+        self.peak_in_flight = 0
+
+    def shard_of(self, user_key: Hashable) -> int:
+        """Shard a user's updates are counted in"""
+        return hash(user_key) % self.shard_count
+
+    async def run(self, user_key: Optional[Hashable], coroutine: Awaitable[Any]) -> Any:
+        """Await coroutine once every earlier update of the same user has finished"""
+        if user_key is None:
+            return await self._run_slot(coroutine)
+
+        shard = self.shard_of(user_key)
+        users = self._shards[shard]
+        queue = users.get(user_key)
+        if queue is None:
+            queue = users[user_key] = _UserQueue()
+        queue.depth += 1
+        self._shard_depths[shard] += 1
+        try:
+            async with queue.lock:
+                return await self._run_slot(coroutine)
+        finally:
+            queue.depth -= 1
+            self._shard_depths[shard] -= 1
+            if queue.depth == 0:
+                del users[user_key]  # Idle users cost nothing
+
+    async def _run_slot(self, coroutine: Awaitable[Any]) -> Any:
+        async with self._slots:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return await coroutine
+            finally:
+                self.in_flight -= 1
+                self.processed += 1
+
+    def queue_depths(self) -> List[int]:
+        """Queued plus running updates per shard"""
+        return list(self._shard_depths)
+
+    def user_depth(self, user_key: Hashable) -> int:
+        """Queued plus running updates of one user"""
+        queue = self._shards[self.shard_of(user_key)].get(user_key)
+        return queue.depth if queue else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency counters and per-shard queue depths"""
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'processed': self.processed,
+            'active_users': sum(len(users) for users in self._shards),
+            'shard_depths': self.queue_depths()
+        }
+
+
+def create_update_dispatcher() -> UserOrderedDispatcher:
+    """Build the dispatcher configured by UPDATE_MAX_IN_FLIGHT and UPDATE_SHARDS"""
+    return UserOrderedDispatcher(
+        max_in_flight=int(os.getenv('UPDATE_MAX_IN_FLIGHT', '64')),
+        shards=int(os.getenv('UPDATE_SHARDS', '16'))
+    )
@@ -0,0 +1,240 @@
+"""
+Webhook Server for Nutrition Chatbot
+Minimal asyncio HTTP server that receives Telegram updates by webhook
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+from typing import Dict, Any, Awaitable, Callable, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+MAX_BODY_BYTES = 1024 * 1024
+KEEPALIVE_TIMEOUT = 75.0
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large', 429: 'Too Many Requests',
+            500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+Payload = Union[Dict[str, Any], str]  # JSON object, or plain text (e.g. metrics exposition)
+Responder = Callable[[str, str, Dict[str, str], Optional[bytes]], Awaitable[Tuple[int, Payload]]]
+
+
+async def read_http_request(reader: asyncio.StreamReader, max_body: int = MAX_BODY_BYTES
+                            ) -> Optional[Tuple[str, str, Dict[str, str], Optional[bytes]]]:
+    """Read one request as (method, target, lowercased headers, body); body is None past max_body"""
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', '0'))
+    if length > max_body:
+        return method, target, headers, None
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+async def write_http_response(writer: asyncio.StreamWriter, status: int,
+                              payload: Payload, keep_alive: bool) -> None:
+    """Write a JSON response, or a plain-text one for a str payload"""
+    if isinstance(payload, str):
+        body = payload.encode()
+        content_type = 'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        body = json.dumps(payload).encode()
+        content_type = 'application/json'
+    head = [f'HTTP/1.1 {status} {_REASONS[status]}',
+            f'Content-Type: {content_type}',
+            f'Content-Length: {len(body)}',
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if status in (429, 503):
+        head.append('Retry-After: 1')
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+
+
+async def serve_http_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                respond: Responder, max_body: int = MAX_BODY_BYTES) -> None:
+    """Answer requests on one keep-alive connection with respond(method, target, headers, body)"""
+    try:
+        while True:
+            request = await asyncio.wait_for(read_http_request(reader, max_body), KEEPALIVE_TIMEOUT)
+            if request is None:
+                break
+            method, target, headers, body = request
+            status, payload = await respond(method, target, headers, body)
+            keep_alive = headers.get('connection', '').lower() != 'close' and status != 413
+            await write_http_response(writer, status, payload, keep_alive)
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+class WebhookServer:
+    """
+    Accepts Telegram webhook POSTs and feeds them to handle_update.
+
+    Requests must carry the secret token given to setWebhook; only tests
+    run without one (create_webhook_server requires it). Accepted updates are answered at once and wait in a bounded
+    queue; when the queue is full the server answers 503 so Telegram retries
+    later instead of the bot buffering without limit. A pump hands queued
+    updates to handle_update as tasks, never more than max_in_flight at a
+    time.
+
+    GET /healthz answers 200 while the process serves HTTP; GET /readyz
+    answers 200 only once the owner set ready and the queue has room, so a
+    load balancer stops routing to a saturated or starting instance.
+    """
+
+    def __init__(self, handle_update: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 path: str = '/telegram', secret_token: Optional[str] = None,
+                 host: str = '0.0.0.0', port: int = 8000,
+                 max_queue: int = 1000, max_in_flight: int = 1024, max_body: int = MAX_BODY_BYTES):
+        self.handle_update = handle_update
+        self.path = path if path.startswith('/') else '/' + path
+        self.secret_token = secret_token or None
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.ready = False
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_queue)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._pump: Optional[asyncio.Task] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.failed = 0
+
+    # ========================================
+    # LIFECYCLE
+    # ========================================
+
+    async def start(self) -> None:
+        """Start listening and pumping updates"""
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port 0 in tests
+        self._pump = asyncio.get_running_loop().create_task(self._pump_updates())
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path}")
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Stop accepting updates, then finish the queued and running ones"""
+        self.ready = False
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pump is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._queue.qsize()} queued updates on shutdown")
+            self._pump.cancel()
+            self._pump = None
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=drain_timeout)
+
+    async def _pump_updates(self) -> None:
+        while True:
+            await self._slots.acquire()
+            data = await self._queue.get()
+            task = asyncio.get_running_loop().create_task(self._process(data))
+            self._tasks.add(task)
+
+    async def _process(self, data: Dict[str, Any]) -> None:
+        try:
+            await self.handle_update(data)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Webhook update {data.get('update_id')} failed: {e}")
+        finally:
+            self._slots.release()
+            self._queue.task_done()
+            self._tasks.discard(asyncio.current_task())
+
+    # ========================================
+    # HTTP
+    # ========================================
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await serve_http_connection(reader, writer, self._respond, self.max_body)
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str],
+                       body: Optional[bytes]) -> Tuple[int, Dict[str, Any]]:
+        path = target.split('?', 1)[0]
+        if path == '/healthz':
+            return 200, {'status': 'ok'}
+        if path == '/readyz':
+            ready = self.ready and not self._queue.full()
+            return (200 if ready else 503), {'ready': ready, 'queued': self._queue.qsize()}
+        if path != self.path:
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        if self.secret_token and not hmac.compare_digest(
+                headers.get(SECRET_HEADER, '').encode(), self.secret_token.encode()):
+            return 403, {'error': 'bad secret token'}
+        if body is None:
+            return 413, {'error': 'update too large'}
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'invalid JSON'}
+        if not isinstance(data, dict):
+            return 400, {'error': 'update must be a JSON object'}
+
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return 503, {'error': 'busy, retry later'}
+        self.accepted += 1
+        return 200, {'ok': True}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get webhook counters and queue state"""
+        return {
+            'ready': self.ready,
+            'queued': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'running': len(self._tasks),
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'failed': self.failed
+        }
+
+
+def create_webhook_server(handle_update: Callable[[Dict[str, Any]], Awaitable[Any]],
+                          max_in_flight: int = 1024) -> WebhookServer:
+    """
+    Build the webhook server configured by the environment: PORT,
+    WEBHOOK_HOST, WEBHOOK_PATH, WEBHOOK_SECRET and WEBHOOK_QUEUE_SIZE.
+    WEBHOOK_SECRET is required: without it anyone who can reach the port
+    could post updates as any user.
+    """
+    secret_token = os.getenv('WEBHOOK_SECRET')
+    if not secret_token:
+        raise ValueError("WEBHOOK_SECRET must be set in webhook mode")
+    return WebhookServer(
+        handle_update,
+        path=os.getenv('WEBHOOK_PATH', '/telegram'),
+        secret_token=secret_token,
+        host=os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', '8000')),
+        max_queue=int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000')),
+        max_in_flight=max_in_flight
+    )
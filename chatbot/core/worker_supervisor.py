@@ -0,0 +1,250 @@
+"""
+Worker Supervisor for Nutrition Chatbot
+Shards updates over worker processes by Telegram user id
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import socket
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Spawned, not forked: the supervisor forks from inside a running event loop
+_CONTEXT = multiprocessing.get_context('spawn')
+
+
+def update_user_id(update: Dict[str, Any]) -> Optional[int]:
+    """Id of the user an update comes from (message, callback query, ...), or None"""
+    for key, value in update.items():
+        if key != 'update_id' and isinstance(value, dict):
+            sender = value.get('from') or value.get('user')
+            if isinstance(sender, dict) and 'id' in sender:
+                return sender['id']
+            chat = value.get('chat')
+            if isinstance(chat, dict) and 'id' in chat:
+                return chat['id']
+    return None
+
+
+def shard_for(user_id: int, worker_count: int) -> int:
+    """Worker that owns a user; ints hash to themselves, so this is stable across processes"""
+    return hash(user_id) % worker_count
+
+
+def aggregate_stats(stats_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum integer counters across workers (recursively) and recompute hit rates"""
+    total: Dict[str, Any] = {}
+    for stats in stats_list:
+        _add_counters(total, stats)
+    return total
+
+
+def _add_counters(total: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _add_counters(total.setdefault(key, {}), value)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+    if 'hits' in total and 'misses' in total:
+        lookups = total['hits'] + total['misses']
+        total['hit_rate'] = round(total['hits'] / lookups, 4) if lookups else 0.0
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+class _Worker:
+    """One worker process and the supervisor's end of its socket"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.reader_task: Optional[asyncio.Task] = None
+        self.dispatched = 0
+        self.restarts = 0
+
+
+class WorkerSupervisor:
+    """
+    Runs worker_count processes and routes every update to one of them.
+
+    Updates go to shard_for(user_id), so each user's session lives in a
+    single worker. The supervisor and a worker talk over a Unix socket pair
+    with newline-delimited JSON: updates flow to the worker, stats requests
+    and replies go both ways. Writes wait for the socket to drain, so a
+    backed-up worker slows the front instead of buffering without limit.
+    Workers that die are restarted; their users' live sessions are lost,
+    but persisted ones are restored by the new worker.
+
+    worker_main(index, sock) is the worker process entry point; it must be
+    a module-level function (workers are spawned) and usually ends in
+    serve_worker_channel.
+    """
+
+    def __init__(self, worker_count: int, worker_main: Callable[[int, socket.socket], None],
+                 restart: bool = True, monitor_interval: float = 1.0):
+        if worker_count < 1:
+            raise ValueError("worker_count must be at least 1")
+        self.worker_count = worker_count
+        self.worker_main = worker_main
+        self.restart = restart
+        self.monitor_interval = monitor_interval
+        self._workers = [_Worker(index) for index in range(worker_count)]
+        self._requests = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}  # Stats request id -> reply future
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.unrouted = 0  # Updates without a user, spread by update_id
+        self.dropped = 0
+
+    async def start(self) -> None:
+        """Spawn every worker and start watching them"""
+        for worker in self._workers:
+            await self._spawn(worker)
+        self._monitor = asyncio.get_running_loop().create_task(self._monitor_workers())
+
+    async def _spawn(self, worker: _Worker) -> None:
+        parent_sock, child_sock = socket.socketpair()
+        process = _CONTEXT.Process(target=self.worker_main, args=(worker.index, child_sock),
+                                   name=f'bot-worker-{worker.index}')
+        process.start()
+        child_sock.close()
+        reader, writer = await asyncio.open_unix_connection(sock=parent_sock)
+        worker.process = process
+        worker.writer = writer
+        worker.reader_task = asyncio.get_running_loop().create_task(self._read_replies(reader))
+        logger.info(f"Started worker {worker.index} (pid {process.pid})")
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            future = self._pending.pop(message.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(message.get('stats', {}))
+
+    async def _monitor_workers(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(self.monitor_interval)
+            for worker in self._workers:
+                if self._stopping or worker.process.is_alive():
+                    continue
+                logger.error(f"Worker {worker.index} exited with code {worker.process.exitcode}")
+                worker.writer.close()
+                if self.restart:
+                    worker.restarts += 1
+                    await self._spawn(worker)
+
+    def worker_for(self, update: Dict[str, Any]) -> int:
+        """Index of the worker an update is routed to"""
+        user_id = update_user_id(update)
+        if user_id is None:
+            return shard_for(update.get('update_id', 0), self.worker_count)
+        return shard_for(user_id, self.worker_count)
+
+    async def dispatch(self, update: Dict[str, Any]) -> None:
+        """Hand an update to the worker owning its user"""
+        if update_user_id(update) is None:
+            self.unrouted += 1
+        worker = self._workers[self.worker_for(update)]
+        try:
+            worker.writer.write(_encode({'type': 'update', 'update': update}))
+            await worker.writer.drain()
+            worker.dispatched += 1
+        except (ConnectionError, RuntimeError) as e:
+            self.dropped += 1
+            logger.error(f"Dropped update {update.get('update_id')}: worker {worker.index} unavailable ({e})")
+
+    async def collect_stats(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """Ask every worker for its stats; returns per-worker stats and their sum"""
+        loop = asyncio.get_running_loop()
+        requests = []
+        for worker in self._workers:
+            request_id = next(self._requests)
+            future = self._pending[request_id] = loop.create_future()
+            requests.append((worker, request_id, future))
+            try:
+                worker.writer.write(_encode({'type': 'stats', 'id': request_id}))
+                await worker.writer.drain()
+            except (ConnectionError, RuntimeError):
+                future.cancel()
+
+        per_worker = []
+        for worker, request_id, future in requests:
+            try:
+                stats = await asyncio.wait_for(future, timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._pending.pop(request_id, None)
+                stats = {}
+            per_worker.append({'worker': worker.index, 'dispatched': worker.dispatched,
+                               'restarts': worker.restarts, 'stats': stats})
+        return {
+            'workers': per_worker,
+            'total': aggregate_stats([entry['stats'] for entry in per_worker]),
+            'unrouted': self.unrouted,
+            'dropped': self.dropped
+        }
+
+    async def stop(self, timeout: float = 15.0) -> None:
+        """Close every worker's socket (workers drain and exit) and wait for them"""
+        self._stopping = True
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for worker in self._workers:
+            worker.writer.close()
+        for worker in self._workers:
+            await asyncio.to_thread(worker.process.join, timeout)
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.index} did not stop in time; terminating")
+                worker.process.terminate()
+                await asyncio.to_thread(worker.process.join, 5)
+            if worker.reader_task is not None:
+                worker.reader_task.cancel()
+
+
+async def serve_worker_channel(sock: socket.socket, handle_update: Callable[[Dict[str, Any]], Awaitable[Any]],
+                               get_stats: Callable[[], Dict[str, Any]], max_pending: int = 1024) -> None:
+    """
+    Worker side of the supervisor socket: start handle_update for every update
+    (at most max_pending at a time) and answer stats requests. Returns once
+    the supervisor closed the socket and every started update finished.
+    """
+    reader, writer = await asyncio.open_unix_connection(sock=sock)
+    slots = asyncio.Semaphore(max_pending)
+    tasks = set()
+
+    async def process(update):
+        try:
+            await handle_update(update)
+        except Exception as e:
+            logger.error(f"Update {update.get('update_id')} failed: {e}")
+        finally:
+            slots.release()
+
+    while True:
+        await slots.acquire()  # Stop reading while max_pending updates are open
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        if message.get('type') == 'update':
+            task = asyncio.get_running_loop().create_task(process(message['update']))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        else:
+            slots.release()
+            if message.get('type') == 'stats':
+                writer.write(_encode({'type': 'stats', 'id': message.get('id'), 'stats': get_stats()}))
+                await writer.drain()
+
+    if tasks:
+        await asyncio.wait(tasks)
+    writer.close()
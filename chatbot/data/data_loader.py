@@ -3,54 +3,122 @@ Data Loader for Nutrition Chatbot
 Handles loading and accessing JSON data files
 """
 
-import json
 import os
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
+from core.metrics import REGISTRY
+from data.data_registry import DATA_FILES, DataRegistry, get_data_registry
+from data.meal_index import MealIndex
+from data.nutrition_matrix import NutritionMatrix
+from data.recipe_index import RecipeIngredientIndex
+from data.records import Food, Meal, Recipe, as_record
+
+def build_id_map(records: List[Dict[str, Any]], id_fields: Tuple[str, ...]) -> Dict[str, Dict[str, Any]]:
+    """Map every id alias to its record; the first record in list order wins, like a linear scan"""
+    id_map = {}
+    for record in records:
+        for field in id_fields:
+            record_id = record.get(field)
+            if record_id is not None:
+                id_map.setdefault(record_id, record)
+    return id_map
+
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent / "raw_data"
+
+INDEX_BUILD_SECONDS = REGISTRY.gauge(
+    'chatbot_catalog_index_build_seconds', 'Time the last build of all catalog indexes took')
+
+def get_data_dir() -> Path:
+    """Get the catalog folder: NUTRITION_DATA_DIR if set, else the bundled raw_data folder"""
+    return Path(os.getenv('NUTRITION_DATA_DIR') or DEFAULT_DATA_DIR)
+
+_shared_loaders: Dict[Path, 'DataLoader'] = {}
+_shared_loaders_lock = threading.Lock()
+
+def get_shared_data_loader(base_path: Optional[Path] = None) -> 'DataLoader':
+    """Get the process-wide DataLoader of a catalog folder (the configured one by default)"""
+    key = Path(base_path or get_data_dir()).resolve()
+    loader = _shared_loaders.get(key)
+    if loader is None:
+        with _shared_loaders_lock:
+            loader = _shared_loaders.get(key)
+            if loader is None:
+                loader = _shared_loaders[key] = DataLoader(key)
+    return loader
 
 class DataLoader:
     """Handles loading and accessing nutrition data"""
     
-    def __init__(self):
+    def __init__(self, base_path: Optional[Path] = None, registry: Optional[DataRegistry] = None):
         # Get the path to the raw_data folder
-        self.base_path = Path(__file__).parent.parent.parent / "raw_data"
-        self._data_cache = {}
+        self.base_path = Path(base_path) if base_path else get_data_dir()
+        self._registry = registry or get_data_registry()
         self._load_all_data()
     
     def _load_all_data(self) -> None:
-        """Load all JSON data files into memory"""
-        data_files = {
-            'recipes': 'recipes_raw.json',
-            'foods_nutrition': 'foods_nutrition_raw.json',
-            'meal_suggestions': 'meal_suggestions_raw.json',
-            'cooking_instructions': 'cooking_instructions_raw.json',
-            'grocery_support': 'grocery_support_raw.json'
-        }
-        
-        for data_key, filename in data_files.items():
-            file_path = self.base_path / filename
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self._data_cache[data_key] = json.load(f)
-                print(f"✅ Loaded {data_key} data from {filename}")
-            except FileNotFoundError:
-                print(f"⚠️ Warning: {filename} not found")
-                self._data_cache[data_key] = {}
-            except json.JSONDecodeError as e:
-                print(f"⚠️ Warning: Error parsing {filename}: {e}")
-                self._data_cache[data_key] = {}
-    
-    def get_recipes(self) -> List[Dict[str, Any]]:
-        """Get all recipes"""
+        """Attach to the shared, already-parsed data (parsed on first use per process)"""
+        self._folder = self._registry.get_folder(self.base_path)
+        self._data_cache = self._folder.data
+        
+        # Freshly parsed (or re-validated) data: build every index now so the snapshot carries them
+        if self._folder.snapshot_pending:
+            start = time.perf_counter()
+            self.build_indexes()
+            INDEX_BUILD_SECONDS.set(time.perf_counter() - start)
+            self._registry.save_snapshot(self._folder)
+    
+    def build_indexes(self) -> None:
+        """Build all derived indexes up front"""
+        self._get_meal_index()
+        self.get_nutrition_matrix()
+        self._get_recipe_ingredient_index()
+        for dataset in ('recipes', 'meals', 'foods', 'cooking_instructions'):
+            self._get_id_map(dataset)
+    
+    def _get_derived(self, name: str, builder) -> Any:
+        """Get an index derived from the loaded data, shared by all loaders of this folder"""
+        return self._registry.get_derived(self._folder, name, builder)
+    
+    def _get_id_map(self, dataset: str) -> Dict[str, Dict[str, Any]]:
+        """Get the id -> record map of a dataset (recipes, meals, foods, cooking_instructions)"""
+        id_fields, get_records = {
+            'recipes': (('id', 'recipe_id'), self.get_recipes),
+            'meals': (('id',), self.get_meals),
+            'foods': (('id', 'food_id'), self.get_foods_nutrition),
+            'cooking_instructions': (('recipe_id',), self.get_cooking_instructions)
+        }[dataset]
+        return self._get_derived(f'{dataset}_by_id', lambda: build_id_map(get_records(), id_fields))
+    
+    def _get_meal_index(self) -> MealIndex:
+        """Get the precomputed meal query index"""
+        return self._get_derived('meal_index', lambda: MealIndex(self.get_meals()))
+    
+    def get_nutrition_matrix(self) -> NutritionMatrix:
+        """Get the column-oriented nutrition matrix used for meal scoring"""
+        return self._get_derived('nutrition_matrix', lambda: NutritionMatrix(self.get_meals()))
+    
+    def _get_recipe_ingredient_index(self) -> RecipeIngredientIndex:
+        """Get the inverted ingredient index over recipes"""
+        return self._get_derived('recipe_ingredient_index', lambda: RecipeIngredientIndex(self.get_recipes()))
+    
+    def get_catalog_version(self, name: str = 'meal_suggestions') -> str:
+        """Content hash of a dataset's source file ('missing' if there is none); changes with the file"""
+        source = self._folder.sources.get(DATA_FILES[name])
+        return source[2] if source else 'missing'
+    
+    def get_dataset(self, name: str, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get the read-only view of a whole dataset file, or default if it is missing or empty"""
+        return self._data_cache.get(name) or default
+    
+    def get_recipes(self) -> List[Recipe]:
+        """Get all recipes (read-only records; copy() gives a plain dict)"""
         return self._data_cache.get('recipes', {}).get('recipes', [])
     
     def get_recipe_by_id(self, recipe_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific recipe by ID"""
-        recipes = self.get_recipes()
-        for recipe in recipes:
-            if recipe.get('id') == recipe_id or recipe.get('recipe_id') == recipe_id:
-                return recipe
-        return None
+        return self._get_id_map('recipes').get(recipe_id)
     
     def search_recipes_by_name(self, search_term: str) -> List[Dict[str, Any]]:
         """Search recipes by name"""
@@ -95,29 +163,13 @@ class DataLoader:
         ]
     
     def filter_recipes_by_ingredients(self, available_ingredients: List[str]) -> List[Dict[str, Any]]:
-        """Filter recipes that can be made with available ingredients"""
-        recipes = self.get_recipes()
-        filtered_recipes = []
-        available_lower = [ing.lower() for ing in available_ingredients]
-        
-        for recipe in recipes:
-            recipe_ingredients = [
-                ing.get('name', '').lower() 
-                for ing in recipe.get('ingredients', [])
-            ]
-            
-            # Check if at least 70% of recipe ingredients are available
-            matching_ingredients = sum(
-                1 for ing in recipe_ingredients 
-                if any(avail in ing for avail in available_lower)
-            )
-            
-            if len(recipe_ingredients) > 0:
-                match_percentage = matching_ingredients / len(recipe_ingredients)
-                if match_percentage >= 0.7:
-                    filtered_recipes.append(recipe)
-        
-        return filtered_recipes
+        """Filter recipes that can be made with available ingredients, best coverage first"""
+        return [recipe for recipe, coverage in self.rank_recipes_by_ingredients(available_ingredients)]
+    
+    def rank_recipes_by_ingredients(self, available_ingredients: List[str],
+                                    min_coverage: float = 0.7) -> List[Tuple[Dict[str, Any], float]]:
+        """Get (recipe, coverage) pairs where at least min_coverage of the ingredients are available"""
+        return self._get_recipe_ingredient_index().rank(available_ingredients, min_coverage)
     
     def get_cuisine_types(self) -> List[str]:
         """Get all available cuisine types"""
@@ -153,56 +205,35 @@ class DataLoader:
         
         return []
     
-    def get_meals(self) -> List[Dict[str, Any]]:
-        """Get all meal suggestions"""
+    def get_meals(self) -> List[Meal]:
+        """Get all meal suggestions (read-only records; copy() gives a plain dict)"""
         return self._data_cache.get('meal_suggestions', {}).get('meal_suggestions', [])
     
     def get_meal_by_id(self, meal_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific meal by ID"""
-        meals = self.get_meals()
-        for meal in meals:
-            if meal.get('id') == meal_id:
-                return meal
-        return None
+        return self._get_id_map('meals').get(meal_id)
     
     def filter_meals_by_calories(self, min_calories: int, max_calories: int) -> List[Dict[str, Any]]:
         """Filter meals by calorie range"""
-        meals = self.get_meals()
-        return [
-            meal for meal in meals
-            if min_calories <= meal.get('calories', 0) <= max_calories
-        ]
+        return self._get_meal_index().filter(min_calories=min_calories, max_calories=max_calories)
     
     def filter_meals_by_type(self, meal_types: List[str]) -> List[Dict[str, Any]]:
         """Filter meals by meal type (breakfast, lunch, dinner, snack)"""
-        meals = self.get_meals()
-        meal_types_lower = [mt.lower() for mt in meal_types]
+        meal_index = self._get_meal_index()
+        positions = set()
+        for meal_type in meal_types:
+            positions.update(meal_index.type_postings.get(meal_type.lower(), []))
         
-        filtered_meals = []
-        for meal in meals:
-            meal_type_list = meal.get('meal_type', [])
-            # Check if any of the meal's types match our target types
-            if any(mt.lower() in meal_types_lower for mt in meal_type_list):
-                filtered_meals.append(meal)
-        
-        return filtered_meals
+        meals = self.get_meals()
+        return [meals[pos] for pos in sorted(positions)]
     
     def filter_meals_by_dietary_tags(self, dietary_tags: List[str]) -> List[Dict[str, Any]]:
         """Filter meals by dietary tags"""
         if not dietary_tags:
             return self.get_meals()
         
-        meals = self.get_meals()
-        dietary_tags_lower = [tag.lower() for tag in dietary_tags]
-        
-        filtered_meals = []
-        for meal in meals:
-            meal_tags = [tag.lower() for tag in meal.get('dietary_tags', [])]
-            # Check if meal contains all required dietary tags
-            if all(tag in meal_tags for tag in dietary_tags_lower):
-                filtered_meals.append(meal)
-        
-        return filtered_meals
+        meal_index = self._get_meal_index()
+        return meal_index.meals_for_mask(meal_index.all_tags_mask(dietary_tags))
     
     def filter_meals_by_multiple_criteria(self, 
                                         min_calories: int = 0, 
@@ -212,38 +243,14 @@ class DataLoader:
                                         dietary_tags: List[str] = None,
                                         max_prep_time: int = None) -> List[Dict[str, Any]]:
         """Filter meals by multiple criteria"""
-        meals = self.get_meals()
-        
-        # Apply calorie filter
-        meals = [meal for meal in meals 
-                if min_calories <= meal.get('calories', 0) <= max_calories]
-        
-        # Apply single meal type filter (for meal planning)
-        if meal_type:
-            meal_type_lower = meal_type.lower()
-            meals = [meal for meal in meals
-                    if meal_type_lower in [mt.lower() for mt in meal.get('meal_type', [])]]
-        
-        # Apply meal type filter (multiple types)
-        if meal_types:
-            meal_types_lower = [mt.lower() for mt in meal_types]
-            meals = [meal for meal in meals
-                    if any(mt.lower() in meal_types_lower 
-                          for mt in meal.get('meal_type', []))]
-        
-        # Apply dietary tags filter
-        if dietary_tags:
-            dietary_tags_lower = [tag.lower() for tag in dietary_tags]
-            meals = [meal for meal in meals
-                    if all(tag in [t.lower() for t in meal.get('dietary_tags', [])]
-                          for tag in dietary_tags_lower)]
-        
-        # Apply prep time filter
-        if max_prep_time:
-            meals = [meal for meal in meals
-                    if meal.get('prep_time', float('inf')) <= max_prep_time]
-        
-        return meals
+        return self._get_meal_index().filter(
+            min_calories=min_calories,
+            max_calories=max_calories,
+            meal_type=meal_type,
+            meal_types=meal_types,
+            dietary_tags=dietary_tags,
+            max_prep_time=max_prep_time
+        )
     
     def get_meal_dietary_tags(self) -> List[str]:
         """Get all available dietary tags from meals"""
@@ -268,58 +275,8 @@ class DataLoader:
         return sorted(list(meal_types))
     
     def find_similar_meals(self, reference_meal: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
-        """Find meals similar to the reference meal"""
-        meals = self.get_meals()
-        reference_id = reference_meal.get('id')
-        reference_calories = reference_meal.get('calories', 0)
-        reference_tags = set(reference_meal.get('dietary_tags', []))
-        reference_types = set(reference_meal.get('meal_type', []))
-        
-        similar_meals = []
-        for meal in meals:
-            if meal.get('id') == reference_id:
-                continue  # Skip the reference meal itself
-            
-            # Calculate similarity score
-            score = 0
-            
-            # Calorie similarity (within 100 calories gets points)
-            calorie_diff = abs(meal.get('calories', 0) - reference_calories)
-            if calorie_diff <= 50:
-                score += 3
-            elif calorie_diff <= 100:
-                score += 2
-            elif calorie_diff <= 150:
-                score += 1
-            
-            # Dietary tags similarity
-            meal_tags = set(meal.get('dietary_tags', []))
-            common_tags = reference_tags.intersection(meal_tags)
-            score += len(common_tags)
-            
-            # Meal type similarity  
-            meal_types = set(meal.get('meal_type', []))
-            common_types = reference_types.intersection(meal_types)
-            score += len(common_types) * 2
-            
-            if score > 0:
-                similar_meals.append((meal, score))
-        
-        # Sort by similarity score and return top results
-        similar_meals.sort(key=lambda x: x[1], reverse=True)
-        return [meal for meal, score in similar_meals[:limit]]
-    
-    def get_foods_nutrition(self) -> List[Dict[str, Any]]:
-        """Get all foods nutrition data"""
-        return self._data_cache.get('foods_nutrition', {}).get('foods', [])
-    
-    def get_food_by_id(self, food_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific food item by ID"""
-        foods = self.get_foods_nutrition()
-        for food in foods:
-            if food.get('food_id') == food_id:
-                return food
-        return None
+        """Find meals similar to the reference meal (close calories, shared tags and meal types)"""
+        return self.get_nutrition_matrix().similar_meals(reference_meal, limit)
     
     def get_available_dietary_tags(self) -> List[str]:
         """Get all available dietary tags from meals (for meal planning)"""
@@ -551,7 +508,7 @@ class DataLoader:
     
     def reload_data(self) -> None:
         """Reload all data from files"""
-        self._data_cache.clear()
+        self._registry.invalidate(self.base_path)
         self._load_all_data()
     
     # ========================================
@@ -564,11 +521,7 @@ class DataLoader:
     
     def get_cooking_instructions_by_recipe_id(self, recipe_id: str) -> Optional[Dict[str, Any]]:
         """Get cooking instructions for a specific recipe"""
-        cooking_instructions = self.get_cooking_instructions()
-        for instruction in cooking_instructions:
-            if instruction.get('recipe_id') == recipe_id:
-                return instruction
-        return None
+        return self._get_id_map('cooking_instructions').get(recipe_id)
     
     def get_recipe_cooking_data(self, recipe_id: str) -> Optional[Dict[str, Any]]:
         """Get combined recipe and cooking instruction data"""
@@ -652,13 +605,7 @@ class DataLoader:
     
     def search_recipes_for_cooking(self, search_term: str) -> List[Dict[str, Any]]:
         """Search recipes that have cooking instructions available"""
-        available_recipe_ids = set()
-        cooking_instructions = self.get_cooking_instructions()
-        
-        for instruction in cooking_instructions:
-            recipe_id = instruction.get('recipe_id')
-            if recipe_id:
-                available_recipe_ids.add(recipe_id)
+        available_recipe_ids = self._get_id_map('cooking_instructions')
         
         # Get recipes that match search term and have cooking instructions
         matching_recipes = []
@@ -675,17 +622,13 @@ class DataLoader:
     # FOOD CALORIE TRACKING METHODS
     # ========================================
     
-    def get_foods_nutrition(self) -> List[Dict[str, Any]]:
-        """Get all foods nutrition data"""
+    def get_foods_nutrition(self) -> List[Food]:
+        """Get all foods nutrition data (read-only records; copy() gives a plain dict)"""
         return self._data_cache.get('foods_nutrition', {}).get('foods', [])
     
     def get_food_by_id(self, food_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific food item by ID"""
-        foods = self.get_foods_nutrition()
-        for food in foods:
-            if food.get('id') == food_id:
-                return food
-        return None
+        return self._get_id_map('foods').get(food_id)
     
     def search_foods_by_name(self, search_term: str) -> List[Dict[str, Any]]:
         """Search foods by name and common names"""
@@ -752,67 +695,9 @@ class DataLoader:
             if 'serving_options' in food:
                 return food['serving_options']
             
-            # Convert from raw format (per_100g) to serving options format
+            # Raw format: derive servings from the per-100g values
             elif 'per_100g' in food:
-                per_100g = food['per_100g']
-                serving_options = [{
-                    'id': 'serving_100g',
-                    'description': '100g',
-                    'weight_g': 100,
-                    'calories': per_100g.get('calories', 0),
-                    'macros': {
-                        'protein': per_100g.get('protein', 0),
-                        'carbs': per_100g.get('carbs', 0),
-                        'fat': per_100g.get('fat', 0),
-                        'fiber': per_100g.get('fiber', 0),
-                        'sugar': per_100g.get('sugar', 0)
-                    }
-                }]
-                
-                # Add common serving sizes based on category
-                category = food.get('category', '').lower()
-                base_calories = per_100g.get('calories', 0)
-                base_macros = {
-                    'protein': per_100g.get('protein', 0),
-                    'carbs': per_100g.get('carbs', 0),
-                    'fat': per_100g.get('fat', 0),
-                    'fiber': per_100g.get('fiber', 0),
-                    'sugar': per_100g.get('sugar', 0)
-                }
-                
-                # Add category-specific servings
-                if category == 'protein':
-                    # Add 85g serving (typical chicken breast piece)
-                    serving_options.append({
-                        'id': 'serving_85g',
-                        'description': '1 piece (85g)',
-                        'weight_g': 85,
-                        'calories': int(base_calories * 0.85),
-                        'macros': {k: round(v * 0.85, 1) for k, v in base_macros.items()}
-                    })
-                    
-                    # Add 150g serving (large portion)
-                    serving_options.append({
-                        'id': 'serving_150g', 
-                        'description': '1 large serving (150g)',
-                        'weight_g': 150,
-                        'calories': int(base_calories * 1.5),
-                        'macros': {k: round(v * 1.5, 1) for k, v in base_macros.items()}
-                    })
-                
-                elif category in ['dairy', 'vegetable', 'grain']:
-                    # Add cup serving
-                    cup_weight = 200 if category == 'dairy' else 150
-                    factor = cup_weight / 100
-                    serving_options.append({
-                        'id': f'serving_{cup_weight}g',
-                        'description': f'1 cup ({cup_weight}g)',
-                        'weight_g': cup_weight,
-                        'calories': int(base_calories * factor),
-                        'macros': {k: round(v * factor, 1) for k, v in base_macros.items()}
-                    })
-                
-                return serving_options
+                return as_record(food, Food).default_servings()
         
         return []
     
@@ -0,0 +1,279 @@
+"""
+Data Registry for Nutrition Chatbot
+Process-wide cache of parsed JSON datasets shared by every DataLoader
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, Callable, Mapping, Optional, Tuple
+
+from core.metrics import REGISTRY
+from data.records import to_records
+
+# Dataset key -> file name inside the raw_data folder
+DATA_FILES = {
+    'recipes': 'recipes_raw.json',
+    'foods_nutrition': 'foods_nutrition_raw.json',
+    'meal_suggestions': 'meal_suggestions_raw.json',
+    'cooking_instructions': 'cooking_instructions_raw.json',
+    'grocery_support': 'grocery_support_raw.json'
+}
+
+# Bump when the layout of the snapshot or of any derived index changes
+SNAPSHOT_VERSION = 5
+SNAPSHOT_FILENAME = '.catalog_snapshot.pickle'
+
+CATALOG_LOAD_SECONDS = REGISTRY.gauge(
+    'chatbot_catalog_load_seconds', 'Time the last catalog load took', ('source',))
+
+
+class CachedFolder:
+    """Parsed datasets of one data folder plus the indexes derived from them"""
+
+    def __init__(self, base_path: Path, datasets: Dict[str, Any], sources: Dict[str, Any],
+                 derived: Optional[Dict[str, Any]] = None, snapshot_pending: bool = False):
+        self.base_path = base_path
+        self.datasets = datasets  # Parsed JSON with catalog records in place, kept for snapshot writing
+        self.sources = sources    # File name -> (size, mtime_ns, sha256) of the source JSON
+        self.derived: Dict[str, Any] = derived or {}
+        self.snapshot_pending = snapshot_pending
+        self.data = MappingProxyType({
+            key: MappingProxyType(value) if isinstance(value, dict) else value
+            for key, value in datasets.items()
+        })
+
+
+class DataRegistry:
+    """
+    Parses each data folder once per process and hands out shared read-only views.
+    Meals, foods, recipes and cooking steps are turned into slotted records
+    while parsing, so only the compact form stays in memory.
+
+    Parsed datasets and their derived indexes are also written to a pickle
+    snapshot next to the source files. A later process whose source files
+    still hash the same loads everything from that snapshot in one read.
+    The snapshot is a local cache written by this process; it is never
+    meant to be shipped or shared between machines.
+    """
+
+    def __init__(self, snapshot_dir: Optional[Path] = None, use_snapshot: bool = True):
+        self._datasets: Dict[Path, CachedFolder] = {}
+        self._lock = threading.RLock()
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.use_snapshot = use_snapshot
+        self.loads = 0  # Number of JSON files actually parsed
+        self.hits = 0   # Number of requests served from the registry
+        self.derived_builds = 0  # Number of derived indexes built
+        self.snapshot_loads = 0  # Number of folders restored from a snapshot
+        self.snapshot_writes = 0
+
+    def get_folder(self, base_path: Path) -> CachedFolder:
+        """Get the cached entry for a data folder, loading it on first use"""
+        base_path = Path(base_path).resolve()
+
+        with self._lock:
+            folder = self._datasets.get(base_path)
+            if folder is not None:
+                self.hits += 1
+                return folder
+
+            start = time.perf_counter()
+            snapshot_loads = self.snapshot_loads
+            folder = self._load_folder(base_path)
+            source = 'snapshot' if self.snapshot_loads > snapshot_loads else 'json'
+            CATALOG_LOAD_SECONDS.set(time.perf_counter() - start, source=source)
+            self._datasets[base_path] = folder
+            return folder
+
+    def get_data(self, base_path: Path) -> Mapping[str, Any]:
+        """Get the read-only dataset view for a data folder"""
+        return self.get_folder(base_path).data
+
+    def get_derived(self, folder: CachedFolder, name: str, builder: Callable[[], Any]) -> Any:
+        """Get a derived structure (index, lookup map) of a folder, building it once"""
+        value = folder.derived.get(name)
+        if value is not None:
+            return value
+
+        with self._lock:
+            value = folder.derived.get(name)
+            if value is None:
+                value = builder()
+                folder.derived[name] = value
+                self.derived_builds += 1
+            return value
+
+    def _load_folder(self, base_path: Path) -> CachedFolder:
+        """Restore a folder from its snapshot, or parse its JSON files"""
+        if self.use_snapshot:
+            folder = self._read_snapshot(base_path)
+            if folder is not None:
+                self.snapshot_loads += 1
+                print(f"✅ Loaded catalog snapshot from {self.snapshot_path(base_path).name}")
+                return folder
+
+        datasets, sources = self._load_datasets(base_path)
+        return CachedFolder(base_path, datasets, sources, snapshot_pending=self.use_snapshot)
+
+    def _load_datasets(self, base_path: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Load all JSON data files of a folder"""
+        datasets = {}
+        sources = {}
+
+        for data_key, filename in DATA_FILES.items():
+            file_path = base_path / filename
+            try:
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                    stat = os.fstat(f.fileno())
+            except FileNotFoundError:
+                print(f"⚠️ Warning: {filename} not found")
+                sources[filename] = None
+                datasets[data_key] = {}
+                continue
+
+            # Recorded before parsing, so a broken file is not re-parsed on every start
+            sources[filename] = (stat.st_size, stat.st_mtime_ns, hashlib.sha256(raw).hexdigest())
+            try:
+                datasets[data_key] = to_records(data_key, json.loads(raw.decode('utf-8')))
+                self.loads += 1
+                print(f"✅ Loaded {data_key} data from {filename}")
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                print(f"⚠️ Warning: Error parsing {filename}: {e}")
+                datasets[data_key] = {}
+
+        return datasets, sources
+
+    # ========================================
+    # SNAPSHOT METHODS
+    # ========================================
+
+    def snapshot_path(self, base_path: Path) -> Path:
+        """Get where the snapshot of a data folder lives"""
+        if self.snapshot_dir is None:
+            return base_path / SNAPSHOT_FILENAME
+        folder_key = hashlib.sha1(str(base_path).encode('utf-8')).hexdigest()[:12]
+        return self.snapshot_dir / f"catalog_snapshot_{folder_key}.pickle"
+
+    def _current_sources(self, base_path: Path, sources: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Check the recorded source files against the files on disk.
+
+        Returns the records as they are now (a touched but identical file gets
+        its new mtime), or None if any file changed.
+        """
+        if set(sources) != set(DATA_FILES.values()):
+            return None
+
+        current = {}
+        for filename, recorded in sources.items():
+            file_path = base_path / filename
+            current[filename] = recorded
+            if recorded is None:
+                if file_path.exists():
+                    return None
+                continue
+            if not file_path.exists():
+                return None
+
+            size, mtime_ns, digest = recorded
+            stat = file_path.stat()
+            if stat.st_size != size:
+                return None
+            if stat.st_mtime_ns != mtime_ns:
+                # Touched but maybe not changed: fall back to the content hash
+                with open(file_path, 'rb') as f:
+                    if hashlib.sha256(f.read()).hexdigest() != digest:
+                        return None
+                current[filename] = (size, stat.st_mtime_ns, digest)
+        return current
+
+    def _read_snapshot(self, base_path: Path) -> Optional[CachedFolder]:
+        """Restore a folder from its snapshot if the source files still match"""
+        path = self.snapshot_path(base_path)
+        try:
+            with open(path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Warning: Ignoring unreadable snapshot {path.name}: {e}")
+            return None
+
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            return None
+        sources = self._current_sources(base_path, snapshot.get('sources', {}))
+        if sources is None:
+            return None
+
+        # Rewrite the snapshot with refreshed mtimes so touched files are not re-hashed next time
+        return CachedFolder(base_path, snapshot['datasets'], sources, snapshot['derived'],
+                            snapshot_pending=sources != snapshot['sources'])
+
+    def save_snapshot(self, folder: CachedFolder) -> bool:
+        """Write the parsed datasets and every derived index of a folder to disk"""
+        with self._lock:
+            if not folder.snapshot_pending:
+                return False
+            folder.snapshot_pending = False
+
+            path = self.snapshot_path(folder.base_path)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            snapshot = {
+                'version': SNAPSHOT_VERSION,
+                'sources': folder.sources,
+                'datasets': folder.datasets,
+                'derived': folder.derived
+            }
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Warning: Could not write snapshot {path.name}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return False
+
+            self.snapshot_writes += 1
+            return True
+
+    def invalidate(self, base_path: Optional[Path] = None) -> None:
+        """Drop cached data for one folder (or all folders) so it is re-read on next use"""
+        with self._lock:
+            if base_path is None:
+                self._datasets.clear()
+            else:
+                self._datasets.pop(Path(base_path).resolve(), None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get load and hit counters"""
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'hits': self.hits,
+                'derived_builds': self.derived_builds,
+                'snapshot_loads': self.snapshot_loads,
+                'snapshot_writes': self.snapshot_writes,
+                'cached_folders': len(self._datasets)
+            }
+
+
+_registry = DataRegistry(
+    snapshot_dir=os.getenv('DATA_SNAPSHOT_DIR') or None,
+    use_snapshot=os.getenv('DATA_SNAPSHOT', 'on').lower() not in ('off', '0', 'false')
+)
+
+
+def get_data_registry() -> DataRegistry:
+    """Get the process-wide data registry"""
+    return _registry
@@ -0,0 +1,132 @@
+"""
+Meal Index for Nutrition Chatbot
+Precomputed lookup structures behind DataLoader's meal filters
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Iterable, Optional
+
+from data.records import Meal, as_record
+
+_SET_BIT = re.compile('1')
+
+
+def _iter_set_bits(mask: int) -> List[int]:
+    """Get the positions of all set bits in a bitset, lowest first"""
+    if not mask:
+        return []
+    bits = bin(mask)[:1:-1]  # Least significant bit first, '0b' prefix dropped
+    return [match.start() for match in _SET_BIT.finditer(bits)]
+
+
+class MealIndex:
+    """
+    Read-only query index over the meal suggestions list.
+
+    Meals are ranked by calories; every bitset below uses that rank as the
+    bit position, so a calorie range is a contiguous run of bits and each
+    filter becomes a bitwise AND. Results are returned in catalog order.
+    """
+
+    def __init__(self, meals: List[Dict[str, Any]]):
+        self._meals = meals
+        records = [as_record(meal, Meal) for meal in meals]
+
+        # Calorie-sorted array for bisect range lookups
+        calories = [getattr(record, 'calories', 0) for record in records]
+        order = sorted(range(len(meals)), key=lambda pos: (calories[pos], pos))
+        self._rank_to_pos = order
+        self._sorted_calories = [calories[pos] for pos in order]
+        self._all_ranks = (1 << len(meals)) - 1
+
+        # Per-meal-type posting lists (catalog positions) and bitsets (calorie ranks)
+        self.type_postings: Dict[str, List[int]] = {}
+        self._type_bits: Dict[str, int] = {}
+        # Per-tag bitsets (calorie ranks)
+        self._tag_bits: Dict[str, int] = {}
+        # Prep-time buckets: distinct prep times with cumulative bitsets
+        prep_buckets: Dict[float, int] = {}
+
+        for rank, pos in enumerate(order):
+            record = records[pos]
+            bit = 1 << rank
+
+            for meal_type in {mt.lower() for mt in getattr(record, 'meal_type', ())}:
+                self._type_bits[meal_type] = self._type_bits.get(meal_type, 0) | bit
+                self.type_postings.setdefault(meal_type, []).append(pos)
+
+            for tag in {t.lower() for t in getattr(record, 'dietary_tags', ())}:
+                self._tag_bits[tag] = self._tag_bits.get(tag, 0) | bit
+
+            prep_time = getattr(record, 'prep_time', None)
+            if prep_time is not None:
+                prep_buckets[prep_time] = prep_buckets.get(prep_time, 0) | bit
+
+        for postings in self.type_postings.values():
+            postings.sort()
+
+        self._prep_times = sorted(prep_buckets)
+        self._prep_cumulative = []
+        running = 0
+        for prep_time in self._prep_times:
+            running |= prep_buckets[prep_time]
+            self._prep_cumulative.append(running)
+
+    def __len__(self) -> int:
+        return len(self._meals)
+
+    def calorie_mask(self, min_calories: float, max_calories: float) -> int:
+        """Bitset of meals with min_calories <= calories <= max_calories"""
+        lo = bisect_left(self._sorted_calories, min_calories)
+        hi = bisect_right(self._sorted_calories, max_calories)
+        if lo >= hi:
+            return 0
+        return ((1 << hi) - 1) ^ ((1 << lo) - 1)
+
+    def any_type_mask(self, meal_types: Iterable[str]) -> int:
+        """Bitset of meals having at least one of the meal types"""
+        mask = 0
+        for meal_type in meal_types:
+            mask |= self._type_bits.get(meal_type.lower(), 0)
+        return mask
+
+    def all_tags_mask(self, dietary_tags: Iterable[str]) -> int:
+        """Bitset of meals carrying every one of the dietary tags"""
+        mask = self._all_ranks
+        for tag in dietary_tags:
+            mask &= self._tag_bits.get(tag.lower(), 0)
+            if not mask:
+                break
+        return mask
+
+    def prep_time_mask(self, max_prep_time: float) -> int:
+        """Bitset of meals whose prep time is at most max_prep_time"""
+        bucket = bisect_right(self._prep_times, max_prep_time)
+        return self._prep_cumulative[bucket - 1] if bucket else 0
+
+    def meals_for_mask(self, mask: int) -> List[Dict[str, Any]]:
+        """Resolve a bitset to meal records in catalog order"""
+        positions = sorted(self._rank_to_pos[rank] for rank in _iter_set_bits(mask))
+        return [self._meals[pos] for pos in positions]
+
+    def filter(self,
+               min_calories: float = float('-inf'),
+               max_calories: float = float('inf'),
+               meal_type: Optional[str] = None,
+               meal_types: Optional[List[str]] = None,
+               dietary_tags: Optional[List[str]] = None,
+               max_prep_time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Filter meals by any combination of criteria"""
+        mask = self.calorie_mask(min_calories, max_calories)
+
+        if mask and meal_type:
+            mask &= self._type_bits.get(meal_type.lower(), 0)
+        if mask and meal_types:
+            mask &= self.any_type_mask(meal_types)
+        if mask and dietary_tags:
+            mask &= self.all_tags_mask(dietary_tags)
+        if mask and max_prep_time:
+            mask &= self.prep_time_mask(max_prep_time)
+
+        return self.meals_for_mask(mask)
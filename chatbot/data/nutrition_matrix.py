@@ -0,0 +1,264 @@
+"""
+Nutrition Matrix for Nutrition Chatbot
+Column-oriented meal nutrition for vectorized scoring and top-k selection
+"""
+
+import heapq
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives the same results
+    np = None
+
+from data.records import Meal, as_record
+
+# Column name -> (meal field, nutrition field, default when missing)
+COLUMNS = {
+    'calories': ('calories', None, 0),
+    'protein': ('nutrition', 'protein', 0),
+    'carbs': ('nutrition', 'carbs', 0),
+    'fat': ('nutrition', 'fat', 0),
+    'fiber': ('nutrition', 'fiber', 0),
+    'prep_time': ('prep_time', None, 30)
+}
+
+_WORD_BITS = 64
+
+
+class NutritionMatrix:
+    """
+    Meal catalog stored as columns: calories, protein, carbs, fat, fiber and
+    prep_time, plus dietary tag and meal type bitmasks.
+
+    With NumPy each column is a float64 array and the bitmasks are uint64
+    words (one row per meal), so scoring a whole catalog is a handful of
+    array expressions and top-k uses argpartition. Without NumPy the same
+    columns are plain lists and the bitmasks Python ints. Both paths rank
+    exactly like the loops they replace: highest score first, catalog
+    order among equal scores.
+    """
+
+    def __init__(self, meals: List[Dict[str, Any]], use_numpy: Optional[bool] = None):
+        self.meals = meals
+        self.size = len(meals)
+        self.use_numpy = np is not None if use_numpy is None else (use_numpy and np is not None)
+        self.tag_bits: Dict[str, int] = {}
+        self.type_bits: Dict[str, int] = {}
+        self._positions: Dict[Any, int] = {}
+
+        columns = {name: [] for name in COLUMNS}
+        ids = []
+        tag_masks = []
+        type_masks = []
+        for pos, meal in enumerate(meals):
+            record = as_record(meal, Meal)
+            meal_id = getattr(record, 'id', None)
+            ids.append(meal_id)
+            self._positions.setdefault(meal_id, pos)
+            for name, (field, nested, default) in COLUMNS.items():
+                value = getattr(record, field, default) if nested is None else record.numeric(field, nested, default)
+                columns[name].append(float(value))
+            tag_masks.append(self._mask(getattr(record, 'dietary_tags', ()), self.tag_bits, grow=True))
+            type_masks.append(self._mask(getattr(record, 'meal_type', ()), self.type_bits, grow=True))
+
+        if self.use_numpy:
+            self.columns = {name: np.array(values, dtype=np.float64) for name, values in columns.items()}
+            self._ids = np.empty(self.size, dtype=object)
+            self._ids[:] = ids
+            self.tag_words = self._to_words(tag_masks, len(self.tag_bits))
+            self.type_words = self._to_words(type_masks, len(self.type_bits))
+        else:
+            self.columns = columns
+            self._ids = ids
+            self.tag_masks = tag_masks
+            self.type_masks = type_masks
+
+    @staticmethod
+    def _mask(values: Iterable[str], bits: Dict[str, int], grow: bool = False) -> int:
+        """Turn a list of tags into a bitmask, optionally adding unseen tags"""
+        mask = 0
+        for value in values:
+            bit = bits.get(value)
+            if bit is None:
+                if not grow:
+                    continue
+                bit = bits[value] = len(bits)
+            mask |= 1 << bit
+        return mask
+
+    def _to_words(self, masks: List[int], bit_count: int):
+        """Split Python int bitmasks into an (n, words) uint64 array"""
+        word_count = max(1, -(-bit_count // _WORD_BITS))
+        word_mask = (1 << _WORD_BITS) - 1
+        words = np.zeros((self.size, word_count), dtype=np.uint64)
+        for word in range(word_count):
+            shift = word * _WORD_BITS
+            words[:, word] = np.fromiter(((mask >> shift) & word_mask for mask in masks),
+                                         dtype=np.uint64, count=self.size)
+        return words
+
+    def _has_bit(self, kind: str, bit: int):
+        """Boolean vector (or list) of meals having one tag / meal type bit"""
+        if self.use_numpy:
+            words = self.tag_words if kind == 'tag' else self.type_words
+            column = words[:, bit // _WORD_BITS] >> np.uint64(bit % _WORD_BITS)
+            return (column & np.uint64(1)).astype(bool)
+        masks = self.tag_masks if kind == 'tag' else self.type_masks
+        return [bool((mask >> bit) & 1) for mask in masks]
+
+    # ========================================
+    # SELECTION HELPERS
+    # ========================================
+
+    def positions_of(self, meals: Sequence[Dict[str, Any]]) -> Optional[List[int]]:
+        """Map catalog meals back to their rows; None if any meal is not from this catalog"""
+        positions = []
+        for meal in meals:
+            pos = self._positions.get(meal.get('id'))
+            if pos is None or self.meals[pos] is not meal:
+                return None
+            positions.append(pos)
+        return positions
+
+    def _top_k(self, scores, candidates, k: int) -> List[int]:
+        """Rows of the k best scores where candidates is true, ties broken by catalog order"""
+        if k <= 0:
+            return []
+
+        if self.use_numpy:
+            rows = np.flatnonzero(candidates)
+            if rows.size == 0:
+                return []
+            row_scores = scores[rows]
+            if k < rows.size:
+                # Keep every row tied with the k-th best so catalog order decides among them
+                threshold = row_scores[np.argpartition(-row_scores, k - 1)[:k]].min()
+                keep = row_scores >= threshold
+                rows, row_scores = rows[keep], row_scores[keep]
+            order = np.lexsort((rows, -row_scores))[:k]
+            return rows[order].tolist()
+
+        rows = [pos for pos, ok in enumerate(candidates) if ok]
+        return heapq.nsmallest(k, rows, key=lambda pos: (-scores[pos], pos))
+
+    # ========================================
+    # SCORING METHODS
+    # ========================================
+
+    def calorie_search(self, calorie_range: Tuple[float, float], calorie_target: float,
+                       meal_types: Optional[List[str]] = None, dietary_tags: Optional[List[str]] = None,
+                       limit: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Filter and rank meals for a calorie goal.
+
+        Meals must fall inside calorie_range, carry one of meal_types (when
+        given) and every tag in dietary_tags. The score rewards calories close
+        to calorie_target, short prep, matching tags, high protein and fiber.
+        """
+        dietary_tags = dietary_tags or []
+        if any(tag not in self.tag_bits for tag in dietary_tags):
+            return []
+        low, high = calorie_range
+
+        if self.use_numpy:
+            calories = self.columns['calories']
+            candidates = (calories >= low) & (calories <= high)
+            if meal_types is not None:
+                type_mask = np.zeros(self.size, dtype=bool)
+                for meal_type in meal_types:
+                    if meal_type in self.type_bits:
+                        type_mask |= self._has_bit('type', self.type_bits[meal_type])
+                candidates &= type_mask
+            tag_count = np.zeros(self.size)
+            for tag in dietary_tags:
+                has_tag = self._has_bit('tag', self.tag_bits[tag])
+                candidates &= has_tag
+                tag_count += has_tag
+
+            scores = (np.maximum(0, 100 - np.abs(calories - calorie_target))
+                      + np.maximum(0, 50 - self.columns['prep_time'])
+                      + tag_count * 10
+                      + (self.columns['protein'] >= 20) * 15
+                      + (self.columns['fiber'] >= 8) * 10)
+        else:
+            type_mask = self._mask(meal_types or [], self.type_bits)
+            tag_bits = [self.tag_bits[tag] for tag in dietary_tags]
+            required = self._mask(dietary_tags, self.tag_bits)
+            candidates = []
+            scores = []
+            for pos in range(self.size):
+                calories = self.columns['calories'][pos]
+                tags = self.tag_masks[pos]
+                candidates.append(low <= calories <= high
+                                  and (meal_types is None or bool(self.type_masks[pos] & type_mask))
+                                  and tags & required == required)
+                tag_count = sum((tags >> bit) & 1 for bit in tag_bits)
+                scores.append(max(0, 100 - abs(calories - calorie_target))
+                              + max(0, 50 - self.columns['prep_time'][pos])
+                              + tag_count * 10
+                              + (self.columns['protein'][pos] >= 20) * 15
+                              + (self.columns['fiber'][pos] >= 8) * 10)
+
+        return [(self.meals[pos], float(scores[pos])) for pos in self._top_k(scores, candidates, limit)]
+
+    def closest_calorie_meal(self, positions: List[int], target_calories: float, used_ids: Iterable[Any],
+                             tolerance: float = 75) -> Optional[Dict[str, Any]]:
+        """
+        Pick the best meal among the given rows: 60% calorie match within
+        tolerance, 40% variety (meals in used_ids score lower).
+        """
+        used_ids = set(used_ids)
+
+        if self.use_numpy:
+            rows = np.asarray(positions, dtype=np.intp)
+            if rows.size == 0:
+                return None
+            calories = self.columns['calories'][rows]
+            used = np.fromiter((meal_id in used_ids for meal_id in self._ids[rows]), dtype=bool, count=rows.size)
+            variety = np.where(used, 20, 100)
+            scores = np.maximum(0, 100 - (np.abs(calories - target_calories) / tolerance * 100)) * 0.6 + variety * 0.4
+            return self.meals[int(rows[int(np.argmax(scores))])]  # argmax keeps the first of equal scores
+
+        best = None
+        best_score = None
+        for pos in positions:
+            calorie_score = max(0, 100 - (abs(self.columns['calories'][pos] - target_calories) / tolerance * 100))
+            score = calorie_score * 0.6 + (20 if self._ids[pos] in used_ids else 100) * 0.4
+            if best_score is None or score > best_score:
+                best, best_score = pos, score
+        return None if best is None else self.meals[best]
+
+    def similar_meals(self, reference_meal: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank meals by similarity to a reference meal: calories within 50/100/150
+        score 3/2/1, plus one point per shared tag and two per shared meal type.
+        """
+        reference_id = reference_meal.get('id')
+        reference_calories = reference_meal.get('calories', 0)
+        tag_bits = [self.tag_bits[tag] for tag in set(reference_meal.get('dietary_tags', [])) if tag in self.tag_bits]
+        type_bits = [self.type_bits[t] for t in set(reference_meal.get('meal_type', [])) if t in self.type_bits]
+
+        if self.use_numpy:
+            calorie_diff = np.abs(self.columns['calories'] - reference_calories)
+            scores = np.select([calorie_diff <= 50, calorie_diff <= 100, calorie_diff <= 150], [3, 2, 1], 0)
+            for bit in tag_bits:
+                scores = scores + self._has_bit('tag', bit)
+            for bit in type_bits:
+                scores = scores + self._has_bit('type', bit) * 2
+            candidates = scores > 0
+            if reference_id in self._positions:
+                candidates &= self._ids != reference_id
+        else:
+            scores = []
+            candidates = []
+            for pos in range(self.size):
+                calorie_diff = abs(self.columns['calories'][pos] - reference_calories)
+                score = 3 if calorie_diff <= 50 else 2 if calorie_diff <= 100 else 1 if calorie_diff <= 150 else 0
+                score += sum((self.tag_masks[pos] >> bit) & 1 for bit in tag_bits)
+                score += sum((self.type_masks[pos] >> bit) & 1 for bit in type_bits) * 2
+                scores.append(score)
+                candidates.append(score > 0 and self._ids[pos] != reference_id)
+
+        return [self.meals[pos] for pos in self._top_k(scores, candidates, limit)]
+
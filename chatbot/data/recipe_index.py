@@ -0,0 +1,110 @@
+"""
+Recipe Ingredient Index for Nutrition Chatbot
+Inverted index answering "what can I cook with what I have"
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Any, Set, Tuple
+
+
+class RecipeIngredientIndex:
+    """
+    Inverted index from ingredient tokens to recipes.
+
+    Distinct lowercased ingredient names form the vocabulary. Each name keeps
+    a posting array of recipe positions (repeated once per occurrence in that
+    recipe, so counting postings counts matched ingredients), and each
+    whitespace token points at the names containing it. An available
+    ingredient matches a recipe ingredient when it is a substring of the
+    ingredient name, exactly as the original list scan did.
+
+    Lookups never scan the vocabulary: the inner words of a query must be
+    whole tokens and go through the token map, and a word that may be part
+    of a token is found by bisecting the sorted suffixes of all tokens.
+    """
+
+    def __init__(self, recipes: List[Dict[str, Any]]):
+        self._recipes = recipes
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._token_names: Dict[str, Set[int]] = {}
+        self.ingredient_counts: List[int] = []
+
+        for pos, recipe in enumerate(recipes):
+            ingredients = recipe.get('ingredients', [])
+            self.ingredient_counts.append(len(ingredients))
+
+            for ingredient in ingredients:
+                name_id = self._intern_name(ingredient.get('name', '').lower())
+                self._postings[name_id].append(pos)
+
+        # Every suffix of every token, sorted: the tokens containing a word are
+        # the ones owning a suffix that starts with it, a contiguous range
+        suffixes = sorted((token[start:], token) for token in self._token_names
+                          for start in range(len(token)))
+        self._suffixes = [suffix for suffix, token in suffixes]
+        self._suffix_tokens = [token for suffix, token in suffixes]
+
+    def _intern_name(self, name: str) -> int:
+        """Add an ingredient name to the vocabulary and token index"""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_ids[name] = name_id
+            self._postings.append(array('l'))
+            for token in name.split():
+                self._token_names.setdefault(token, set()).add(name_id)
+        return name_id
+
+    def _matching_names(self, available: str) -> Set[int]:
+        """Get ids of ingredient names containing the available ingredient"""
+        words = available.split()
+        if not words:
+            return {name_id for name_id, name in enumerate(self._names) if available in name}
+
+        if len(words) > 2:
+            # Inner words are whole tokens of a matching name
+            candidates = set(self._token_names.get(max(words[1:-1], key=len), ()))
+        else:
+            # Each word lies inside one token of a matching name
+            anchor = max(words, key=len)
+            candidates = set()
+            for token in self._tokens_containing(anchor):
+                candidates.update(self._token_names[token])
+
+        if len(words) == 1 and words[0] == available:
+            return candidates
+        return {name_id for name_id in candidates if available in self._names[name_id]}
+
+    def _tokens_containing(self, word: str) -> Set[str]:
+        """Get the vocabulary tokens that contain a word"""
+        suffixes = self._suffixes
+        tokens = set()
+        pos = bisect_left(suffixes, word)
+        while pos < len(suffixes) and suffixes[pos].startswith(word):
+            tokens.add(self._suffix_tokens[pos])
+            pos += 1
+        return tokens
+
+    def rank(self, available_ingredients: List[str], min_coverage: float = 0.7) -> List[Tuple[Dict[str, Any], float]]:
+        """Get (recipe, coverage) pairs at or above min_coverage, best coverage first"""
+        matched_names: Set[int] = set()
+        for available in available_ingredients:
+            matched_names |= self._matching_names(available.lower())
+
+        matched_counts = Counter()
+        for name_id in matched_names:
+            matched_counts.update(self._postings[name_id])
+
+        ingredient_counts = self.ingredient_counts
+        ranked = [(pos, matched / ingredient_counts[pos])
+                  for pos, matched in matched_counts.items()
+                  if matched / ingredient_counts[pos] >= min_coverage]
+
+        # Highest coverage first, catalog order among equals
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return [(self._recipes[pos], coverage) for pos, coverage in ranked]
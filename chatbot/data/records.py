@@ -0,0 +1,296 @@
+"""
+Catalog Records for Nutrition Chatbot
+Compact slotted records for meals, foods, recipes and cooking steps
+"""
+
+import math
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, List, Any, Iterator, Tuple
+
+_MISSING = float('nan')
+
+# Macros listed in a food's serving options
+SERVING_MACROS = ('protein', 'carbs', 'fat', 'fiber', 'sugar')
+
+
+class CatalogRecord(Mapping):
+    """
+    Slotted, read-only catalog record with a dict-compatible view.
+
+    Known scalar fields live in slots, tag lists become tuples of interned
+    strings, and numeric groups (nutrition, per_100g) are packed into one
+    float array per record. Keys outside the schema are kept in an extra
+    dict so nothing from the source JSON is lost. Journey code can keep
+    using record['name'] or record.get('nutrition', {}); hot paths read
+    attributes such as record.calories or record.numeric('per_100g', 'fat')
+    directly. The registry stores these records in place of the parsed JSON.
+    """
+
+    __slots__ = ('_extra', '_int_flags')
+
+    SCALARS: Tuple[str, ...] = ()
+    INTERNED: Tuple[str, ...] = ()  # Scalars with few distinct values
+    TAGS: Tuple[str, ...] = ()
+    NUMERIC: Dict[str, Tuple[str, ...]] = {}
+
+    def __init__(self, raw: Mapping):
+        extra = {}
+        int_flags = 0
+        flag = 1
+
+        for key, value in raw.items():
+            if key in self.SCALARS:
+                if key in self.INTERNED and isinstance(value, str):
+                    value = sys.intern(value)
+                object.__setattr__(self, key, value)
+            elif key in self.TAGS and isinstance(value, list) and all(isinstance(v, str) for v in value):
+                object.__setattr__(self, key, tuple(sys.intern(v) for v in value))
+            elif key in self.NUMERIC and self._is_numeric_group(key, value):
+                object.__setattr__(self, key, array('d', (float(value.get(name, _MISSING))
+                                                          for name in self.NUMERIC[key])))
+            else:
+                extra[key] = value
+
+        # Remember which numeric values were ints so the dict view round-trips
+        for group, names in self.NUMERIC.items():
+            values = raw.get(group)
+            for name in names:
+                if isinstance(values, Mapping) and type(values.get(name)) is int:
+                    int_flags |= flag
+                flag <<= 1
+
+        object.__setattr__(self, '_extra', extra or None)
+        object.__setattr__(self, '_int_flags', int_flags)
+
+    def _is_numeric_group(self, key: str, value: Any) -> bool:
+        """Check that a nested dict holds only known numeric values"""
+        return (isinstance(value, dict) and set(value) <= set(self.NUMERIC[key])
+                and all(type(v) in (int, float) for v in value.values()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} records are read-only")
+
+    def _numeric_view(self, group: str) -> Dict[str, Any]:
+        """Rebuild the dict form of a numeric group"""
+        flag = 1
+        for name in self.NUMERIC:
+            if name == group:
+                break
+            flag <<= len(self.NUMERIC[name])
+
+        view = {}
+        for name, value in zip(self.NUMERIC[group], getattr(self, group)):
+            if not math.isnan(value):
+                view[name] = int(value) if self._int_flags & flag else value
+            flag <<= 1
+        return view
+
+    def numeric(self, group: str, name: str, default: float = 0) -> float:
+        """Read one packed numeric value without building the dict view"""
+        values = getattr(self, group, None)
+        if values is None:
+            nested = (self._extra or {}).get(group, {})
+            return nested.get(name, default) if isinstance(nested, Mapping) else default
+        names = self.NUMERIC[group]
+        if name not in names:
+            return default
+        value = values[names.index(name)]
+        return default if math.isnan(value) else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.NUMERIC and hasattr(self, key):
+            return self._numeric_view(key)
+        if key in self.TAGS and hasattr(self, key):
+            return list(getattr(self, key))
+        if key in self.SCALARS or key in self.TAGS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.SCALARS + self.TAGS + tuple(self.NUMERIC):
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.SCALARS or key in self.TAGS or key in self.NUMERIC:
+            if hasattr(self, key):
+                return True
+        return bool(self._extra) and key in self._extra
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for cls in type(self).__mro__
+                for slot in getattr(cls, '__slots__', ()) if hasattr(self, slot)}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            object.__setattr__(self, slot, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # Read-only and shared: a copied plan or journey keeps the catalog record itself
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a plain, mutable dict copy of the record"""
+        return {key: self[key] for key in self}
+
+    copy = to_dict
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r}, name={getattr(self, 'name', None)!r})"
+
+
+class Meal(CatalogRecord):
+    """A meal suggestion"""
+
+    __slots__ = ('id', 'name', 'calories', 'prep_time', 'components',
+                 'meal_type', 'dietary_tags', 'nutrition')
+
+    SCALARS = ('id', 'name', 'calories', 'prep_time', 'components')
+    TAGS = ('meal_type', 'dietary_tags')
+    NUMERIC = {'nutrition': ('protein', 'carbs', 'fat', 'fiber')}
+
+    @property
+    def protein(self) -> float:
+        return self.numeric('nutrition', 'protein')
+
+    @property
+    def carbs(self) -> float:
+        return self.numeric('nutrition', 'carbs', self.numeric('nutrition', 'carbohydrates'))
+
+    @property
+    def fat(self) -> float:
+        return self.numeric('nutrition', 'fat')
+
+    @property
+    def fiber(self) -> float:
+        return self.numeric('nutrition', 'fiber')
+
+
+class Food(CatalogRecord):
+    """A food item with nutrition per 100g"""
+
+    __slots__ = ('id', 'name', 'category', 'subcategory', 'dietary_tags', 'common_names',
+                 'per_100g', 'vitamins_per_100g', 'minerals_per_100g')
+
+    SCALARS = ('id', 'name', 'category', 'subcategory')
+    INTERNED = ('category', 'subcategory')
+    TAGS = ('dietary_tags', 'common_names')
+    NUMERIC = {
+        'per_100g': ('calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar', 'sodium'),
+        'vitamins_per_100g': ('vitamin_a', 'thiamine', 'riboflavin', 'niacin', 'vitamin_b6', 'folate',
+                              'vitamin_b12', 'vitamin_c', 'vitamin_d', 'vitamin_e', 'vitamin_k'),
+        'minerals_per_100g': ('calcium', 'iron', 'magnesium', 'phosphorus', 'potassium', 'sodium',
+                              'zinc', 'copper', 'manganese', 'selenium', 'iodine')
+    }
+
+    def default_servings(self) -> List[Dict[str, Any]]:
+        """Serving options derived from the per-100g values: 100g plus a typical portion for the category"""
+        per_100g = self.get('per_100g') or {}  # The dict view keeps whole numbers as ints
+        base_calories = per_100g.get('calories', 0)
+        base_macros = {macro: per_100g.get(macro, 0) for macro in SERVING_MACROS}
+        servings = [{
+            'id': 'serving_100g',
+            'description': '100g',
+            'weight_g': 100,
+            'calories': base_calories,
+            'macros': dict(base_macros)
+        }]
+
+        category = (getattr(self, 'category', None) or '').lower()
+        if category == 'protein':
+            portions = [(85, '1 piece (85g)'), (150, '1 large serving (150g)')]
+        elif category in ('dairy', 'vegetable', 'grain'):
+            cup_weight = 200 if category == 'dairy' else 150
+            portions = [(cup_weight, f'1 cup ({cup_weight}g)')]
+        else:
+            portions = []
+
+        for weight, description in portions:
+            factor = weight / 100
+            servings.append({
+                'id': f'serving_{weight}g',
+                'description': description,
+                'weight_g': weight,
+                'calories': int(base_calories * factor),
+                'macros': {macro: round(value * factor, 1) for macro, value in base_macros.items()}
+            })
+        return servings
+
+
+class Recipe(CatalogRecord):
+    """A recipe"""
+
+    __slots__ = ('id', 'name', 'cuisine', 'difficulty', 'prep_time', 'cook_time', 'total_time',
+                 'servings', 'calories_per_serving', 'ingredients', 'dietary_tags', 'nutrition')
+
+    SCALARS = ('id', 'name', 'cuisine', 'difficulty', 'prep_time', 'cook_time', 'total_time',
+               'servings', 'calories_per_serving', 'ingredients')
+    INTERNED = ('cuisine', 'difficulty')
+    TAGS = ('dietary_tags',)
+    NUMERIC = {'nutrition': ('protein', 'carbs', 'fat', 'fiber')}
+
+
+class CookingStep(CatalogRecord):
+    """One step of a recipe's cooking instructions"""
+
+    __slots__ = ('step_number', 'phase', 'instruction', 'duration_minutes', 'timer_needed',
+                 'temperature', 'tips', 'visual_cues', 'can_prep_ahead', 'equipment')
+
+    SCALARS = ('step_number', 'phase', 'instruction', 'duration_minutes', 'timer_needed',
+               'temperature', 'tips', 'visual_cues', 'can_prep_ahead')
+    INTERNED = ('phase',)
+    TAGS = ('equipment',)
+
+
+# Dataset key -> (list key, record type) of the catalog lists stored as records
+RECORD_LISTS = {
+    'meal_suggestions': ('meal_suggestions', Meal),
+    'foods_nutrition': ('foods', Food),
+    'recipes': ('recipes', Recipe)
+}
+
+
+def as_record(item: Mapping, record_type: type) -> CatalogRecord:
+    """The item itself if it already is such a record, else a record built from it"""
+    return item if isinstance(item, record_type) else record_type(item)
+
+
+def to_records(data_key: str, dataset: Any) -> Any:
+    """
+    Replace the raw JSON records of a parsed dataset with slotted records, in place.
+
+    Meals, foods and recipes become records and each cooking instruction's
+    steps a tuple of CookingStep; anything unexpected is left as parsed.
+    """
+    if not isinstance(dataset, dict):
+        return dataset
+
+    if data_key in RECORD_LISTS:
+        list_key, record_type = RECORD_LISTS[data_key]
+        raw_records = dataset.get(list_key)
+        if isinstance(raw_records, list):
+            dataset[list_key] = [record_type(raw) if isinstance(raw, dict) else raw for raw in raw_records]
+
+    elif data_key == 'cooking_instructions':
+        for instruction in dataset.get('cooking_instructions') or ():
+            steps = instruction.get('steps') if isinstance(instruction, dict) else None
+            if isinstance(steps, list):
+                instruction['steps'] = tuple(CookingStep(step) if isinstance(step, dict) else step
+                                             for step in steps)
+
+    return dataset
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram Bot API for local load and integration testing
+Serves getUpdates, sendMessage, editMessageText and answerCallbackQuery
+for one bot, and lets tests play the users on the other side
+"""
+
+import os
+import sys
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Optional, Tuple
+from urllib.parse import parse_qsl
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.outbound import is_valid_markdown
+from core.webhook_server import serve_http_connection
+
+BOT_USER = {'id': 100000001, 'is_bot': True, 'first_name': 'Nutrition Test Bot', 'username': 'nutrition_test_bot',
+            'can_join_groups': False, 'can_read_all_group_messages': False, 'supports_inline_queries': False}
+
+# Form parameters taken verbatim; the others may carry JSON (reply_markup, numbers, ...)
+_TEXT_PARAMS = frozenset({'text', 'parse_mode', 'callback_query_id', 'url', 'secret_token'})
+
+
+class _Chat:
+    """What one simulated user has received so far"""
+
+    __slots__ = ('received', 'last_text', 'last_message_id', 'event')
+
+    def __init__(self):
+        self.received = 0
+        self.last_text = ''
+        self.last_message_id = None
+        self.event = asyncio.Event()
+
+
+class FakeBotApi:
+    """
+    Stand-in for api.telegram.org on a local port.
+
+    The bot under test is pointed at http://host:port (TELEGRAM_API_BASE_URL).
+    Tests and the load driver act as users: send_text and press_button queue
+    updates that the bot long-polls with getUpdates, and wait_for_reply waits
+    until the bot answered a chat (sendMessage or editMessageText). With
+    emulate_limits, sends faster than Telegram allows get 429 answers and
+    Markdown that would not parse gets a 400, like the real API.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, emulate_limits: bool = False,
+                 chat_interval: float = 1.0, global_rate: float = 30.0):
+        self.host = host
+        self.port = port
+        self.emulate_limits = emulate_limits
+        self.chat_interval = chat_interval
+        self.global_rate = global_rate
+        self._updates: Deque[Dict[str, Any]] = deque()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_updates = asyncio.Event()
+        self._chats: Dict[int, _Chat] = {}
+        self._last_send: Dict[int, float] = {}
+        self._global_sends: Deque[float] = deque()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.polled = asyncio.Event()  # Set once the bot called getUpdates
+        self.calls: Dict[str, int] = {}
+        self.rejected = 0
+
+    # ========================================
+    # SERVER
+    # ========================================
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            lambda reader, writer: serve_http_connection(reader, writer, self._respond),
+            self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str],
+                       body: Optional[bytes]) -> Tuple[int, Dict[str, Any]]:
+        path = target.split('?', 1)[0].strip('/').split('/')
+        if len(path) != 2 or not path[0].startswith('bot'):
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        api_method = path[1]
+        params = self._parse_params(headers, body or b'', target)
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+
+        handler = getattr(self, '_api_' + api_method, None)
+        if handler is None:
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}
+        try:
+            result = await handler(params)
+        except _ApiError as e:
+            payload = {'ok': False, 'error_code': e.status, 'description': e.description}
+            if e.retry_after is not None:
+                payload['parameters'] = {'retry_after': e.retry_after}
+            return e.status, payload
+        return 200, {'ok': True, 'result': result}
+
+    @staticmethod
+    def _parse_params(headers: Dict[str, str], body: bytes, target: str) -> Dict[str, Any]:
+        """Accept JSON bodies and form/query parameters whose values may be JSON"""
+        if headers.get('content-type', '').startswith('application/json'):
+            return json.loads(body) if body else {}
+        params = {}
+        for key, value in parse_qsl(body.decode()) + parse_qsl(target.partition('?')[2]):
+            if key in _TEXT_PARAMS:
+                params[key] = value
+                continue
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        return params
+
+    # ========================================
+    # BOT API METHODS
+    # ========================================
+
+    async def _api_getMe(self, params):
+        return BOT_USER
+
+    async def _api_deleteWebhook(self, params):
+        return True
+
+    async def _api_setWebhook(self, params):
+        return True
+
+    async def _api_getUpdates(self, params):
+        offset = params.get('offset')
+        while self._updates and offset is not None and self._updates[0]['update_id'] < int(offset):
+            self._updates.popleft()  # Acknowledged by the offset
+        self.polled.set()
+        if not self._updates:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), float(params.get('timeout') or 0))
+            except asyncio.TimeoutError:
+                pass
+        return list(itertools.islice(self._updates, int(params.get('limit') or 100)))
+
+    async def _api_sendMessage(self, params):
+        chat_id = int(params['chat_id'])
+        self._check_limits(chat_id, params)
+        return self._deliver(chat_id, params['text'], next(self._message_ids), params.get('reply_markup'))
+
+    async def _api_editMessageText(self, params):
+        chat_id = int(params['chat_id'])
+        self._check_limits(chat_id, params)
+        return self._deliver(chat_id, params['text'], int(params['message_id']), params.get('reply_markup'))
+
+    async def _api_answerCallbackQuery(self, params):
+        return True
+
+    def _check_limits(self, chat_id: int, params: Dict[str, Any]) -> None:
+        if not self.emulate_limits:
+            return
+        if params.get('parse_mode') == 'Markdown' and not is_valid_markdown(params['text']):
+            self.rejected += 1
+            raise _ApiError(400, "Bad Request: can't parse entities")
+        now = time.monotonic()
+        while self._global_sends and now - self._global_sends[0] > 1.0:
+            self._global_sends.popleft()
+        last = self._last_send.get(chat_id)
+        if len(self._global_sends) >= self.global_rate or (last is not None and now - last < self.chat_interval / 2):
+            self.rejected += 1
+            raise _ApiError(429, 'Too Many Requests: retry after 1', retry_after=1)
+        self._last_send[chat_id] = now
+        self._global_sends.append(now)
+
+    def _deliver(self, chat_id: int, text: str, message_id: int, reply_markup: Any) -> Dict[str, Any]:
+        chat = self._chat(chat_id)
+        chat.received += 1
+        chat.last_text = text
+        chat.last_message_id = message_id
+        chat.event.set()
+        message = {'message_id': message_id, 'date': int(time.time()), 'from': BOT_USER,
+                   'chat': {'id': chat_id, 'type': 'private'}, 'text': text}
+        if isinstance(reply_markup, dict):
+            message['reply_markup'] = reply_markup
+        return message
+
+    # ========================================
+    # SIMULATED USERS
+    # ========================================
+
+    def _chat(self, chat_id: int) -> _Chat:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat()
+        return chat
+
+    @staticmethod
+    def _user(user_id: int) -> Dict[str, Any]:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+
+    def _push(self, update: Dict[str, Any]) -> int:
+        update['update_id'] = next(self._update_ids)
+        self._updates.append(update)
+        self._new_updates.set()
+        return update['update_id']
+
+    def send_text(self, user_id: int, text: str) -> int:
+        """A user sends a text message (commands get a bot_command entity)"""
+        message = {'message_id': next(self._message_ids), 'date': int(time.time()),
+                   'chat': {'id': user_id, 'type': 'private'}, 'from': self._user(user_id), 'text': text}
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return self._push({'message': message})
+
+    def press_button(self, user_id: int, data: str) -> int:
+        """A user presses an inline button on the last message the bot sent them"""
+        chat = self._chat(user_id)
+        message = {'message_id': chat.last_message_id or 0, 'date': int(time.time()), 'from': BOT_USER,
+                   'chat': {'id': user_id, 'type': 'private'}, 'text': chat.last_text}
+        return self._push({'callback_query': {'id': str(next(self._message_ids)), 'from': self._user(user_id),
+                                              'chat_instance': str(user_id), 'data': data, 'message': message}})
+
+    def received(self, user_id: int) -> int:
+        """Number of messages the bot sent or edited for a user"""
+        return self._chat(user_id).received
+
+    async def wait_for_reply(self, user_id: int, seen: int, timeout: float = 30.0) -> str:
+        """Wait until the bot answered a user more than seen times; returns the latest text"""
+        chat = self._chat(user_id)
+        deadline = time.monotonic() + timeout
+        while chat.received <= seen:
+            chat.event.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"No reply for user {user_id}")
+            try:
+                await asyncio.wait_for(chat.event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return chat.last_text
+
+
+class _ApiError(Exception):
+    def __init__(self, status: int, description: str, retry_after: Optional[int] = None):
+        super().__init__(description)
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+
+async def _serve_forever(port: int, emulate_limits: bool) -> None:
+    api = FakeBotApi(port=port, emulate_limits=emulate_limits)
+    await api.start()
+    print(f"🤖 Fake Bot API on {api.base_url} (set TELEGRAM_API_BASE_URL to this)")
+    await asyncio.Event().wait()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(_serve_forever(int(os.getenv('FAKE_API_PORT', '8081')), '--limits' in sys.argv))
+    except KeyboardInterrupt:
+        pass
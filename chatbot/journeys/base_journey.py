@@ -7,9 +7,21 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from core.session_manager import SessionManager
 
+def get_journey_state(journey) -> Dict[str, Any]:
+    """Get a journey's persistable attributes: everything but the services it is built with"""
+    transient = getattr(journey, 'TRANSIENT_ATTRIBUTES', BaseJourney.TRANSIENT_ATTRIBUTES)
+    return {key: value for key, value in vars(journey).items() if key not in transient}
+
+def restore_journey_state(journey, state: Dict[str, Any]) -> None:
+    """Put attributes saved by get_journey_state back on a freshly built journey"""
+    vars(journey).update(state)
+
 class BaseJourney(ABC):
     """Abstract base class for customer journeys"""
     
+    # Shared services and helpers rebuilt by __init__; left out of the persisted state
+    TRANSIENT_ATTRIBUTES = frozenset({'session_manager', 'data_loader'})
+    
     def __init__(self, session_manager: SessionManager):
         self.session_manager = session_manager
         self.journey_name = self.__class__.__name__.replace('Journey', '').lower()
@@ -40,6 +52,14 @@ class BaseJourney(ABC):
         """Get current journey state"""
         return self.session_manager.get_journey_state()
     
+    def get_state(self) -> Dict[str, Any]:
+        """Get the journey's in-flight state (step, choices, results) for persistence"""
+        return get_journey_state(self)
+    
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restore the state saved by get_state"""
+        restore_journey_state(self, state)
+    
     def complete_journey(self) -> None:
         """Mark journey as complete"""
         self.session_manager.clear_journey()
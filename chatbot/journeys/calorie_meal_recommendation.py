@@ -11,9 +11,11 @@ from utils.calorie_utils import CalorieCalculator
 class CalorieMealRecommendationJourney(BaseJourney):
     """Calorie-based meal recommendation customer journey implementation"""
     
-    def __init__(self, session_manager):
+    TRANSIENT_ATTRIBUTES = BaseJourney.TRANSIENT_ATTRIBUTES | {'calorie_calc'}
+    
+    def __init__(self, session_manager, data_loader: Optional[DataLoader] = None):
         super().__init__(session_manager)
-        self.data_loader = DataLoader()
+        self.data_loader = data_loader or DataLoader()
         self.calorie_calc = CalorieCalculator()
         
         # Journey-specific constants
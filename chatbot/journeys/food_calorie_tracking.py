@@ -34,6 +34,10 @@ class FoodCalorieTrackingJourney(BaseJourney):
     10. Cross-Journey Integration
     """
     
+    # Services and helpers rebuilt by __init__; left out of the persisted state
+    TRANSIENT_ATTRIBUTES = frozenset({'session_manager', 'data_loader', 'food_search', 'nutrition_calc',
+                                      'diary_manager', 'progress_tracker'})
+    
     def __init__(self, data_loader, session_manager):
         super().__init__(session_manager)
         self.data_loader = data_loader
@@ -4,6 +4,9 @@ from utils.grocery_utils import IngredientExtractor, ListConsolidator, StoreOrga
 import re
 
 class GroceryAssistanceJourney(BaseJourney):
+    TRANSIENT_ATTRIBUTES = BaseJourney.TRANSIENT_ATTRIBUTES | {
+        'ingredient_extractor', 'list_consolidator', 'store_organizer', 'substitution_manager'}
+    
     def __init__(self, data_loader, session_manager):
         super().__init__(session_manager)
         self.data_loader = data_loader
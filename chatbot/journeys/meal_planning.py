@@ -1,10 +1,20 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 from .base_journey import BaseJourney
+from utils.meal_plan_solver import MealPlanSolver, PlanResult
+from utils.plan_cache import get_plan_cache, plan_fingerprint
+from core.outbound import StreamedReply, escape_markdown
+from utils.grocery_utils import GroceryAggregator
 import random
+import re
 from datetime import datetime, timedelta
 import json
 
 class MealPlanningJourney(BaseJourney):
+    TRANSIENT_ATTRIBUTES = BaseJourney.TRANSIENT_ATTRIBUTES | {'plan_solver'}  # Rebuilt on demand
+    
+    # Search time for one plan; the best plan found by then is used
+    plan_time_budget_ms = 250
+    
     def __init__(self, data_loader, session_manager):
         super().__init__(session_manager)
         self.data_loader = data_loader
@@ -19,6 +29,8 @@ class MealPlanningJourney(BaseJourney):
         self.time_constraints = None
         self.household_size = 1
         self.generated_plan = None
+        self.plan_diagnostics = None  # Objective breakdown of the last generated plan
+        self.plan_solver = None  # Solver of the current plan, reused to regenerate one day or meal
         
         # Meal plan structure: {day: {meal_type: meal_data}}
         self.meal_plan = {}
@@ -36,11 +48,11 @@ class MealPlanningJourney(BaseJourney):
         self.current_step = "planning_scope"
         return self._step_planning_scope()
     
-    def process_input(self, user_input: str) -> str:
+    def process_input(self, user_input: str) -> Union[str, StreamedReply]:
         """Process user input within the journey (required by BaseJourney)"""
         return self.process_user_input(user_input)
     
-    def process_user_input(self, user_input: str) -> str:
+    def process_user_input(self, user_input: str) -> Union[str, StreamedReply]:
         """Process user input based on current step"""
         if self.current_step == "planning_scope":
             return self._handle_planning_scope(user_input)
@@ -369,7 +381,7 @@ Would you like me to generate your personalized meal plan now? (Type 'yes' to pr
         
         return summary
     
-    def _handle_generate_plan(self, user_input: str) -> str:
+    def _handle_generate_plan(self, user_input: str) -> Union[str, StreamedReply]:
         """Handle meal plan generation trigger"""
         user_input = user_input.lower().strip()
         
@@ -388,13 +400,46 @@ Would you like me to generate your personalized meal plan now? (Type 'yes' to pr
         else:
             return "No problem! Feel free to adjust any of your preferences, or type 'yes' when you're ready for me to generate your meal plan."
     
-    def _generate_meal_plan(self) -> Dict:
-        """Core meal plan generation algorithm"""
-        print("🔄 Generating your personalized meal plan...")
-        
-        plan = {}
-        used_meals = set()  # Track used meals for variety
+    def _generate_meal_plan(self, use_cache: bool = True) -> Dict:
+        """Core meal plan generation algorithm: the whole plan is optimized as one problem"""
+        key = self._plan_fingerprint()
+        cache = get_plan_cache()
+        if use_cache:
+            cached = cache.get(key)
+            if cached is not None:
+                self.plan_solver = cached.solver
+                self.plan_diagnostics = cached.result.diagnostics
+                return cached.result.plan
         
+        print("🔄 Generating your personalized meal plan...")
+        solver = cache.get_solver(key) or self._build_plan_solver()
+        result = solver.solve(self.planning_duration, self.plan_time_budget_ms)
+        return self._use_plan_result(key, solver, result)
+    
+    def _regenerate_plan_part(self, day: int, meal_type: Optional[str] = None) -> Dict:
+        """Another version of one day (or one meal of it), keeping the rest of the plan"""
+        key = self._plan_fingerprint()
+        solver = self.plan_solver or get_plan_cache().get_solver(key) or self._build_plan_solver()
+        result = solver.regenerate(self.meal_plan, day, meal_type, self.plan_time_budget_ms)
+        return self._use_plan_result(key, solver, result)
+    
+    def _use_plan_result(self, key: str, solver: MealPlanSolver, result: PlanResult) -> Dict:
+        """Keep a solver result as the current plan and as the cached plan for these preferences"""
+        get_plan_cache().put(key, solver, result)
+        self.plan_solver = solver
+        self.plan_diagnostics = result.diagnostics
+        for meal_type in result.diagnostics['unfilled_slots']:
+            print(f"Warning: No meals found for {meal_type}")
+        return result.plan
+    
+    def _plan_fingerprint(self) -> str:
+        """Cache key of the current preferences and catalog"""
+        return plan_fingerprint(self.planning_duration, self.meal_types, self.daily_calorie_target,
+                                self.meal_calorie_distribution, self.dietary_restrictions,
+                                self.time_constraints, self.data_loader.get_catalog_version())
+    
+    def _build_plan_solver(self) -> MealPlanSolver:
+        """Solver over the catalog for the current preferences"""
         # Calculate target calories per meal type
         meal_calorie_targets = {}
         for meal_type in self.meal_types:
@@ -406,106 +451,32 @@ Would you like me to generate your personalized meal plan now? (Type 'yes' to pr
                 # Fallback for any unexpected meal types
                 meal_calorie_targets[meal_type] = 400
         
-        # Generate plan for each day
-        for day in range(1, self.planning_duration + 1):
-            day_plan = {}
-            
-            for meal_type in self.meal_types:
-                target_calories = meal_calorie_targets[meal_type]
-                
-                # Find suitable meals for this meal type with flexible filtering
-                # First try strict filtering
-                suitable_meals = self.data_loader.filter_meals_by_multiple_criteria(
-                    meal_type=meal_type,
-                    max_calories=target_calories + 100,  # ±100 calorie tolerance
-                    min_calories=target_calories - 100,
-                    dietary_tags=self.dietary_restrictions,
-                    max_prep_time=self.time_constraints
-                )
-                
-                # If no meals found, try with looser calorie constraints
-                if not suitable_meals:
-                    suitable_meals = self.data_loader.filter_meals_by_multiple_criteria(
-                        meal_type=meal_type,
-                        max_calories=target_calories + 150,  # ±150 calorie tolerance
-                        min_calories=max(target_calories - 150, 100),  # Don't go below 100 calories
-                        dietary_tags=self.dietary_restrictions,
-                        max_prep_time=self.time_constraints
-                    )
-                
-                # If still no meals, try without calorie constraints
-                if not suitable_meals:
-                    suitable_meals = self.data_loader.filter_meals_by_multiple_criteria(
-                        meal_type=meal_type,
-                        dietary_tags=self.dietary_restrictions,
-                        max_prep_time=self.time_constraints
-                    )
-                
-                # Remove already used meals (for variety)
-                available_meals = [meal for meal in suitable_meals if meal['id'] not in used_meals]
-                
-                # If no unused meals available, reset used meals and allow reuse
-                if not available_meals:
-                    available_meals = suitable_meals
-                    used_meals.clear()  # Reset for better variety
-                
-                if available_meals:
-                    # Select best meal based on calorie match and variety
-                    selected_meal = self._select_optimal_meal(available_meals, target_calories, used_meals)
-                    day_plan[meal_type] = selected_meal
-                    used_meals.add(selected_meal['id'])
-                    
-                    # Reset used meals if we've used most available meals (keep variety alive)
-                    if len(used_meals) > len(available_meals) * 0.8:
-                        used_meals = {selected_meal['id']}  # Keep only the most recent meal
-                else:
-                    # Fallback if no meals found - set error flag but continue to return dict
-                    print(f"Warning: No meals found for {meal_type} on day {day}")
-                    # Use a placeholder meal or skip this slot
-                    day_plan[meal_type] = {
-                        'id': f'placeholder_{meal_type}_{day}',
-                        'name': f'Custom {meal_type.title()}',
-                        'calories': target_calories,
-                        'prep_time': 15,
-                        'nutrition': {'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0},
-                        'components': []
-                    }
-            
-            plan[f"Day {day}"] = day_plan
-        
-        return plan
+        return MealPlanSolver(
+            self.data_loader.get_meals(),
+            meal_calorie_targets,
+            dietary_tags=self.dietary_restrictions,
+            max_prep_time=self.time_constraints
+        )
     
-    def _select_optimal_meal(self, meals: List[Dict], target_calories: int, used_meals: set) -> Dict:
-        """Select the most optimal meal based on calories and variety"""
-        scored_meals = []
-        
-        for meal in meals:
-            score = 0
-            
-            # Calorie proximity score (0-100)
-            calorie_diff = abs(meal['calories'] - target_calories)
-            calorie_score = max(0, 100 - (calorie_diff / 75 * 100))  # 75 is our tolerance
-            score += calorie_score * 0.6  # 60% weight for calorie match
-            
-            # Variety score (avoid recently used meals)
-            if meal['id'] not in used_meals:
-                variety_score = 100
-            else:
-                variety_score = 20  # Penalty for reuse
-            score += variety_score * 0.4  # 40% weight for variety
-            
-            scored_meals.append((meal, score))
-        
-        # Sort by score and return best meal
-        scored_meals.sort(key=lambda x: x[1], reverse=True)
-        return scored_meals[0][0]
+    def _display_meal_plan(self, heading: str = "") -> StreamedReply:
+        """Display the generated meal plan with nutrition summary, rendered while it is sent"""
+        if self.meal_plan:
+            self.current_step = "plan_display"
+        return StreamedReply(self.render_meal_plan, self.meal_plan, self.planning_duration, heading)
     
-    def _display_meal_plan(self) -> str:
-        """Display the generated meal plan with nutrition summary"""
-        if not self.meal_plan:
-            return "No meal plan generated yet."
-        
-        display = "🎉 **YOUR PERSONALIZED MEAL PLAN**\n\n"
+    @staticmethod
+    def render_meal_plan(meal_plan: Dict, planning_duration: int, heading: str = "") -> Iterator[str]:
+        """
+        The plan display block by block: the heading and title with day 1,
+        each further day, then the nutrition summary and next actions. Every
+        block closes its own Markdown, and the totals are summed while days
+        are rendered, so long plans can be sent before the last day is formatted.
+        """
+        if not meal_plan:
+            yield f"{heading}No meal plan generated yet."
+            return
+        
+        display = f"{heading}🎉 **YOUR PERSONALIZED MEAL PLAN**\n\n"
         
         # Day-by-day breakdown
         total_calories = 0
@@ -521,13 +492,13 @@ Would you like me to generate your personalized meal plan now? (Type 'yes' to pr
             'snack': '🍎'
         }
         
-        for day_name, day_meals in self.meal_plan.items():
+        for day_name, day_meals in meal_plan.items():
             display += f"**{day_name.upper()}:**\n"
             daily_calories = 0
             
             for meal_type, meal in day_meals.items():
                 emoji = meal_emojis.get(meal_type, '🍽️')
-                display += f"{emoji} **{meal_type.title()}**: {meal['name']} - {meal['calories']}cal ({meal['prep_time']}min)\n"
+                display += f"{emoji} **{meal_type.title()}**: {escape_markdown(meal['name'])} - {meal['calories']}cal ({meal['prep_time']}min)\n"
                 
                 daily_calories += meal['calories']
                 total_protein += meal['nutrition']['protein']
@@ -535,22 +506,24 @@ Would you like me to generate your personalized meal plan now? (Type 'yes' to pr
                 total_fat += meal['nutrition']['fat'] 
                 total_fiber += meal['nutrition']['fiber']
             
-            display += f"📊 **Daily Total**: {daily_calories}cal\n\n"
+            display += f"📊 **Daily Total**: {daily_calories}cal\n"
             total_calories += daily_calories
+            yield display
+            display = ""
         
         # Weekly nutrition summary
-        avg_daily_calories = total_calories / self.planning_duration
-        avg_protein = total_protein / self.planning_duration
-        avg_carbs = total_carbs / self.planning_duration
-        avg_fat = total_fat / self.planning_duration
-        avg_fiber = total_fiber / self.planning_duration
+        avg_daily_calories = total_calories / planning_duration
+        avg_protein = total_protein / planning_duration
+        avg_carbs = total_carbs / planning_duration
+        avg_fat = total_fat / planning_duration
+        avg_fiber = total_fiber / planning_duration
         
         # Calculate percentages
         protein_pct = (avg_protein * 4 / avg_daily_calories * 100) if avg_daily_calories > 0 else 0
         carbs_pct = (avg_carbs * 4 / avg_daily_calories * 100) if avg_daily_calories > 0 else 0
         fat_pct = (avg_fat * 9 / avg_daily_calories * 100) if avg_daily_calories > 0 else 0
         
-        display += f"""📈 **NUTRITION SUMMARY ({self.planning_duration} days):**
+        display = f"""📈 **NUTRITION SUMMARY ({planning_duration} days):**
 • **Average daily calories**: {avg_daily_calories:.0f}
 • **Protein**: {avg_protein:.1f}g avg ({protein_pct:.1f}% of calories)
 • **Carbohydrates**: {avg_carbs:.1f}g avg ({carbs_pct:.1f}% of calories)  
@@ -579,35 +552,48 @@ Would you like me to generate your personalized meal plan now? (Type 'yes' to pr
             for rec in recommendations:
                 display += f"• {rec}\n"
         
-        self.current_step = "plan_display"
-        
         display += "\n🎯 **How does this meal plan look?**\n"
         display += "1. **Approve** - This looks great!\n"
-        display += "2. **Regenerate** - Try different meal combinations\n" 
+        display += "2. **Regenerate** - Try different meal combinations (or just one day: \"regenerate day 2\")\n"
         display += "3. **Customize** - Make specific changes\n\n"
         display += "What would you like to do?"
         
-        return display
+        yield display
     
-    def _handle_plan_display(self, user_input: str) -> str:
+    def _handle_plan_display(self, user_input: str) -> Union[str, StreamedReply]:
         """Handle user response to meal plan display"""
         user_input = user_input.lower().strip()
         
-        if user_input in ['1', 'approve', 'looks good', 'perfect', 'great']:
+        day_match = re.search(r'\bday\s*(\d+)\b', user_input)
+        
+        if day_match:
+            # "regenerate day 3", "another version of day 2", "change dinner on day 2"
+            day = int(day_match.group(1))
+            meal_type = next((meal_type for meal_type in self.meal_types
+                              if re.search(rf'\b{meal_type}s?\b', user_input)), None)
+            if not 1 <= day <= len(self.meal_plan):
+                return f"Your plan has days 1 to {len(self.meal_plan)}. Which day should I change?"
+            try:
+                self.meal_plan = self._regenerate_plan_part(day, meal_type)
+            except Exception as e:
+                return f"I had trouble changing day {day}: {str(e)}\nWould you like to regenerate the whole plan?"
+            changed = f"{meal_type} on day {day}" if meal_type else f"day {day}"
+            return self._display_meal_plan(f"🔄 **Here's a new version of {changed}:**\n\n")
+        elif user_input in ['1', 'approve', 'looks good', 'perfect', 'great']:
             self.current_step = "final_actions"
             return self._step_final_actions()
         elif user_input in ['2', 'regenerate', 'try again', 'different']:
             # Regenerate with same criteria
             try:
-                self.meal_plan = self._generate_meal_plan()
-                return f"🔄 **Here's a new meal plan for you:**\n\n{self._display_meal_plan()}"
+                self.meal_plan = self._generate_meal_plan(use_cache=False)
+                return self._display_meal_plan("🔄 **Here's a new meal plan for you:**\n\n")
             except Exception as e:
                 return f"I had trouble generating a new plan: {str(e)}\nWould you like to modify your criteria?"
         elif user_input in ['3', 'customize', 'changes', 'modify']:
             return """🔧 **CUSTOMIZATION OPTIONS:**
 
 What would you like to adjust?
-1. **Swap a specific meal** - "Change dinner on day 2"
+1. **Swap a specific meal** - "Change dinner on day 2" (or a whole day: "Regenerate day 2")
 2. **Different calorie target** - Adjust daily calories
 3. **Modify dietary restrictions** - Add/remove dietary preferences
 4. **Change time constraints** - Adjust prep time limits
@@ -652,72 +638,11 @@ Choose your next action!"""
         if not self.meal_plan or not isinstance(self.meal_plan, dict):
             return "No meal plan available to generate grocery list from."
         
-        ingredient_totals = {}
-        
-        # Aggregate all ingredients from all meals
-        for day_meals in self.meal_plan.values():
-            if not isinstance(day_meals, dict):
-                continue
-                
-            for meal in day_meals.values():
-                if not isinstance(meal, dict) or 'components' not in meal:
-                    continue
-                    
-                for component in meal['components']:
-                    if not isinstance(component, dict):
-                        continue
-                        
-                    food_id = component.get('food_id')
-                    amount = component.get('amount', 0)
-                    unit = component.get('unit', 'unit')
-                    
-                    if not food_id:
-                        # Try using the name directly if no food_id
-                        food_name = component.get('name')
-                        if food_name:
-                            key = f"{food_name}_{unit}"
-                            if key in ingredient_totals:
-                                ingredient_totals[key]['amount'] += amount
-                            else:
-                                ingredient_totals[key] = {
-                                    'name': food_name,
-                                    'amount': amount,
-                                    'unit': unit,
-                                    'category': 'Other'
-                                }
-                        continue
-                    
-                    # Get food details
-                    food_item = self.data_loader.get_food_by_id(food_id)
-                    if food_item:
-                        food_name = food_item['name']
-                        key = f"{food_name}_{unit}"
-                        
-                        if key in ingredient_totals:
-                            ingredient_totals[key]['amount'] += amount
-                        else:
-                            ingredient_totals[key] = {
-                                'name': food_name,
-                                'amount': amount,
-                                'unit': unit,
-                                'category': food_item.get('category', 'Other')
-                            }
-                    else:
-                        # Fallback to component name if food_item not found
-                        food_name = component.get('name', 'Unknown ingredient')
-                        key = f"{food_name}_{unit}"
-                        if key in ingredient_totals:
-                            ingredient_totals[key]['amount'] += amount
-                        else:
-                            ingredient_totals[key] = {
-                                'name': food_name,
-                                'amount': amount,
-                                'unit': unit,
-                                'category': 'Other'
-                            }
+        # One pass over the plan: totals per food in base units, already grouped by category
+        categories = GroceryAggregator(self.data_loader).aggregate_meal_plan(self.meal_plan)
         
         # Check if we have any ingredients
-        if not ingredient_totals:
+        if not categories:
             return """🛒 **GROCERY LIST - No Ingredients Found**
 
 It looks like your meal plan doesn't have detailed ingredient information available. 
@@ -727,14 +652,6 @@ You can still use your meal plan as a guide and shop for the general meal types
 
 Would you like me to help you with anything else for your meal planning?"""
         
-        # Organize by categories
-        categories = {}
-        for ingredient in ingredient_totals.values():
-            category = ingredient['category']
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(ingredient)
-        
         # Format grocery list
         grocery_list = f"🛒 **GROCERY LIST - {self.planning_duration} Day Meal Plan**\n\n"
         
@@ -751,7 +668,7 @@ Would you like me to help you with anything else for your meal planning?"""
         for category, items in categories.items():
             emoji = category_emojis.get(category, '📦')
             grocery_list += f"{emoji} **{category.upper()}:**\n"
-            for item in items:
+            for item in items.values():
                 grocery_list += f"  • {item['name']} - {item['amount']:.1f} {item['unit']}\n"
             grocery_list += "\n"
         
@@ -10,9 +10,9 @@ from data.data_loader import DataLoader
 class RecipeDiscoveryJourney(BaseJourney):
     """Recipe Discovery customer journey implementation"""
     
-    def __init__(self, session_manager):
+    def __init__(self, session_manager, data_loader: Optional[DataLoader] = None):
         super().__init__(session_manager)
-        self.data_loader = DataLoader()
+        self.data_loader = data_loader or DataLoader()
         self.discovery_methods = [
             "Cuisine Type",
             "Available Ingredients", 
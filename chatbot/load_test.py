@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Load Test for Telegram Nutrition Bot
+Runs the bot against the fake Bot API and replays scripted journeys for
+many simulated users, reporting reply latency, throughput and memory
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import json
+import math
+import random
+import signal
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_bot_api import FakeBotApi
+
+START_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'start_bot.py')
+
+# Each step is ('text', message) or ('button', callback data); every step expects one reply
+SCENARIOS: Dict[str, Sequence[Tuple[str, str]]] = {
+    'recipe_discovery': (('text', 'find me italian recipes'), ('text', '1'), ('text', '2'),
+                         ('text', '1'), ('text', '1')),
+    'food_tracking': (('text', 'log my breakfast'), ('text', '2 eggs'), ('text', '1'),
+                      ('text', '2'), ('text', '3')),
+    'meal_planning': (('text', 'plan meals for the week'), ('text', '1'), ('text', '1'),
+                      ('text', '1'), ('text', '2')),
+    'cooking_guidance': (('text', 'guide me through cooking'), ('text', '1'), ('text', '1'),
+                         ('text', 'next'), ('text', 'next')),
+    'start_menu': (('text', '/start'), ('button', 'meal_planning'), ('text', '1'), ('text', '1')),
+}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values; None if empty"""
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, Any]:
+    """Count and p50/p95/p99/max in milliseconds"""
+    values = sorted(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'count': len(values),
+        'p50_ms': ms(percentile(values, 0.50)),
+        'p95_ms': ms(percentile(values, 0.95)),
+        'p99_ms': ms(percentile(values, 0.99)),
+        'max_ms': ms(values[-1] if values else None)
+    }
+
+
+def process_tree_rss_kb(pid: int) -> int:
+    """Resident memory of a process and all its descendants, from /proc (0 elsewhere)"""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status') as status:
+                fields = dict(line.split(':', 1) for line in status if ':' in line)
+        except OSError:
+            continue
+        children.setdefault(int(fields['PPid']), []).append(int(entry))
+        rss[int(entry)] = int(fields.get('VmRSS', '0 kB').split()[0])
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, ()))
+    return total
+
+
+class LoadTest:
+    """
+    Drives one bot process with simulated users.
+
+    Every user runs one scenario (round-robin over the chosen ones): it
+    sends a step, waits for the bot's reply, optionally thinks, and moves
+    on. At most concurrency users are active at once. Latency is measured
+    from pushing an update to the fake API until the bot's answer for that
+    chat arrives, so it covers polling, handler time and the send queue.
+    """
+
+    def __init__(self, api: FakeBotApi, users: int, concurrency: int, scenarios: Sequence[str],
+                 think_time: float = 0.0, reply_timeout: float = 30.0, first_user_id: int = 1000000):
+        self.api = api
+        self.users = users
+        self.concurrency = concurrency
+        self.scenarios = list(scenarios)
+        self.think_time = think_time
+        self.reply_timeout = reply_timeout
+        self.first_user_id = first_user_id
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.scenarios}
+        self.timeouts = 0
+        self.completed_users = 0
+
+    async def _run_user(self, user_id: int, scenario: str, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            for kind, value in SCENARIOS[scenario]:
+                seen = self.api.received(user_id)
+                started = time.perf_counter()
+                if kind == 'button':
+                    self.api.press_button(user_id, value)
+                else:
+                    self.api.send_text(user_id, value)
+                try:
+                    await self.api.wait_for_reply(user_id, seen, self.reply_timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    return
+                self.latencies[scenario].append(time.perf_counter() - started)
+                if self.think_time:
+                    await asyncio.sleep(random.uniform(0, self.think_time))
+            self.completed_users += 1
+
+    async def run(self) -> float:
+        """Run every user to completion; returns the wall time in seconds"""
+        slots = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._run_user(self.first_user_id + number, self.scenarios[number % len(self.scenarios)], slots)
+            for number in range(self.users)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            'users': self.users,
+            'completed_users': self.completed_users,
+            'timeouts': self.timeouts,
+            'elapsed_s': round(elapsed, 2),
+            'throughput_rps': round(len(all_latencies) / elapsed, 2) if elapsed else None,
+            'latency': latency_summary(all_latencies),
+            'scenarios': {name: latency_summary(values) for name, values in self.latencies.items()},
+            'api_calls': dict(self.api.calls),
+            'api_rejections': self.api.rejected
+        }
+
+
+def _bot_environment(api: FakeBotApi, emulate_limits: bool, workers: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        'TELEGRAM_BOT_TOKEN': '123456:LOADTEST',
+        'TELEGRAM_API_BASE_URL': api.base_url,
+        'BOT_MODE': 'polling',
+        'BOT_WORKERS': str(workers),
+        'SESSION_BACKEND': env.get('SESSION_BACKEND', 'memory'),
+    })
+    if not emulate_limits:
+        # Measure the bot, not Telegram's per-chat pacing
+        env.setdefault('SEND_CHAT_RATE', '1000')
+        env.setdefault('SEND_GLOBAL_RATE', '100000')
+    return env
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    api = FakeBotApi(port=args.port, emulate_limits=args.emulate_limits)
+    await api.start()
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, START_SCRIPT, env=_bot_environment(api, args.emulate_limits, args.workers),
+        stdout=None if args.verbose else asyncio.subprocess.DEVNULL,
+        stderr=None if args.verbose else asyncio.subprocess.DEVNULL)
+    try:
+        polled = asyncio.ensure_future(api.polled.wait())
+        exited = asyncio.ensure_future(bot.wait())
+        await asyncio.wait((polled, exited), timeout=args.startup_timeout, return_when=asyncio.FIRST_COMPLETED)
+        polled.cancel()
+        if not api.polled.is_set():
+            exited.cancel()
+            raise RuntimeError(f"Bot did not start polling (exit code {bot.returncode}); rerun with --verbose")
+        rss_before = process_tree_rss_kb(bot.pid)
+
+        test = LoadTest(api, args.users, args.concurrency, args.scenarios,
+                        think_time=args.think_time, reply_timeout=args.reply_timeout)
+        elapsed = await test.run()
+
+        report = test.report(elapsed)
+        rss_after = process_tree_rss_kb(bot.pid)
+        report['memory'] = {
+            'rss_before_kb': rss_before,
+            'rss_after_kb': rss_after,
+            'kb_per_session': round((rss_after - rss_before) / args.users, 2) if args.users else None
+        }
+        report['bot_workers'] = args.workers
+        return report
+    finally:
+        if bot.returncode is None:
+            bot.send_signal(signal.SIGTERM)
+            try:
+                await asyncio.wait_for(bot.wait(), 30)
+            except asyncio.TimeoutError:
+                bot.kill()
+                await bot.wait()
+        await api.stop()
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    def line(name, summary):
+        print(f"  {name:<18} n={summary['count']:<7} p50={summary['p50_ms']}ms "
+              f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms max={summary['max_ms']}ms")
+
+    print("📊 Load Test Results")
+    print("=" * 40)
+    print(f"Users: {report['completed_users']}/{report['users']} completed, {report['timeouts']} timed out "
+          f"({report['bot_workers']} bot worker(s))")
+    print(f"Elapsed: {report['elapsed_s']}s, throughput: {report['throughput_rps']} replies/s")
+    line('all', report['latency'])
+    for name, summary in report['scenarios'].items():
+        line(name, summary)
+    memory = report['memory']
+    print(f"Memory: {memory['rss_before_kb']} kB -> {memory['rss_after_kb']} kB "
+          f"({memory['kb_per_session']} kB per session)")
+    if report['api_rejections']:
+        print(f"Bot API rejections (429/400): {report['api_rejections']}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Load-test the nutrition bot against a fake Bot API")
+    parser.add_argument('--users', type=int, default=1000, help="simulated users (default 1000)")
+    parser.add_argument('--concurrency', type=int, default=200, help="users active at once (default 200)")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument('--think-time', type=float, default=0.0, help="max random pause between steps (s)")
+    parser.add_argument('--reply-timeout', type=float, default=30.0, help="seconds to wait for each reply")
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help="seconds to wait for the bot")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BOT_WORKERS', '1')),
+                        help="BOT_WORKERS for the bot process")
+    parser.add_argument('--port', type=int, default=0, help="fake Bot API port (default: any free port)")
+    parser.add_argument('--emulate-limits', action='store_true',
+                        help="answer 429 like Telegram and keep the bot's real send rates")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--verbose', action='store_true', help="show the bot's output")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load_test(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+if __name__ == '__main__':
+    main()
@@ -23,8 +23,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from core.session_manager import SessionManager
 from core.intent_classifier import IntentClassifier
-from data.data_loader import DataLoader
+from data.data_loader import get_shared_data_loader
 from core.chatbot_manager import ChatbotManager
+from core.session_store import create_session_store
+from core.session_cache import create_session_cache
+from core.outbound import StreamedReply, pack_messages
 
 # Configure logging
 logging.basicConfig(
@@ -38,16 +41,42 @@ class TelegramNutritionBot:
     
     def __init__(self, token: str):
         self.token = token
-        self.user_sessions: Dict[int, ChatbotManager] = {}
         
         # Initialize core components (shared across users)
-        self.data_loader = DataLoader()
+        self.data_loader = get_shared_data_loader()
         self.intent_classifier = IntentClassifier()
         
+        # Sessions survive restarts through a write-behind store (SESSION_BACKEND)
+        self.session_store = create_session_store('chatbot_sessions', self._export_session)
+        
+        # Live sessions are bounded (SESSION_CACHE_SIZE, SESSION_IDLE_TTL); evicted ones spill to the store
+        self.user_sessions = create_session_cache(self._evict_session)
+        self._evicted_states: Dict[int, Dict[str, Any]] = {}  # Used only without a session store
+        
         # Build application
-        self.application = Application.builder().token(token).build()
+        self.application = (
+            Application.builder()
+            .token(token)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         self._setup_handlers()
     
+    async def _post_init(self, application: Application):
+        """Start periodic session flushing once the event loop runs"""
+        if self.session_store:
+            self.session_store.start()
+    
+    async def _post_shutdown(self, application: Application):
+        """Write every pending session before the process exits"""
+        logger.info(f"Session cache stats: {self.user_sessions.get_stats()}")
+        logger.info(f"Intent cache stats: {self.intent_classifier.cache.get_stats()}")
+        if self.session_store:
+            await self.session_store.stop()
+            self.session_store.close()
+            logger.info("Session store flushed and closed")
+    
     def _setup_handlers(self):
         """Setup Telegram bot command and message handlers"""
         
@@ -66,15 +95,51 @@ class TelegramNutritionBot:
     
     def _get_or_create_session(self, user_id: int) -> ChatbotManager:
         """Get existing session or create new one for user"""
-        if user_id not in self.user_sessions:
+        chatbot = self.user_sessions.get(user_id)
+        if chatbot is None:
             session_manager = SessionManager()
             session_manager.user_id = user_id  # Store user ID for persistence
-            self.user_sessions[user_id] = ChatbotManager(
+            chatbot = ChatbotManager(
                 session_manager, 
                 self.intent_classifier, 
                 self.data_loader
             )
-        return self.user_sessions[user_id]
+            
+            # Pick up where the user left off before a restart
+            if self.session_store:
+                state = self.session_store.load(user_id)
+            else:
+                state = self._evicted_states.pop(user_id, None)
+            if state:
+                chatbot.restore_state(state)
+            
+            self.user_sessions.put(user_id, chatbot)
+        return chatbot
+    
+    @staticmethod
+    def _export_session(chatbot: ChatbotManager) -> Dict[str, Any]:
+        """Get the persistable state of a user's chatbot, including in-flight journeys"""
+        return chatbot.get_state()
+    
+    def _save_session(self, user_id: int, chatbot: ChatbotManager) -> None:
+        """Mark a session as changed; it is written on the next flush"""
+        if self.session_store:
+            self.session_store.mark_dirty(user_id, chatbot)
+    
+    def _evict_session(self, user_id: int, chatbot: ChatbotManager) -> None:
+        """Spill an evicted session to the store, or keep its state in compact form"""
+        if self.session_store:
+            self.session_store.mark_dirty(user_id, chatbot)
+        else:
+            self._evicted_states[user_id] = self._export_session(chatbot)
+    
+    def _drop_session(self, user_id: int) -> None:
+        """Forget a user's session in memory and in the store"""
+        if user_id in self.user_sessions:
+            del self.user_sessions[user_id]
+        self._evicted_states.pop(user_id, None)
+        if self.session_store:
+            self.session_store.delete(user_id)
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -192,8 +257,7 @@ class TelegramNutritionBot:
         """Handle /reset command"""
         user_id = update.effective_user.id
         
-        if user_id in self.user_sessions:
-            del self.user_sessions[user_id]
+        self._drop_session(user_id)
         
         await update.message.reply_text(
             "🔄 **Session Reset Complete!**\n\n"
@@ -234,8 +298,7 @@ class TelegramNutritionBot:
         callback_data = query.data
         
         if callback_data == "reset":
-            if user_id in self.user_sessions:
-                del self.user_sessions[user_id]
+            self._drop_session(user_id)
             await query.edit_message_text("🔄 Session reset! Type /start to begin fresh.")
             return
         
@@ -264,12 +327,13 @@ class TelegramNutritionBot:
             # Simulate user input for the selected journey
             user_input = journey_map[callback_data]
             chatbot = self._get_or_create_session(user_id)
+            self._save_session(user_id, chatbot)
             
             response = chatbot._process_user_input(user_input)
             
             if response:
                 # Format response for Telegram
-                formatted_response = self._format_response_for_telegram(response)
+                formatted_response = self._format_response_for_telegram(str(response))
                 await query.edit_message_text(formatted_response, parse_mode='Markdown')
             else:
                 await query.edit_message_text("🤔 Something went wrong. Please try again or use /reset.")
@@ -281,23 +345,19 @@ class TelegramNutritionBot:
         
         # Get or create user session
         chatbot = self._get_or_create_session(user_id)
+        self._save_session(user_id, chatbot)  # Serialized at the next flush, after this handler ran
         
         try:
             # Process the user input
             response = chatbot._process_user_input(user_input)
             
             if response:
-                # Format and send response
-                formatted_response = self._format_response_for_telegram(response)
-                
-                # Split long messages if needed
-                if len(formatted_response) > 4000:
-                    # Split into chunks
-                    chunks = self._split_message(formatted_response, 4000)
-                    for chunk in chunks:
-                        await update.message.reply_text(chunk, parse_mode='Markdown')
-                else:
-                    await update.message.reply_text(formatted_response, parse_mode='Markdown')
+                # Format and send block by block; a streamed reply (meal plan) sends
+                # its first days while the rest is still being rendered
+                blocks = response if isinstance(response, StreamedReply) else [response]
+                formatted = (self._format_response_for_telegram(block) for block in blocks)
+                for message in pack_messages(formatted, 4000):
+                    await update.message.reply_text(message, parse_mode='Markdown')
             else:
                 await update.message.reply_text(
                     "🤔 I'm not sure how to help with that. Try:\n"
@@ -326,28 +386,6 @@ class TelegramNutritionBot:
         
         return response
     
-    def _split_message(self, text: str, max_length: int) -> list:
-        """Split long messages into chunks"""
-        if len(text) <= max_length:
-            return [text]
-        
-        chunks = []
-        current_chunk = ""
-        
-        lines = text.split('\n')
-        for line in lines:
-            if len(current_chunk) + len(line) + 1 <= max_length:
-                current_chunk += line + '\n'
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = line + '\n'
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
-    
     def run(self):
         """Start the Telegram bot"""
         logger.info("Starting Telegram Nutrition Bot...")
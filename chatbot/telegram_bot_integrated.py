@@ -6,8 +6,11 @@ Properly integrates with the existing journey system
 
 import os
 import sys
+import asyncio
 import logging
-from typing import Dict, Any
+import signal
+import time
+from typing import Dict, Any, Union
 from datetime import datetime
 
 # Add current directory to path for imports
@@ -21,11 +24,24 @@ except ImportError:
     pass
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, 
-    filters, ContextTypes, CallbackQueryHandler
+    filters, ContextTypes, CallbackQueryHandler, BaseUpdateProcessor
 )
 
+from data.data_loader import get_shared_data_loader
+from data.nutrition_matrix import NutritionMatrix
+from core.session_store import create_session_store
+from core.session_cache import create_session_cache
+from core.intent_classifier import IntentCache
+from core.step_executor import StepTimeout, create_step_executor
+from core.update_dispatcher import UserOrderedDispatcher, create_update_dispatcher
+from core.webhook_server import create_webhook_server
+from core.worker_supervisor import serve_worker_channel
+from core.outbound import SendError, StreamedReply, create_outbound_queue, is_valid_markdown
+from core.metrics import JOURNEY_STEP_ERRORS, JOURNEY_STEP_SECONDS, REGISTRY, create_metrics_server
+
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -33,6 +49,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Journey attributes that are rebuilt on restore instead of persisted
+JOURNEY_TRANSIENT_ATTRIBUTES = {'session'}
+
+STEP_TIMEOUT_MESSAGE = ("⏳ Sorry, that took too long and I had to start this over.\n"
+                        "Please send your request again, or use /reset to start fresh.")
+
+UPDATE_SECONDS = REGISTRY.histogram(
+    'chatbot_update_seconds', 'Time to process one update, including waiting behind the same user', ('kind',))
+HANDLER_ERRORS = REGISTRY.counter(
+    'chatbot_handler_errors_total', 'Updates whose handler failed and sent an error reply', ('handler',))
+
+def update_kind(update) -> str:
+    """Metrics label of an update: command, message, callback_query or other"""
+    if getattr(update, 'callback_query', None):
+        return 'callback_query'
+    message = getattr(update, 'message', None)
+    if message is not None and message.text:
+        return 'command' if message.text.startswith('/') else 'message'
+    return 'other'
+
+class UserOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Lets the Application process updates concurrently, in order per user"""
+
+    def __init__(self, dispatcher: UserOrderedDispatcher, max_pending: int):
+        # The base semaphore only bounds queued updates; the dispatcher caps the running ones
+        super().__init__(max(max_pending, dispatcher.max_in_flight))
+        self.dispatcher = dispatcher
+
+    async def do_process_update(self, update, coroutine):
+        user = getattr(update, 'effective_user', None)
+        with UPDATE_SECONDS.time(kind=update_kind(update)):
+            await self.dispatcher.run(user.id if user else None, coroutine)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+def run_journey_step(journey, method: str, *args):
+    """Call a journey step; returns the response and the journey (a copy when offloaded to a worker)"""
+    return getattr(journey, method)(*args), journey
+
 # Simple session manager for Telegram (avoid import issues)
 class SimpleTelegramSession:
     def __init__(self, user_id: int):
@@ -108,6 +167,32 @@ class SimpleTelegramSession:
             "fat": int((self.daily_totals["fat"] / self.nutrition_goals["fat"]) * 100) if self.nutrition_goals["fat"] > 0 else 0
         }
 
+    def get_state(self):
+        """Get the persistable state: diary, goals, context and the in-flight journey"""
+        state = {
+            "current_journey": self.current_journey,
+            "current_step": self.current_step,
+            "session_data": self.session_data,
+            "conversation_context": self.conversation_context,
+            "logged_foods": self.logged_foods,
+            "daily_totals": self.daily_totals,
+            "nutrition_goals": self.nutrition_goals,
+            "journey_state": None
+        }
+        if self.journey_instance is not None:
+            state["journey_state"] = {
+                key: value for key, value in vars(self.journey_instance).items()
+                if key not in JOURNEY_TRANSIENT_ATTRIBUTES
+            }
+        return state
+
+    def restore_state(self, state):
+        """Restore the fields saved by get_state (the journey is rebuilt by the bot)"""
+        for key in ("current_journey", "current_step", "session_data", "conversation_context",
+                    "logged_foods", "daily_totals", "nutrition_goals"):
+            if key in state:
+                setattr(self, key, state[key])
+
 # Simple journey implementations that provide interactive flows
 class SimpleRecipeDiscovery:
     def __init__(self, session):
@@ -1390,6 +1475,15 @@ Which dietary style fits your lifestyle? 🥗"""
         goal = self.session.get('meal_goal', 'Maintenance')
         diet = self.session.get('meal_diet', 'Omnivore')
         
+        # Reset for next use
+        self.step = 1
+        self.session.current_journey = None
+        # Rendered while it is sent, so day 1 goes out before the last day is formatted
+        return StreamedReply(self.render_meal_plan, duration, goal, diet, datetime.now().strftime('%B %d, %Y'))
+    
+    @staticmethod
+    def render_meal_plan(duration, goal, diet, created):
+        """The finished plan as Markdown blocks: the details with day 1, each further day, then next steps"""
         # Set calories based on goal
         goal_calories = {
             "Weight Loss": "1200-1500",
@@ -1400,19 +1494,20 @@ Which dietary style fits your lifestyle? 🥗"""
         
         cal_range = goal_calories.get(goal, "1600-2000")
         
-        # Generate personalized meals based on diet preference and duration
-        meals = self._generate_meals_by_diet(diet, goal, duration)
-        
-        response = f"""🎆 **Your Personalized Meal Plan Complete!**
+        header = f"""🎆 **Your Personalized Meal Plan Complete!**
 
 **Plan Details:**
 • **Duration**: {duration}
 • **Goal**: {goal} ({cal_range} cal/day)
 • **Diet Style**: {diet}
-• **Created**: {datetime.now().strftime('%B %d, %Y')}
-
-{meals}
+• **Created**: {created}
 
+"""
+        # Generate personalized meals based on diet preference and duration
+        for number, day_block in enumerate(SimpleMealPlanning._meal_plan_days(diet, goal, duration)):
+            yield header + day_block if number == 0 else day_block
+        
+        yield """
 **What would you like to do next?**
 1️⃣ **Generate Grocery List** - Get shopping list for this plan
 2️⃣ **Get Cooking Instructions** - Step-by-step meal prep
@@ -1425,14 +1520,10 @@ Which dietary style fits your lifestyle? 🥗"""
 🥬 Wash and chop vegetables in advance
 
 Ready to transform your nutrition? 💪"""
-        
-        # Reset for next use
-        self.step = 1
-        self.session.current_journey = None
-        return response
     
-    def _generate_meals_by_diet(self, diet, goal, duration):
-        """Generate meal plans based on dietary preference, goal, and duration"""
+    @staticmethod
+    def _meal_plan_days(diet, goal, duration):
+        """Generate meal plans based on dietary preference, goal, and duration, one day block at a time"""
         
         # Determine number of days based on duration (check longer durations first)
         if "2 Weeks" in duration or duration == "2 Weeks":
@@ -1625,11 +1716,9 @@ Ready to transform your nutrition? 💪"""
             plan_text += f"🌙 **Dinner**: {meals['dinners'][(day-1) % len(meals['dinners'])]}\n"
             plan_text += f"🍎 **Snack**: {meals['snacks'][(day-1) % len(meals['snacks'])]}\n"
             
-            # Add spacing between days, but not after the last day
-            if day < num_days:
-                plan_text += "\n"
-        
-        return plan_text
+            # Blocks are joined by a line break, which spaces the days
+            yield plan_text
+            plan_text = ""
 
 class SimpleGroceryAssistance:
     def __init__(self, session):
@@ -1920,28 +2009,16 @@ class SimpleCookingGuidance:
         self.current_cooking_step = 1
         self.active_timers = []
         self.session_status = "not_started"
-        self._load_recipe_databases()
     
-    def _load_recipe_databases(self):
-        """Load recipe and cooking instruction databases"""
-        import json
-        import os
-        
-        try:
-            # Load recipes database
-            recipes_path = "/Users/uditrai88/Desktop/nutrition-chatbot/raw_data/recipes_raw.json"
-            with open(recipes_path, 'r') as f:
-                self.recipes_db = json.load(f)
-            
-            # Load cooking instructions database  
-            instructions_path = "/Users/uditrai88/Desktop/nutrition-chatbot/raw_data/cooking_instructions_raw.json"
-            with open(instructions_path, 'r') as f:
-                self.cooking_db = json.load(f)
-                
-        except Exception as e:
-            # Fallback to empty databases if files not found
-            self.recipes_db = {"recipes": []}
-            self.cooking_db = {"cooking_instructions": []}
+    @property
+    def recipes_db(self):
+        """Shared read-only recipe database"""
+        return get_shared_data_loader().get_dataset('recipes', {"recipes": []})
+    
+    @property
+    def cooking_db(self):
+        """Shared read-only cooking instruction database"""
+        return get_shared_data_loader().get_dataset('cooking_instructions', {"cooking_instructions": []})
     
     def start_journey(self, user_input="", recipe_name=None):
         """Start cooking guidance with a specific recipe"""
@@ -2193,10 +2270,7 @@ What would you like to do? 🤔"""
     
     def _find_cooking_instructions(self, recipe_id):
         """Find cooking instructions by recipe ID"""
-        for instructions in self.cooking_db['cooking_instructions']:
-            if instructions['recipe_id'] == recipe_id:
-                return instructions
-        return None
+        return get_shared_data_loader().get_cooking_instructions_by_recipe_id(recipe_id)
     
     def _scale_ingredients(self, target_servings):
         """Scale ingredient quantities based on target servings"""
@@ -2598,28 +2672,16 @@ class SimpleCalorieMeals:
         self.dietary_preferences = []
         self.search_results = []
         self.selected_meal = None
-        self._load_meal_databases()
     
-    def _load_meal_databases(self):
-        """Load meal and food nutrition databases"""
-        import json
-        import os
-        
-        try:
-            # Load meal suggestions database
-            meals_path = "/Users/uditrai88/Desktop/nutrition-chatbot/raw_data/meal_suggestions_raw.json"
-            with open(meals_path, 'r') as f:
-                self.meals_db = json.load(f)
-            
-            # Load foods nutrition database  
-            foods_path = "/Users/uditrai88/Desktop/nutrition-chatbot/raw_data/foods_nutrition_raw.json"
-            with open(foods_path, 'r') as f:
-                self.foods_db = json.load(f)
-                
-        except Exception as e:
-            # Fallback to empty databases if files not found
-            self.meals_db = {"meal_suggestions": []}
-            self.foods_db = {"foods": []}
+    @property
+    def meals_db(self):
+        """Shared read-only meal database"""
+        return get_shared_data_loader().get_dataset('meal_suggestions', {"meal_suggestions": []})
+    
+    @property
+    def foods_db(self):
+        """Shared read-only food nutrition database"""
+        return get_shared_data_loader().get_dataset('foods_nutrition', {"foods": []})
     
     def start_journey(self, user_input=""):
         self.step = 1
@@ -3018,31 +3080,22 @@ Any dietary preferences or restrictions?
         return [meal for meal, score in matching_meals[:5]]  # Top 5 matches
     
     def _perform_search(self, meals, strict=True):
-        """Perform meal search with given criteria"""
-        matching_meals = []
-        
-        for meal in meals:
-            # Check calorie range
-            if not (self.calorie_range[0] <= meal['calories'] <= self.calorie_range[1]):
-                continue
-            
-            # Check meal type (strict vs flexible)
-            if strict:
-                meal_types_match = any(mt in meal.get('meal_type', []) for mt in self.meal_types)
-                if not meal_types_match:
-                    continue
-            
-            # Check dietary restrictions
-            meal_tags = meal.get('dietary_tags', [])
-            dietary_match = all(pref in meal_tags for pref in self.dietary_preferences)
-            if not dietary_match:
-                continue
-            
-            # Calculate match score for ranking
-            score = self._calculate_meal_score(meal)
-            matching_meals.append((meal, score))
-        
-        return matching_meals
+        """Perform meal search with given criteria, returning the top (meal, score) matches"""
+        # Calorie accuracy, short prep, dietary tag, protein and fiber bonuses
+        # are scored over the whole catalog at once by the nutrition matrix
+        return self._get_meal_matrix(meals).calorie_search(
+            self.calorie_range,
+            self.calorie_target,
+            meal_types=self.meal_types if strict else None,
+            dietary_tags=self.dietary_preferences
+        )
+    
+    def _get_meal_matrix(self, meals):
+        """Get the nutrition matrix of the meal list (the shared one for the catalog)"""
+        matrix = get_shared_data_loader().get_nutrition_matrix()
+        if matrix.meals is not meals:
+            matrix = NutritionMatrix(meals)
+        return matrix
     
     def _perform_fallback_searches(self, meals):
         """Perform fallback searches when primary search fails"""
@@ -3071,34 +3124,6 @@ Any dietary preferences or restrictions?
         
         return matching_meals
     
-    def _calculate_meal_score(self, meal):
-        """Calculate relevance score for meal ranking"""
-        score = 0
-        
-        # Calorie accuracy (closer to target = higher score)
-        calorie_diff = abs(meal['calories'] - self.calorie_target)
-        calorie_score = max(0, 100 - calorie_diff)  # Higher score for closer match
-        score += calorie_score
-        
-        # Prep time preference (shorter = slightly higher score)
-        prep_time = meal.get('prep_time', 30)
-        prep_score = max(0, 50 - prep_time)  # Max 50 points for prep time
-        score += prep_score
-        
-        # Dietary tag bonus
-        meal_tags = meal.get('dietary_tags', [])
-        tag_bonus = len([tag for tag in self.dietary_preferences if tag in meal_tags]) * 10
-        score += tag_bonus
-        
-        # Nutrition quality bonus  
-        nutrition = meal.get('nutrition', {})
-        if nutrition.get('protein', 0) >= 20:  # High protein bonus
-            score += 15
-        if nutrition.get('fiber', 0) >= 8:   # High fiber bonus
-            score += 10
-        
-        return score
-    
     def handle_step_6(self, user_input=""):
         """STEP 6: MEAL RESULTS DISPLAY"""
         
@@ -3624,15 +3649,117 @@ Please choose:
 
 class TelegramNutritionBot:
     """Integrated Telegram bot with journey flows"""
+
+    # Intent -> keywords, checked in order against the normalized message. A tuple
+    # so it cannot change under intent_cache; use set_intent_keywords to replace it.
+    INTENT_KEYWORDS = (
+        ('recipe_discovery', ('recipe', 'dish', 'italian', 'asian', 'mexican', 'find recipe', 'show recipe')),
+        ('food_tracking', ('track', 'log', 'food', 'calorie', 'ate', 'breakfast', 'lunch', 'dinner', 'diary')),
+        ('meal_planning', ('plan', 'meal plan', 'weekly', 'week')),
+        ('grocery_assistance', ('grocery', 'shopping', 'list', 'buy', 'store')),
+        ('cooking_guidance', ('cooking', 'guide', 'help cook', 'cook this', 'how to cook')),
+        ('calorie_meals', ('calorie meal', 'low calorie', 'high calorie', 'calories')),
+    )
     
     def __init__(self, token: str):
         self.token = token
-        self.user_sessions: Dict[int, SimpleTelegramSession] = {}
         self.journeys = {}
-        
+
+        # Parse (or restore) the shared catalog up front so journeys never touch disk
+        get_shared_data_loader()
+
+        # Sessions survive restarts through a write-behind store (SESSION_BACKEND)
+        self.session_store = create_session_store('telegram_sessions', lambda session: session.get_state())
+
+        # Live sessions are bounded (SESSION_CACHE_SIZE, SESSION_IDLE_TTL); evicted ones spill to the store
+        self.user_sessions = create_session_cache(self._evict_session)
+        # Without a session store evicted users keep only their food diary, bounded and expired like live sessions
+        self._evicted_diaries = create_session_cache()
+
+        # Canned phrases and button labels repeat a lot; remember their intents
+        self.intent_cache = IntentCache()
+
+        # Slow journey steps run in a worker pool (STEP_EXECUTOR) so the loop keeps serving others
+        self.step_executor = create_step_executor()
+
+        # Replies go through a rate-limited, retrying send queue instead of blocking handlers
+        self.outbox = create_outbound_queue(self._send_message)
+
+        # Different users' updates run concurrently (UPDATE_MAX_IN_FLIGHT), each user's in order
+        self.update_dispatcher = create_update_dispatcher()
+        max_pending = int(os.getenv('UPDATE_MAX_PENDING', '1024'))
+
+        # Prometheus endpoint on METRICS_PORT (off when unset)
+        self.metrics_server = create_metrics_server()
+        self._register_metrics()
+
         # Build application
-        self.application = Application.builder().token(token).build()
+        builder = (
+            Application.builder()
+            .token(token)
+            .concurrent_updates(UserOrderedUpdateProcessor(self.update_dispatcher, max_pending))
+            .post_init(self._post_init)
+            .post_stop(self._post_stop)
+            .post_shutdown(self._post_shutdown)
+        )
+        api_base_url = os.getenv('TELEGRAM_API_BASE_URL')  # Self-hosted Bot API server, or the load-test fake
+        if api_base_url:
+            api_base_url = api_base_url.rstrip('/')
+            builder = builder.base_url(f"{api_base_url}/bot").base_file_url(f"{api_base_url}/file/bot")
+        self.application = builder.build()
         self._setup_handlers()
+
+    async def _post_init(self, application: Application):
+        """Start periodic session flushing and the metrics endpoint once the event loop runs"""
+        if self.session_store:
+            self.session_store.start()
+        if self.metrics_server:
+            await self.metrics_server.start()
+
+    async def _post_stop(self, application: Application):
+        """Deliver queued replies while the bot can still send"""
+        await self.outbox.close()
+        logger.info(f"Outbound queue stats: {self.outbox.get_stats()}")
+
+    async def _post_shutdown(self, application: Application):
+        """Write every pending session before the process exits"""
+        logger.info(f"Session cache stats: {self.user_sessions.get_stats()}")
+        logger.info(f"Intent cache stats: {self.intent_cache.get_stats()}")
+        logger.info(f"Step executor stats: {self.step_executor.get_stats()}")
+        logger.info(f"Update dispatcher stats: {self.update_dispatcher.get_stats()}")
+        self.step_executor.shutdown(wait=False)
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.session_store:
+            await self.session_store.stop()
+            self.session_store.close()
+            logger.info("Session store flushed and closed")
+
+    def _register_metrics(self) -> None:
+        """Export session, cache, update and send-queue state; values are read at scrape time"""
+        REGISTRY.gauge('chatbot_active_sessions', 'Sessions held in memory').set_function(
+            lambda: len(self.user_sessions))
+        REGISTRY.gauge('chatbot_updates_in_flight', 'Updates being processed').set_function(
+            lambda: self.update_dispatcher.get_stats()['in_flight'])
+
+        hits = REGISTRY.counter('chatbot_cache_hits_total', 'Cache lookups that hit', ('cache',))
+        misses = REGISTRY.counter('chatbot_cache_misses_total', 'Cache lookups that missed', ('cache',))
+        hit_ratio = REGISTRY.gauge('chatbot_cache_hit_ratio', 'Share of cache lookups that hit', ('cache',))
+        for name, cache in (('session', self.user_sessions), ('intent', self.intent_cache)):
+            hits.set_function(lambda cache=cache: cache.hits, cache=name)
+            misses.set_function(lambda cache=cache: cache.misses, cache=name)
+            hit_ratio.set_function(lambda cache=cache: cache.get_stats()['hit_rate'], cache=name)
+
+        REGISTRY.histogram('chatbot_outbound_send_seconds', 'Bot API call time of delivered messages').attach(
+            self.outbox.send_latency)
+        REGISTRY.histogram('chatbot_outbound_delivery_seconds',
+                           'Time from queueing a reply to its delivery, including rate-limit waits').attach(
+            self.outbox.latency)
+        outbound = REGISTRY.counter('chatbot_outbound_messages_total', 'Outbound sends by result', ('result',))
+        for result in ('sent', 'failed', 'retries', 'coalesced', 'markdown_fallbacks'):
+            outbound.set_function(lambda result=result: getattr(self.outbox, result), result=result)
+        REGISTRY.gauge('chatbot_outbound_pending', 'Messages waiting to be sent').set_function(
+            self.outbox.pending_count)
     
     def _setup_handlers(self):
         """Setup Telegram bot handlers"""
@@ -3643,11 +3770,107 @@ class TelegramNutritionBot:
         self.application.add_handler(CallbackQueryHandler(self.handle_callback))
     
     def _get_or_create_session(self, user_id: int) -> SimpleTelegramSession:
-        """Get existing session or create new one"""
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = SimpleTelegramSession(user_id)
-        return self.user_sessions[user_id]
-    
+        """Get existing session, restore a saved one, or create a new one"""
+        session = self.user_sessions.get(user_id)
+        if session is None:
+            session = self._load_session(user_id)
+            self.user_sessions.put(user_id, session)
+        return session
+
+    def _load_session(self, user_id: int) -> SimpleTelegramSession:
+        """Build a session from its saved state, including the in-flight journey"""
+        session = SimpleTelegramSession(user_id)
+        if self.session_store:
+            state = self.session_store.load(user_id)
+        else:
+            state = self._evicted_diaries.pop(user_id, None)
+        if not state:
+            return session
+
+        session.restore_state(state)
+        journey_state = state.get('journey_state')
+        if session.current_journey and journey_state is not None:
+            journey = self._create_journey(session.current_journey, session)
+            if journey is not None:
+                journey.__dict__.update(journey_state)
+                session.journey_instance = journey
+        return session
+
+    def _save_session(self, user_id: int, session: SimpleTelegramSession) -> None:
+        """Mark a session as changed; it is written on the next flush"""
+        if self.session_store:
+            self.session_store.mark_dirty(user_id, session)
+
+    def _evict_session(self, user_id: int, session: SimpleTelegramSession) -> None:
+        """Spill an evicted session to the store, or keep just its food diary"""
+        if self.session_store:
+            self.session_store.mark_dirty(user_id, session)
+        else:
+            state = session.get_state()
+            self._evicted_diaries[user_id] = {
+                key: state[key] for key in ('logged_foods', 'daily_totals', 'nutrition_goals')
+            }
+
+    async def _run_journey_step(self, session: SimpleTelegramSession, method: str, *args) -> Union[str, StreamedReply]:
+        """Run a step of the session's journey through the step executor"""
+        journey = session.journey_instance
+        step = getattr(journey, 'step', 0)
+        step_key = f"{type(journey).__name__}.{method}:{step}"
+        # handle_input dispatches on journey.step, so label it with the step method it runs
+        labels = {'journey': type(journey).__name__,
+                  'step': f"handle_step_{step}" if method == 'handle_input' and step else method}
+        start = time.perf_counter()
+        try:
+            response, result = await self.step_executor.run(step_key, run_journey_step, journey, method, *args)
+        except StepTimeout as e:
+            JOURNEY_STEP_ERRORS.inc(**labels)
+            logger.warning(f"Journey step timed out for user {session.user_id}: {e}")
+            # The worker only holds a copy, so the session is untouched; restart so the input cannot stall it again
+            session.start_journey(session.current_journey)
+            return STEP_TIMEOUT_MESSAGE
+        except Exception:
+            JOURNEY_STEP_ERRORS.inc(**labels)
+            raise
+        finally:
+            JOURNEY_STEP_SECONDS.observe(time.perf_counter() - start, **labels)
+        if result is not journey:
+            self._adopt_journey_copy(session, journey, result)
+        return response
+
+    def _adopt_journey_copy(self, session: SimpleTelegramSession, journey, result) -> None:
+        """Apply a step that ran on a copy (offloaded by the executor) to the live objects"""
+        copy_session = result.session
+        next_journey = copy_session.journey_instance
+        session.__dict__.update(
+            {key: value for key, value in vars(copy_session).items() if key != 'journey_instance'}
+        )
+        journey.__dict__.update(
+            {key: value for key, value in vars(result).items() if key not in JOURNEY_TRANSIENT_ATTRIBUTES}
+        )
+        if next_journey is result:
+            session.journey_instance = journey
+        else:
+            if next_journey is not None:
+                next_journey.session = session
+            session.journey_instance = next_journey
+
+    async def _send_message(self, chat_id: int, text: str, parse_mode: str = None, **options):
+        """sendMessage for the outbound queue, with Bot API failures mapped to SendError"""
+        try:
+            await self.application.bot.send_message(chat_id, text, parse_mode=parse_mode, **options)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            seconds = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+            raise SendError(429, e.message, retry_after=seconds) from e
+        except BadRequest as e:
+            raise SendError(400, e.message) from e
+        except Forbidden as e:
+            raise SendError(403, e.message) from e
+        except NetworkError as e:  # Timeouts, connection errors and 5xx answers
+            raise SendError(502, e.message) from e
+        except TelegramError as e:
+            raise SendError(400, e.message) from e
+
     def _create_journey(self, journey_name: str, session: SimpleTelegramSession):
         """Create journey instance"""
         if journey_name == 'recipe_discovery':
@@ -3665,34 +3888,20 @@ class TelegramNutritionBot:
         return None
     
     def _classify_intent(self, user_input: str) -> str:
-        """Simple intent classification"""
-        user_input = user_input.lower()
-        
-        # Recipe discovery patterns
-        if any(word in user_input for word in ['recipe', 'dish', 'italian', 'asian', 'mexican', 'find recipe', 'show recipe']):
-            return 'recipe_discovery'
-        
-        # Food tracking patterns  
-        elif any(word in user_input for word in ['track', 'log', 'food', 'calorie', 'ate', 'breakfast', 'lunch', 'dinner', 'diary']):
-            return 'food_tracking'
-        
-        # Meal planning patterns
-        elif any(word in user_input for word in ['plan', 'meal plan', 'weekly', 'week']):
-            return 'meal_planning'
-        
-        # Grocery patterns
-        elif any(word in user_input for word in ['grocery', 'shopping', 'list', 'buy', 'store']):
-            return 'grocery_assistance'
-        
-        # Cooking guidance patterns
-        elif any(word in user_input for word in ['cooking', 'guide', 'help cook', 'cook this', 'how to cook']):
-            return 'cooking_guidance'
-        
-        # Calorie-based meals patterns
-        elif any(word in user_input for word in ['calorie meal', 'low calorie', 'high calorie', 'calories']):
-            return 'calorie_meals'
-        
+        """Simple intent classification (cached per normalized message)"""
+        return self.intent_cache.classify(user_input, self._match_intent_keywords)
+    
+    def _match_intent_keywords(self, user_input: str) -> str:
+        """First intent in INTENT_KEYWORDS with a keyword in the normalized message"""
+        for intent, keywords in self.INTENT_KEYWORDS:
+            if any(word in user_input for word in keywords):
+                return intent
         return None
+
+    def set_intent_keywords(self, intent_keywords) -> None:
+        """Replace the keyword table and forget intents cached under the old one"""
+        self.INTENT_KEYWORDS = tuple((intent, tuple(keywords)) for intent, keywords in intent_keywords)
+        self.intent_cache.clear()
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -3730,7 +3939,7 @@ class TelegramNutritionBot:
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await update.message.reply_text(welcome_message, parse_mode='Markdown', reply_markup=reply_markup)
+        self.outbox.submit(update.effective_chat.id, welcome_message, 'Markdown', reply_markup=reply_markup)
     
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
@@ -3764,15 +3973,19 @@ Just talk to me naturally! I understand context and will guide you through each
 
 Ready to start? Tell me what you'd like to do! 🌟"""
         
-        await update.message.reply_text(help_text, parse_mode='Markdown')
+        self.outbox.submit(update.effective_chat.id, help_text, 'Markdown')
     
     async def reset_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /reset command"""
         user_id = update.effective_user.id
         if user_id in self.user_sessions:
             del self.user_sessions[user_id]
-        
-        await update.message.reply_text(
+        self._evicted_diaries.pop(user_id, None)
+        if self.session_store:
+            self.session_store.delete(user_id)
+
+        self.outbox.submit(
+            update.effective_chat.id,
             "🔄 **Session Reset!**\n\n"
             "Your conversation has been cleared.\n"  
             "Tell me what you'd like to do! 😊"
@@ -3791,9 +4004,14 @@ Ready to start? Tell me what you'd like to do! 🌟"""
         session.journey_instance = self._create_journey(journey_name, session)
         
         if session.journey_instance:
-            response = session.journey_instance.start_journey()
-            await query.edit_message_text(response, parse_mode='Markdown')
+            try:
+                response = await self._run_journey_step(session, 'start_journey')
+            finally:
+                # Marked once the step is applied, so a flush during the step cannot store the old state
+                self._save_session(user_id, session)
+            await query.edit_message_text(response, parse_mode='Markdown' if is_valid_markdown(response) else None)
         else:
+            self._save_session(user_id, session)
             await query.edit_message_text("🤔 Feature coming soon! Use /start to try other features.")
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -3811,7 +4029,7 @@ Ready to start? Tell me what you'd like to do! 🌟"""
                 
                 journey = session.journey_instance
                 if journey:
-                    response = journey.handle_input(user_input)
+                    response = await self._run_journey_step(session, 'handle_input', user_input)
                 else:
                     response = "🤔 Something went wrong. Use /reset to start fresh."
             else:
@@ -3822,7 +4040,7 @@ Ready to start? Tell me what you'd like to do! 🌟"""
                     session.start_journey(intent)
                     session.journey_instance = self._create_journey(intent, session)
                     if session.journey_instance:
-                        response = session.journey_instance.start_journey(user_input)
+                        response = await self._run_journey_step(session, 'start_journey', user_input)
                     else:
                         response = "🤔 That feature is coming soon! Try recipe discovery or food tracking."
                 else:
@@ -3838,6 +4056,11 @@ I can assist you with:
 
 What would you like to do? Just tell me naturally! 😊"""
             
+            if isinstance(response, StreamedReply):
+                # Long replies (meal plans) are queued part by part as they are rendered
+                await self.outbox.submit_stream(update.effective_chat.id, response, 'Markdown')
+                return
+            
             # Determine if we should use Markdown parsing
             # Skip Markdown for recipe lists and other potentially problematic content
             use_markdown = True
@@ -3846,46 +4069,96 @@ What would you like to do? Just tell me naturally! 😊"""
             elif 'Error showing recipes' in response:
                 use_markdown = False
             
-            # Split long messages
-            if len(response) > 4000:
-                chunks = [response[i:i+4000] for i in range(0, len(response), 4000)]
-                for chunk in chunks:
-                    if use_markdown:
-                        await update.message.reply_text(chunk, parse_mode='Markdown')
-                    else:
-                        await update.message.reply_text(chunk)
-            else:
-                if use_markdown:
-                    await update.message.reply_text(response, parse_mode='Markdown')
-                else:
-                    await update.message.reply_text(response)
+            # The send queue splits long messages and falls back to plain text for invalid Markdown
+            self.outbox.submit(update.effective_chat.id, response, 'Markdown' if use_markdown else None)
                 
         except Exception as e:
+            HANDLER_ERRORS.inc(handler='message')
             logger.error(f"Error processing message: {e}")
-            # Check if this is a Markdown parsing error
-            if "can't parse entities" in str(e).lower() or "parse entities" in str(e).lower():
-                # Try sending the response without Markdown
-                try:
-                    if len(response) > 4000:
-                        chunks = [response[i:i+4000] for i in range(0, len(response), 4000)]
-                        for chunk in chunks:
-                            await update.message.reply_text(chunk)
-                    else:
-                        await update.message.reply_text(response)
-                except:
-                    # If that also fails, send generic error
-                    await update.message.reply_text(
-                        "⚠️ Sorry, I encountered a formatting error. Use /reset to start fresh or try rephrasing your request."
-                    )
-            else:
-                await update.message.reply_text(
-                    "⚠️ Sorry, I encountered an error. Use /reset to start fresh or try rephrasing your request."
-                )
+            self.outbox.submit(
+                update.effective_chat.id,
+                "⚠️ Sorry, I encountered an error. Use /reset to start fresh or try rephrasing your request."
+            )
+        finally:
+            # Marked once the journey step is applied, so a flush during the step cannot store the old state
+            self._save_session(user_id, session)
     
     def run(self):
-        """Start the bot"""
+        """Start the bot by long polling, or by webhook when BOT_MODE=webhook"""
         logger.info("Starting Integrated Telegram Nutrition Bot...")
-        self.application.run_polling()
+        if os.getenv('BOT_MODE', 'polling').lower() == 'webhook':
+            asyncio.run(self.run_webhook())
+        else:
+            self.application.run_polling()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the stats of every bot component"""
+        stats = {
+            'sessions': self.user_sessions.get_stats(),
+            'intent_cache': self.intent_cache.get_stats(),
+            'step_executor': self.step_executor.get_stats(),
+            'updates': self.update_dispatcher.get_stats()
+        }
+        if self.session_store:
+            stats['session_store'] = self.session_store.get_stats()
+        return stats
+
+    async def serve_worker(self, sock):
+        """Process the updates a sharding supervisor sends over sock until it closes"""
+        await self.application.initialize()
+        try:
+            await self._post_init(self.application)
+            await self.application.start()
+            await serve_worker_channel(sock, self._process_webhook_update, self.get_stats,
+                                       self.application.update_processor.max_concurrent_updates)
+        finally:
+            if self.application.running:
+                await self.application.stop()
+            await self._post_stop(self.application)
+            await self._post_shutdown(self.application)
+            await self.application.shutdown()
+
+    async def _process_webhook_update(self, data: Dict[str, Any]):
+        """Turn a webhook payload into an Update and process it like a polled one"""
+        update = Update.de_json(data, self.application.bot)
+        await self.application.update_processor.process_update(update, self.application.process_update(update))
+
+    async def run_webhook(self):
+        """
+        Serve updates through the local webhook server until SIGINT/SIGTERM.
+        When WEBHOOK_URL (the public base URL) is set, Telegram is pointed at it.
+        """
+        server = create_webhook_server(self._process_webhook_update,
+                                       self.application.update_processor.max_concurrent_updates)
+        await server.start()  # /healthz answers while the bot starts up
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        await self.application.initialize()
+        try:
+            await self._post_init(self.application)
+            await self.application.start()
+            public_url = os.getenv('WEBHOOK_URL')
+            if public_url:
+                await self.application.bot.set_webhook(
+                    public_url.rstrip('/') + server.path,
+                    secret_token=server.secret_token,
+                    allowed_updates=Update.ALL_TYPES
+                )
+            server.ready = True
+            logger.info("Webhook mode ready")
+            await stop.wait()
+        finally:
+            await server.stop()
+            logger.info(f"Webhook server stats: {server.get_stats()}")
+            if self.application.running:
+                await self.application.stop()
+            await self._post_stop(self.application)
+            await self._post_shutdown(self.application)
+            await self.application.shutdown()
 
 def main():
     """Main function"""
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test the process-wide data registry shared by DataLoader instances"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_registry import DataRegistry, DATA_FILES
+from data.data_loader import DataLoader
+from core.session_manager import SessionManager
+from journeys.recipe_discovery import RecipeDiscoveryJourney
+
+def test_registry_parses_once():
+    """Many loaders over the same folder should parse each file only once"""
+    print("🧪 Data Registry - Shared Loading")
+    print("=" * 40)
+
+    registry = DataRegistry(use_snapshot=False)
+    first = DataLoader(registry=registry)
+    stats = registry.get_stats()
+    print(f"After first loader: {stats}")
+    assert stats['loads'] == len(DATA_FILES)
+    assert stats['hits'] == 0
+
+    others = [DataLoader(registry=registry) for _ in range(10)]
+    stats = registry.get_stats()
+    print(f"After ten more loaders: {stats}")
+    assert stats['loads'] == len(DATA_FILES)
+    assert stats['hits'] == 10
+
+    # Every loader sees the very same objects
+    for loader in others:
+        assert loader.get_meals() is first.get_meals()
+        assert loader.get_recipes() is first.get_recipes()
+
+    print("✅ Datasets parsed once and shared")
+
+def test_registry_views_are_read_only():
+    """The shared view must not be writable by one journey on behalf of all"""
+    registry = DataRegistry(use_snapshot=False)
+    loader = DataLoader(registry=registry)
+
+    for target in (loader._data_cache, loader.get_grocery_support()):
+        try:
+            target['injected'] = True
+        except TypeError:
+            continue
+        raise AssertionError("shared data view accepted a write")
+
+    print("✅ Shared views are read-only")
+
+def test_reload_and_journey_reuse():
+    """reload_data re-parses, and journeys reuse the loader they are given"""
+    registry = DataRegistry(use_snapshot=False)
+    loader = DataLoader(registry=registry)
+    loader.reload_data()
+    assert registry.get_stats()['loads'] == 2 * len(DATA_FILES)
+
+    journey = RecipeDiscoveryJourney(SessionManager(), loader)
+    assert journey.data_loader is loader
+    assert registry.get_stats()['loads'] == 2 * len(DATA_FILES)
+
+    print("✅ Reload and journey reuse behave as expected")
+
+if __name__ == "__main__":
+    test_registry_parses_once()
+    test_registry_views_are_read_only()
+    test_reload_and_journey_reuse()
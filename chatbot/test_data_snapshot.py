@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Test the on-disk catalog snapshot used for fast cold starts"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from data.data_registry import DataRegistry, DATA_FILES, SNAPSHOT_FILENAME
+
+RAW_DATA = Path(__file__).parent.parent / "raw_data"
+
+def copy_raw_data(target: Path) -> Path:
+    """Copy the source JSON files into a scratch folder"""
+    for filename in DATA_FILES.values():
+        shutil.copy2(RAW_DATA / filename, target / filename)
+    return target
+
+def test_snapshot_round_trip():
+    """A second process restores data and indexes from the snapshot"""
+    print("🧪 Catalog Snapshot - Round Trip")
+    print("=" * 40)
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = copy_raw_data(Path(tmp))
+
+        cold = DataRegistry()
+        cold_loader = DataLoader(base_path, cold)
+        assert cold.get_stats()['loads'] == len(DATA_FILES)
+        assert cold.get_stats()['snapshot_writes'] == 1
+        assert (base_path / SNAPSHOT_FILENAME).exists()
+
+        # Simulates the next process start
+        warm = DataRegistry()
+        start = time.perf_counter()
+        warm_loader = DataLoader(base_path, warm)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = warm.get_stats()
+        print(f"Warm start: {elapsed_ms:.1f}ms {stats}")
+        assert stats['loads'] == 0
+        assert stats['snapshot_loads'] == 1
+
+        # Indexes came with the snapshot instead of being rebuilt
+        warm_loader.build_indexes()
+        assert warm.get_stats()['derived_builds'] == 0
+
+        assert warm_loader.get_meals() == cold_loader.get_meals()
+        assert warm_loader.get_food_by_id('food_001') == cold_loader.get_food_by_id('food_001')
+        meal = warm_loader.filter_meals_by_multiple_criteria(meal_type='lunch')[0]
+        assert meal is warm_loader.get_meal_by_id(meal['id'])
+        print("✅ Snapshot restores data and shared indexes")
+
+def test_snapshot_refreshed_when_source_changes():
+    """Editing a source file falls back to JSON and rewrites the snapshot"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = copy_raw_data(Path(tmp))
+        DataLoader(base_path, DataRegistry())
+
+        # Touching a file without changing it keeps the snapshot valid
+        meals_file = base_path / DATA_FILES['meal_suggestions']
+        os.utime(meals_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+        touched = DataRegistry()
+        DataLoader(base_path, touched)
+        assert touched.get_stats()['snapshot_loads'] == 1
+        assert touched.get_stats()['snapshot_writes'] == 1  # Records the new mtime
+        refreshed = DataRegistry()
+        folder = DataLoader(base_path, refreshed)._folder
+        assert folder.sources[meals_file.name][1] == meals_file.stat().st_mtime_ns
+        assert refreshed.get_stats()['snapshot_writes'] == 0
+
+        meals_file.write_text('{"meal_suggestions": [{"id": "meal_x", "calories": 100}]}', encoding='utf-8')
+        changed = DataRegistry()
+        loader = DataLoader(base_path, changed)
+        stats = changed.get_stats()
+        assert stats['snapshot_loads'] == 0
+        assert stats['loads'] == len(DATA_FILES)
+        assert stats['snapshot_writes'] == 1
+        assert [meal['id'] for meal in loader.get_meals()] == ['meal_x']
+
+        again = DataRegistry()
+        assert [meal['id'] for meal in DataLoader(base_path, again).get_meals()] == ['meal_x']
+        assert again.get_stats()['snapshot_loads'] == 1
+        print("✅ Changed sources invalidate the snapshot")
+
+def test_corrupt_snapshot_ignored():
+    """A damaged snapshot is ignored and replaced"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = copy_raw_data(Path(tmp))
+        (base_path / SNAPSHOT_FILENAME).write_bytes(b'not a pickle')
+        registry = DataRegistry()
+        loader = DataLoader(base_path, registry)
+        assert loader.get_meals()
+        assert registry.get_stats()['snapshot_writes'] == 1
+        print("✅ Corrupt snapshot replaced")
+
+def test_unparseable_source_snapshotted():
+    """A source file that fails to parse is recorded, so later starts use the snapshot"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = copy_raw_data(Path(tmp))
+        (base_path / DATA_FILES['recipes']).write_bytes(b'{"recipes": [\xff')
+        first = DataRegistry()
+        DataLoader(base_path, first)
+        assert first.get_stats()['loads'] == len(DATA_FILES) - 1
+        assert first.get_stats()['snapshot_writes'] == 1
+
+        second = DataRegistry()
+        loader = DataLoader(base_path, second)
+        assert second.get_stats()['snapshot_loads'] == 1 and second.get_stats()['loads'] == 0
+        assert loader.get_recipes() == []
+        print("✅ Broken source files do not force a re-parse")
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
+    test_snapshot_refreshed_when_source_changes()
+    test_corrupt_snapshot_ignored()
+    test_unparseable_source_snapshotted()
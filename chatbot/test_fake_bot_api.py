@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test the fake Bot API and the load-test driver"""
+
+import sys
+import os
+import asyncio
+import json
+from urllib.parse import urlencode
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.outbound import OutboundQueue, SendError
+from fake_bot_api import FakeBotApi
+from load_test import LoadTest, SCENARIOS, latency_summary, percentile
+
+TOKEN = '123456:TEST'
+
+async def call(api, method, params=None, form=False):
+    """POST one Bot API call over HTTP; returns (status, decoded JSON)"""
+    reader, writer = await asyncio.open_connection(api.host, api.port)
+    if form:
+        body = urlencode({key: value if isinstance(value, str) else json.dumps(value)
+                          for key, value in (params or {}).items()}).encode()
+        content_type = 'application/x-www-form-urlencoded'
+    else:
+        body = json.dumps(params or {}).encode()
+        content_type = 'application/json'
+    writer.write(f"POST /bot{TOKEN}/{method} HTTP/1.1\r\nHost: test\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    raw = await reader.read()
+    writer.close()
+    return status, json.loads(raw.split(b'\r\n\r\n', 1)[1])
+
+async def echo_bot(api, stop):
+    """Minimal bot: long-polls the fake API and answers every update over HTTP"""
+    offset = 0
+    while not stop.is_set():
+        _, reply = await call(api, 'getUpdates', {'offset': offset, 'timeout': 0.2})
+        for update in reply['result']:
+            offset = update['update_id'] + 1
+            if 'callback_query' in update:
+                query = update['callback_query']
+                await call(api, 'answerCallbackQuery', {'callback_query_id': query['id']}, form=True)
+                await call(api, 'editMessageText', {'chat_id': query['message']['chat']['id'],
+                                                    'message_id': query['message']['message_id'],
+                                                    'text': f"picked {query['data']}"}, form=True)
+            else:
+                message = update['message']
+                await call(api, 'sendMessage', {'chat_id': message['chat']['id'],
+                                                'text': f"echo {message['text']}"})
+
+def test_bot_api_methods():
+    """getMe, getUpdates, sendMessage and errors over HTTP"""
+    print("🧪 Fake Bot API - Methods")
+    print("=" * 40)
+
+    async def scenario():
+        api = FakeBotApi()
+        await api.start()
+        try:
+            status, reply = await call(api, 'getMe')
+            assert status == 200 and reply['result']['is_bot']
+
+            status, reply = await call(api, 'getUpdates', {'timeout': 0.05})
+            assert reply == {'ok': True, 'result': []} and api.polled.is_set()
+            print("✅ Empty long poll returns after its timeout")
+
+            first = api.send_text(7, '/start')
+            api.send_text(7, '42')
+            _, reply = await call(api, 'getUpdates', {'offset': 0, 'limit': 1})
+            assert [u['update_id'] for u in reply['result']] == [first]
+            assert reply['result'][0]['message']['entities'][0]['type'] == 'bot_command'
+            _, reply = await call(api, 'getUpdates', {'offset': first + 1}, form=True)
+            assert [u['message']['text'] for u in reply['result']] == ['42']
+            print("✅ Offsets acknowledge updates, limit caps the batch")
+
+            status, reply = await call(api, 'sendMessage', {'chat_id': 7, 'text': '123',
+                                                            'reply_markup': {'inline_keyboard': []}}, form=True)
+            assert status == 200 and reply['result']['text'] == '123'
+            assert reply['result']['reply_markup'] == {'inline_keyboard': []}
+            assert api.received(7) == 1
+            assert await api.wait_for_reply(7, 0, timeout=1) == '123'
+
+            api.press_button(7, 'meal_planning')
+            _, reply = await call(api, 'getUpdates', {'offset': first + 2})
+            query = reply['result'][0]['callback_query']
+            assert query['data'] == 'meal_planning'
+            assert query['message']['message_id'] == api._chat(7).last_message_id
+            print("✅ Messages, form parameters and button presses")
+
+            status, reply = await call(api, 'sendPhoto', {'chat_id': 7})
+            assert status == 404 and reply['ok'] is False
+            try:
+                await api.wait_for_reply(7, 1, timeout=0.05)
+                assert False, "Expected a timeout"
+            except asyncio.TimeoutError:
+                pass
+            print("✅ Unknown methods answer 404, missing replies time out")
+        finally:
+            await api.stop()
+
+    asyncio.run(scenario())
+
+def test_emulated_limits():
+    """429 with retry_after and Markdown parse errors, handled by OutboundQueue"""
+    print("🧪 Fake Bot API - Emulated Limits")
+    print("=" * 40)
+
+    async def scenario():
+        api = FakeBotApi(emulate_limits=True, chat_interval=0.2)
+        await api.start()
+        try:
+            await call(api, 'sendMessage', {'chat_id': 1, 'text': 'one'})
+            status, reply = await call(api, 'sendMessage', {'chat_id': 1, 'text': 'two'})
+            assert status == 429 and reply['parameters']['retry_after'] == 1
+            status, reply = await call(api, 'sendMessage', {'chat_id': 2, 'text': 'keto_friendly',
+                                                            'parse_mode': 'Markdown'})
+            assert status == 400 and 'parse entities' in reply['description']
+            print("✅ Too-fast sends get 429, broken Markdown gets 400")
+
+            async def send(chat_id, text, parse_mode=None, **options):
+                params = {'chat_id': chat_id, 'text': text, **options}
+                if parse_mode:
+                    params['parse_mode'] = parse_mode
+                status, reply = await call(api, 'sendMessage', params)
+                if not reply['ok']:
+                    retry_after = reply.get('parameters', {}).get('retry_after')
+                    # Keep the test fast: honour the hint, scaled down
+                    raise SendError(status, reply['description'], retry_after and retry_after / 10)
+
+            queue = OutboundQueue(send, per_chat_rate=100, per_chat_burst=100, base_backoff=0.01)
+            results = await asyncio.gather(queue.submit(3, 'a'), queue.submit(4, 'b'))
+            await asyncio.sleep(0.25)
+            results += await asyncio.gather(queue.submit(3, 'c'), queue.submit(3, '*bold*', parse_mode='Markdown'))
+            assert all(results)
+            assert api.received(3) >= 2 and api.received(4) == 1
+            assert queue.retries >= 1
+            print(f"✅ Send queue retried {queue.retries} rejected sends and delivered everything")
+        finally:
+            await api.stop()
+
+    asyncio.run(scenario())
+
+def test_load_driver():
+    """The driver replays scenarios against a bot and reports percentiles"""
+    print("🧪 Load Test - Driver")
+    print("=" * 40)
+
+    assert percentile([], 0.5) is None
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    assert percentile(list(range(1, 101)), 0.99) == 99
+    assert latency_summary([0.001, 0.002])['max_ms'] == 2.0
+    print("✅ Nearest-rank percentiles")
+
+    async def scenario():
+        api = FakeBotApi()
+        await api.start()
+        stop = asyncio.Event()
+        bot = asyncio.get_running_loop().create_task(echo_bot(api, stop))
+        try:
+            test = LoadTest(api, users=30, concurrency=10, scenarios=sorted(SCENARIOS), reply_timeout=5)
+            elapsed = await test.run()
+            return test.report(elapsed)
+        finally:
+            stop.set()
+            await bot
+            await api.stop()
+
+    report = asyncio.run(scenario())
+    steps = sum(len(SCENARIOS[name]) * 6 for name in SCENARIOS)  # 30 users over 5 scenarios
+    assert report['completed_users'] == 30 and report['timeouts'] == 0
+    assert report['latency']['count'] == steps
+    assert report['api_calls']['editMessageText'] == 6
+    assert report['latency']['p50_ms'] <= report['latency']['p99_ms']
+    print(f"✅ {steps} replies, p99 {report['latency']['p99_ms']}ms, "
+          f"{report['throughput_rps']} replies/s")
+
+if __name__ == "__main__":
+    test_bot_api_methods()
+    test_emulated_limits()
+    test_load_driver()
+    print("\n🎉 All fake Bot API tests passed!")
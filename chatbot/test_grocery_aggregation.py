@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Test grocery list aggregation over meal plans"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from core.session_manager import SessionManager
+from journeys.meal_planning import MealPlanningJourney
+from utils.grocery_utils import GroceryAggregator, IngredientExtractor, build_unit_table, normalize_amount
+
+def sample_plan(days, meals):
+    """A plan cycling through catalog meals, five slots a day"""
+    meal_types = ['breakfast', 'snack', 'lunch', 'snack_2', 'dinner']
+    return {
+        f"Day {day}": {meal_type: meals[(day * len(meal_types) + slot) % len(meals)]
+                       for slot, meal_type in enumerate(meal_types)}
+        for day in range(1, days + 1)
+    }
+
+def test_unit_normalization():
+    """Weights become grams, volumes millilitres and counts pieces"""
+    print("🧪 Grocery Aggregation - Units")
+    print("=" * 40)
+    table = build_unit_table(DataLoader().get_unit_conversions())
+    assert normalize_amount(1, 'cup', table) == (240, 'ml')
+    assert normalize_amount(2, 'Tablespoons', table) == (30, 'ml')
+    assert normalize_amount(1, 'lb', table)[1] == 'g'
+    assert normalize_amount(0.5, 'kg', table) == (500, 'g')
+    assert normalize_amount(3, 'pieces', table) == (3, 'piece')
+    assert normalize_amount(2, 'pinch', table) == (2, 'pinch')
+    print("✅ cup, tbsp, lb and kg convert; unknown units are kept")
+
+def test_aggregate_meal_plan():
+    """Components join to foods by id and add up across units and days"""
+    print("🧪 Grocery Aggregation - Meal Plan")
+    print("=" * 40)
+    data_loader = DataLoader()
+    aggregator = GroceryAggregator(data_loader)
+    olive_oil = data_loader.get_food_by_id('food_031')  # Olive oil, listed in ml and tbsp
+    plan = {
+        "Day 1": {
+            "breakfast": {"components": [
+                {"name": "oil", "amount": 1, "unit": "tbsp", "food_id": olive_oil['id']},
+                {"name": "mystery sauce", "amount": 2, "unit": "tbsp"}
+            ]},
+            "dinner": {"components": [
+                {"name": "olive oil", "amount": 10, "unit": "ml", "food_id": olive_oil['id']},
+                {"amount": 5, "unit": "g"}
+            ]}
+        },
+        "Day 2": {"dinner": {"components": [
+            {"name": "mystery sauce", "amount": 1, "unit": "tbsp"}
+        ]}}
+    }
+    categories = aggregator.aggregate_meal_plan(plan, servings_multiplier=2)
+    oil = categories[olive_oil['category']][(olive_oil['id'], 'ml')]
+    assert oil['name'] == olive_oil['name'] and oil['amount'] == 50
+    assert oil['sources'] == ['meal_plan:Day 1:breakfast', 'meal_plan:Day 1:dinner']
+    sauce = categories['Other'][('mystery sauce', 'ml')]
+    assert sauce['amount'] == 90 and sauce['food_id'] is None
+    assert sum(len(items) for items in categories.values()) == 2
+    print("✅ tbsp and ml of the same food add up; unnamed components are skipped")
+
+    extracted = IngredientExtractor(data_loader).extract_from_meal_plan(plan)
+    assert {item['name'] for item in extracted} == {olive_oil['name'], 'mystery sauce'}
+    print("✅ The grocery journey's extractor returns the same totals")
+
+def test_large_plan():
+    """A 30-day, five-meal plan is totalled in one pass"""
+    print("🧪 Grocery Aggregation - Large Plan")
+    print("=" * 40)
+    data_loader = DataLoader()
+    meals = data_loader.get_meals()
+    plan = sample_plan(30, meals)
+    components = sum(len(meal['components']) for day in plan.values() for meal in day.values())
+
+    aggregator = GroceryAggregator(data_loader)
+    start = time.perf_counter()
+    categories = aggregator.aggregate_meal_plan(plan)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    items = [item for group in categories.values() for item in group.values()]
+    assert sum(len(item['sources']) for item in items) == components
+    assert all(item['unit'] in ('g', 'ml', 'piece') for item in items)
+    assert all(item['category'] == category for category, group in categories.items() for item in group.values())
+    assert elapsed_ms < 50, elapsed_ms
+    print(f"✅ {components} components -> {len(items)} items in {elapsed_ms:.1f}ms")
+
+    journey = MealPlanningJourney(data_loader, SessionManager())
+    journey.planning_duration = 30
+    journey.meal_plan = plan
+    grocery_list = journey._generate_grocery_list()
+    assert grocery_list.startswith('🛒 **GROCERY LIST - 30 Day Meal Plan**')
+    assert grocery_list.count('  • ') == len(items)
+    journey.meal_plan = {"Day 1": {"breakfast": {"name": "Placeholder", "components": []}}}
+    assert 'No Ingredients Found' in journey._generate_grocery_list()
+    print("✅ Journey grocery list shows one line per item")
+
+if __name__ == "__main__":
+    test_unit_normalization()
+    test_aggregate_meal_plan()
+    test_large_plan()
+    print("\n🎉 All grocery aggregation tests passed!")
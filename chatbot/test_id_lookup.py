@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test the id -> record lookup maps kept by DataLoader"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader, build_id_map
+from data.data_registry import DataRegistry
+
+def test_lookups_match_linear_scans():
+    """Every by-id accessor returns what a linear scan would"""
+    print("🧪 Id Lookup Maps")
+    print("=" * 40)
+    loader = DataLoader()
+
+    for recipe in loader.get_recipes():
+        assert loader.get_recipe_by_id(recipe['id']) is recipe
+    for meal in loader.get_meals():
+        assert loader.get_meal_by_id(meal['id']) is meal
+    for food in loader.get_foods_nutrition():
+        assert loader.get_food_by_id(food['id']) is food
+    for instruction in loader.get_cooking_instructions():
+        assert loader.get_cooking_instructions_by_recipe_id(instruction['recipe_id']) is instruction
+
+    assert loader.get_recipe_by_id('missing') is None
+    assert loader.get_food_by_id(None) is None
+    print("✅ Map lookups agree with the catalog")
+
+def test_alias_fields_and_first_match():
+    """Aliases resolve, and the first record in list order wins"""
+    records = [
+        {'recipe_id': 'r1', 'name': 'first'},
+        {'id': 'r1', 'name': 'second'},
+        {'id': 'r2', 'recipe_id': 'legacy_r2', 'name': 'third'},
+    ]
+    id_map = build_id_map(records, ('id', 'recipe_id'))
+    assert id_map['r1']['name'] == 'first'
+    assert id_map['legacy_r2']['name'] == 'third'
+    assert id_map['r2']['name'] == 'third'
+    print("✅ Alias fields resolve like the old scan")
+
+def test_maps_rebuilt_on_reload():
+    """reload_data drops the old maps along with the old data"""
+    registry = DataRegistry(use_snapshot=False)
+    loader = DataLoader(registry=registry)
+    before = loader._get_id_map('foods')
+    loader.reload_data()
+    after = loader._get_id_map('foods')
+    assert before is not after
+    assert after.keys() == before.keys()
+    print("✅ Maps rebuilt after reload")
+
+if __name__ == "__main__":
+    test_lookups_match_linear_scans()
+    test_alias_fields_and_first_match()
+    test_maps_rebuilt_on_reload()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test batch intent classification"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.intent_classifier import IntentClassifier
+from test_intent_matcher import SAMPLES, utterances
+
+def expected_scores(classifier, text):
+    return (classifier.classify_intent(text),
+            {intent: classifier.get_confidence_score(text, intent) for intent in classifier.intent_patterns})
+
+def test_batch_matches_single():
+    """Every batch result equals classify_intent plus get_confidence_score"""
+    print("🧪 Batch Intent Classification - Equivalence")
+    print("=" * 40)
+    classifier = IntentClassifier()
+    texts = SAMPLES + utterances(2000) + SAMPLES  # Repeats share one match
+
+    results = classifier.classify_batch(texts, chunk_size=64)
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        assert (result.intent, result.confidences) == expected_scores(classifier, text), text
+    assert classifier.classify_batch([]) == []
+    print(f"✅ {len(texts)} messages scored like the per-message API")
+
+def test_streaming_input():
+    """Generators and files are consumed lazily, in order"""
+    print("\n🧪 Batch Intent Classification - Streaming")
+    print("=" * 40)
+    classifier = IntentClassifier()
+    consumed = []
+
+    def messages():
+        for text in SAMPLES:
+            consumed.append(text)
+            yield text
+
+    stream = classifier.iter_classify_batch(messages(), chunk_size=4)
+    first = next(stream)
+    assert first.intent == classifier.classify_intent(SAMPLES[0])
+    assert len(consumed) == 4, "only the first chunk should be read"
+    assert [r.intent for r in stream] == [classifier.classify_intent(t) for t in SAMPLES[1:]]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as handle:
+        handle.write('\n'.join(SAMPLES[:9]) + '\n')
+        path = handle.name
+    try:
+        intents = [r.intent for r in classifier.classify_file(path, chunk_size=3)]
+    finally:
+        os.remove(path)
+    assert intents == [classifier.classify_intent(t) for t in SAMPLES[:9]]
+
+    try:
+        classifier.classify_batch(SAMPLES, chunk_size=0)
+        assert False, "chunk_size=0 should be rejected"
+    except ValueError:
+        pass
+    print("✅ Generator and file input streamed chunk by chunk")
+
+def test_multiprocessing():
+    """Worker processes return the same results in input order"""
+    print("\n🧪 Batch Intent Classification - Processes")
+    print("=" * 40)
+    classifier = IntentClassifier()
+    texts = utterances(20000, seed=12)
+
+    start = time.perf_counter()
+    serial = classifier.classify_batch(texts, chunk_size=2000)
+    serial_time = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel = classifier.classify_batch(texts, chunk_size=2000, processes=2)
+    parallel_time = time.perf_counter() - start
+
+    assert parallel == serial
+    print(f"✅ {len(texts)} messages: {serial_time*1000:.0f} ms in-process, "
+          f"{parallel_time*1000:.0f} ms with 2 workers")
+
+if __name__ == "__main__":
+    test_batch_matches_single()
+    test_streaming_input()
+    test_multiprocessing()
+    print("\n🎉 All batch classification tests passed!")
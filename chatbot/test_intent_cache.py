@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test text normalization and the intent LRU cache"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.intent_classifier import IntentClassifier, IntentCache, normalize_text
+
+def test_normalize_text():
+    """Case, punctuation and spacing differences disappear"""
+    print("🧪 Intent Cache - Normalization")
+    print("=" * 40)
+    assert normalize_text("  Log my   BREAKFAST!! ") == "log my breakfast"
+    assert normalize_text("/start") == "start"
+    assert normalize_text("Find me\tItalian recipes?") == "find me italian recipes"
+    assert normalize_text("I need 1,800 calories") == "i need 1800 calories"
+    assert normalize_text("...") == ""
+    print("✅ Messages normalized")
+
+def test_lru_cache():
+    """Hits, misses, cached None and least-recently-used eviction"""
+    print("\n🧪 Intent Cache - LRU")
+    print("=" * 40)
+    calls = []
+
+    def classify(text):
+        calls.append(text)
+        return None if text == 'hello' else text.upper()
+
+    cache = IntentCache(max_size=2)
+    assert cache.classify("Log food", classify) == "LOG FOOD"
+    assert cache.classify("log  FOOD.", classify) == "LOG FOOD"
+    assert cache.classify("Hello!", classify) is None
+    assert cache.classify("hello", classify) is None
+    assert calls == ['log food', 'hello']
+
+    cache.classify("log food", classify)       # 'log food' is now most recent
+    cache.classify("plan meals", classify)     # Evicts 'hello'
+    assert len(cache) == 2
+    cache.classify("hello", classify)
+    assert calls == ['log food', 'hello', 'plan meals', 'hello']
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (3, 4, 2)
+    cache.clear()
+    assert len(cache) == 0 and cache.get_stats()['invalidations'] == 1
+    print(f"✅ LRU behaves: {stats}")
+
+def test_classifier_cache():
+    """Cached answers match uncached ones and are dropped when patterns change"""
+    print("\n🧪 Intent Cache - Classifier")
+    print("=" * 40)
+    classifier = IntentClassifier(cache_size=16)
+    phrases = ["Log my breakfast", "find me italian recipes", "Find me Italian recipes!",
+               "create a grocery list", "hello there", "log my breakfast"] * 3
+    for phrase in phrases:
+        assert classifier.classify_intent(phrase) == classifier.match(phrase).intent
+    stats = classifier.cache.get_stats()
+    assert stats['misses'] == 4 and stats['hits'] == len(phrases) - 4, stats
+
+    assert classifier.classify_intent("hello there") is None
+    classifier.intent_patterns['recipe_discovery'].append(r'hello.*there')
+    classifier.compile_patterns()
+    assert classifier.classify_intent("hello there") == 'recipe_discovery'
+
+    classifier.intent_patterns = {'greeting': [r'hello']}
+    assert classifier.classify_intent("hello there") == 'greeting'
+    assert classifier.classify_intent("log my breakfast") is None
+    assert classifier.cache.get_stats()['invalidations'] == 3  # __init__ + two changes
+    print("✅ Pattern changes invalidate the cache")
+
+if __name__ == "__main__":
+    test_normalize_text()
+    test_lru_cache()
+    test_classifier_cache()
+    print("\n🎉 All intent cache tests passed!")
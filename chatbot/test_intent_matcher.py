@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Test the single-pass compiled intent matcher"""
+
+import sys
+import os
+import random
+import re
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.intent_classifier import IntentClassifier, CompiledIntentMatcher
+
+def reference_classify(patterns, text):
+    """The per-pattern re.search loop IntentClassifier used before"""
+    text = text.lower()
+    for intent, intent_patterns in patterns.items():
+        for pattern in intent_patterns:
+            if re.search(pattern, text):
+                return intent
+    return None
+
+def reference_counts(patterns, text):
+    text = text.lower()
+    return {intent: sum(1 for pattern in intent_patterns if re.search(pattern, text))
+            for intent, intent_patterns in patterns.items()}
+
+SAMPLES = [
+    "Find me Italian recipes", "log my breakfast", "Guide me through cooking pasta",
+    "I need a meal plan for the week", "create a grocery list", "meals with 500 calories",
+    "I need 1800 calories a day", "what should I cook tonight?", "hello there", "",
+    "Show my food diary", "help me cook this", "what ingredients do I need to buy",
+    "UNDER 400 CALORIE lunch", "plan my menu and make a shopping list",
+]
+
+def utterances(count, seed=8):
+    """Random utterances built from pattern fragments and filler words"""
+    classifier = IntentClassifier()
+    words = sorted({piece for patterns in classifier.intent_patterns.values()
+                    for pattern in patterns for piece in pattern.split('.*') if piece.isalpha()})
+    words += ['the', 'me', 'please', 'tonight', 'quick', '300', 'Pasta', 'with', 'a']
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(1, 7))) for _ in range(count)]
+
+def test_matches_reference():
+    """Winner and per-intent counts equal the pattern-by-pattern scan"""
+    print("🧪 Compiled Intent Matcher - Equivalence")
+    print("=" * 40)
+    classifier = IntentClassifier()
+    patterns = classifier.intent_patterns
+
+    for text in SAMPLES + utterances(3000):
+        result = classifier.match(text)
+        assert result.intent == reference_classify(patterns, text), text
+        assert result.match_counts == reference_counts(patterns, text), text
+        assert classifier.classify_intent(text) == result.intent
+        for intent in patterns:
+            expected = reference_counts(patterns, text)[intent] / len(patterns[intent])
+            assert classifier.get_confidence_score(text, intent) == expected
+    assert classifier.get_confidence_score("log food", "unknown_intent") == 0.0
+    print("✅ Same intents and confidences as the regex loop")
+
+def test_recompile_after_editing_patterns():
+    """compile_patterns picks up edited pattern tables"""
+    classifier = IntentClassifier()
+    assert classifier.classify_intent("bake a cake") is None
+    classifier.intent_patterns['recipe_discovery'].append(r'bake.*cake')
+    classifier.compile_patterns()
+    assert classifier.classify_intent("bake a cake") == 'recipe_discovery'
+
+    # Patterns without literal fragments are always candidates
+    matcher = CompiledIntentMatcher({'numbers': [r'\d+'], 'words': [r'^hi$']})
+    assert matcher.match('i ate 3').intent == 'numbers'
+    assert matcher.match('hi').match_counts == {'numbers': 0, 'words': 1}
+    print("✅ Recompiled patterns take effect")
+
+def test_alternation_and_groups():
+    """Patterns whose pieces are optional are never filtered out by a fragment"""
+    print("🧪 Compiled Intent Matcher - Alternation")
+    print("=" * 40)
+    patterns = {
+        'recipe_discovery': [r'recipe|dish.*idea', r'(find.*meal|cook)'],
+        'meal_planning': [r'(plan.*week.*menu)?schedule', r'(?i)MEAL.*PREP', r'(?x) shop .* list'],
+        'food_tracking': [r'log.*(breakfast|lunch)', r'[|]ate.*food']
+    }
+    matcher = CompiledIntentMatcher(patterns)
+    texts = ["recipe please", "dish idea", "any dish", "find a meal", "how do i cook", "schedule",
+             "plan my week menu", "meal prep ideas", "shoplist", "log lunch", "log dinner",
+             "|ate some food", "ate food", "nothing here"]
+    for text in texts:
+        assert matcher.match(text).intent == reference_classify(patterns, text), text
+        assert matcher.match(text).match_counts == reference_counts(patterns, text), text
+    assert matcher.match("recipe please").intent == 'recipe_discovery'
+    print("✅ Same results as re.search for alternation, groups and flags")
+
+def test_single_pass_speed():
+    """The compiled matcher beats the per-pattern scan"""
+    classifier = IntentClassifier()
+    texts = utterances(5000, seed=2)
+
+    start = time.perf_counter()
+    for text in texts:
+        reference_counts(classifier.intent_patterns, text)
+    reference_us = (time.perf_counter() - start) / len(texts) * 1e6
+
+    start = time.perf_counter()
+    for text in texts:
+        classifier.match(text)
+    compiled_us = (time.perf_counter() - start) / len(texts) * 1e6
+
+    print(f"⏱️ full scan {reference_us:.1f}µs, compiled {compiled_us:.1f}µs per message")
+    assert compiled_us < reference_us
+
+if __name__ == "__main__":
+    test_matches_reference()
+    test_recompile_after_editing_patterns()
+    test_alternation_and_groups()
+    test_single_pass_speed()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test the indexed meal filters against the original list-scan behaviour"""
+
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from data.meal_index import MealIndex
+
+def reference_filter(meals, min_calories=0, max_calories=float('inf'), meal_type=None,
+                     meal_types=None, dietary_tags=None, max_prep_time=None):
+    """The list-scan filter DataLoader used before the index existed"""
+    meals = [meal for meal in meals
+             if min_calories <= meal.get('calories', 0) <= max_calories]
+    if meal_type:
+        meals = [meal for meal in meals
+                 if meal_type.lower() in [mt.lower() for mt in meal.get('meal_type', [])]]
+    if meal_types:
+        meal_types_lower = [mt.lower() for mt in meal_types]
+        meals = [meal for meal in meals
+                 if any(mt.lower() in meal_types_lower for mt in meal.get('meal_type', []))]
+    if dietary_tags:
+        dietary_tags_lower = [tag.lower() for tag in dietary_tags]
+        meals = [meal for meal in meals
+                 if all(tag in [t.lower() for t in meal.get('dietary_tags', [])]
+                        for tag in dietary_tags_lower)]
+    if max_prep_time:
+        meals = [meal for meal in meals
+                 if meal.get('prep_time', float('inf')) <= max_prep_time]
+    return meals
+
+def make_catalog(size, seed=7):
+    """Build a synthetic meal catalog with a few irregular records"""
+    rng = random.Random(seed)
+    types = ['breakfast', 'Lunch', 'dinner', 'snack']
+    tags = ['vegetarian', 'Vegan', 'gluten_free', 'high_protein', 'dairy_free', 'keto_friendly']
+    meals = []
+    for i in range(size):
+        meal = {
+            'id': f'meal_{i}',
+            'calories': rng.randint(80, 900),
+            'meal_type': rng.sample(types, rng.randint(1, 2)),
+            'dietary_tags': rng.sample(tags, rng.randint(0, 3)),
+            'prep_time': rng.choice([5, 10, 15, 20, 30, 45, 60])
+        }
+        if i % 97 == 0:
+            del meal['prep_time']
+        if i % 89 == 0:
+            del meal['calories']
+        meals.append(meal)
+    return meals
+
+QUERIES = [
+    {},
+    {'min_calories': 200, 'max_calories': 400},
+    {'meal_type': 'lunch', 'min_calories': 300, 'max_calories': 500},
+    {'meal_types': ['Breakfast', 'snack']},
+    {'dietary_tags': ['vegan', 'GLUTEN_FREE']},
+    {'meal_type': 'dinner', 'dietary_tags': ['vegetarian'], 'max_prep_time': 30},
+    {'max_prep_time': 15, 'min_calories': 0, 'max_calories': 250},
+    {'meal_type': 'brunch'},
+    {'min_calories': 1000, 'max_calories': 2000},
+]
+
+def test_index_matches_reference_on_synthetic_catalog():
+    """Indexed filter returns the same meals in the same order"""
+    print("🧪 Meal Index - Equivalence")
+    print("=" * 40)
+    meals = make_catalog(3000)
+    index = MealIndex(meals)
+    for query in QUERIES:
+        expected = reference_filter(meals, **query)
+        actual = index.filter(**{'min_calories': 0, **query})
+        assert [m['id'] for m in actual] == [m['id'] for m in expected], query
+        print(f"  ✅ {query} → {len(actual)} meals")
+
+def test_data_loader_filters_match_reference():
+    """DataLoader's public filters keep their results on the real catalog"""
+    loader = DataLoader()
+    meals = loader.get_meals()
+    for query in QUERIES:
+        expected = reference_filter(meals, **query)
+        assert loader.filter_meals_by_multiple_criteria(**query) == expected, query
+
+    assert loader.filter_meals_by_calories(200, 400) == reference_filter(meals, 200, 400)
+    assert loader.filter_meals_by_type(['lunch', 'Snack']) == reference_filter(
+        meals, float('-inf'), meal_types=['lunch', 'Snack'])
+    assert loader.filter_meals_by_dietary_tags(['vegetarian']) == reference_filter(
+        meals, float('-inf'), dietary_tags=['vegetarian'])
+    print("✅ DataLoader filters unchanged")
+
+def test_large_catalog_plan_queries():
+    """A month of slot queries over 100k meals stays quick"""
+    index = MealIndex(make_catalog(100000))
+    start = time.perf_counter()
+    for day in range(30):
+        for meal_type, target in [('breakfast', 360), ('lunch', 630), ('dinner', 630), ('snack', 180)]:
+            index.filter(min_calories=target - 100, max_calories=target + 100, meal_type=meal_type,
+                         dietary_tags=['vegetarian'], max_prep_time=30)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"⏱️ 120 slot queries over 100k meals: {elapsed_ms:.1f}ms")
+
+if __name__ == "__main__":
+    test_index_matches_reference_on_synthetic_catalog()
+    test_data_loader_filters_match_reference()
+    test_large_catalog_plan_queries()
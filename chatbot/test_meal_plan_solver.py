@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Test the whole-plan meal plan solver"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from core.session_manager import SessionManager
+from journeys.meal_planning import MealPlanningJourney
+import random
+from utils.meal_plan_solver import CandidatePool, MealPlanSolver
+from test_nutrition_matrix import synthetic_meals
+
+TARGETS = {'breakfast': 360, 'lunch': 630, 'dinner': 630, 'snack': 180}
+
+def test_hard_constraints():
+    """Every slot gets a meal of its type with all tags and within the prep cap"""
+    print("🧪 Meal Plan Solver - Constraints")
+    print("=" * 40)
+    meals = DataLoader().get_meals()
+    solver = MealPlanSolver(meals, {'breakfast': 300, 'lunch': 525, 'dinner': 525},
+                            dietary_tags=['vegetarian'], max_prep_time=30)
+    result = solver.solve(7, time_budget_ms=100, seed=3)
+
+    assert list(result.plan) == [f"Day {day}" for day in range(1, 8)]
+    for day_plan in result.plan.values():
+        assert list(day_plan) == ['breakfast', 'lunch', 'dinner']
+        for meal_type, meal in day_plan.items():
+            assert meal_type in meal['meal_type']
+            assert 'vegetarian' in meal['dietary_tags']
+            assert meal['prep_time'] <= 30
+    diagnostics = result.diagnostics
+    assert diagnostics['objective'] <= diagnostics['initial_objective']
+    assert diagnostics['unfilled_slots'] == [] and diagnostics['relaxed'] == {}
+    assert abs(result.objective - diagnostics['objective']) < 1e-3
+    print(f"✅ 7-day vegetarian plan, objective {diagnostics['initial_objective']} -> {diagnostics['objective']}")
+
+def test_relaxation_and_placeholders():
+    """Prep time is relaxed per meal type; a type without meals gets placeholders"""
+    print("🧪 Meal Plan Solver - Relaxation")
+    print("=" * 40)
+    meals = DataLoader().get_meals()
+    solver = MealPlanSolver(meals, {'breakfast': 300, 'brunch': 400}, max_prep_time=1)
+    result = solver.solve(2, max_iterations=200, seed=1)
+    assert result.diagnostics['relaxed'] == {'breakfast': ['max_prep_time']}
+    assert result.diagnostics['unfilled_slots'] == ['brunch']
+    assert result.plan['Day 2']['brunch']['id'] == 'placeholder_brunch_2'
+    assert 'breakfast' in result.plan['Day 1']['breakfast']['meal_type']
+    print("✅ Relaxed prep time for breakfast, placeholders for brunch")
+
+def test_variety_and_determinism():
+    """Repeats are spread out, and a seed with an iteration cap is reproducible"""
+    print("🧪 Meal Plan Solver - Variety")
+    print("=" * 40)
+    meals = synthetic_meals(400)
+    solver = MealPlanSolver(meals, TARGETS, dietary_tags=['vegetarian'])
+    first = solver.solve(14, max_iterations=3000, seed=7)
+    second = solver.solve(14, max_iterations=3000, seed=7)
+    assert first.plan == second.plan and first.diagnostics['iterations'] == 3000
+    assert first.diagnostics['stopped'] == 'max_iterations'
+    assert first.diagnostics['close_repeats'] == 0
+    assert first.diagnostics['max_calorie_deviation_pct'] < 10
+    print(f"✅ {first.diagnostics['unique_meals']} distinct meals, "
+          f"worst day {first.diagnostics['max_calorie_deviation_pct']}% off target")
+
+def test_candidate_pools():
+    """Pools are sorted once; construction pops the best meal outside the variety window"""
+    print("🧪 Meal Plan Solver - Candidate Pools")
+    print("=" * 40)
+    pool = CandidatePool([0, 1, 2], {0: 0.5, 1: 0.1, 2: 0.3}, variety_window=2, repeat_weight=0.3)
+    assert pool.numbers == [1, 2, 0] and len(pool) == 3
+    heap = pool.heap(random.Random(0))
+    occurrences = {}
+    picks = []
+    for day in range(4):
+        number = pool.take(heap, day, occurrences)
+        occurrences.setdefault(number, []).append(day)
+        picks.append(number)
+    assert picks == [1, 2, 1, 0], picks  # Meal 1 waits a day; a second serving of 2 costs more than 0
+    print("✅ Best match first, skipped while inside the window")
+
+    single = CandidatePool([5], {5: 0.0}, variety_window=3, repeat_weight=0.3)
+    heap = single.heap(random.Random(0))
+    assert [single.take(heap, day, {5: [0]} if day else {}) for day in range(2)] == [5, 5]
+    print("✅ A pool smaller than the window still fills every day")
+
+    meals = synthetic_meals(5000)
+    solver = MealPlanSolver(meals, TARGETS)
+    start = time.perf_counter()
+    assignment = solver._initial_assignment(30, random.Random(1))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert all(None not in slots for slots in assignment)
+    served = {}
+    for day, slots in enumerate(assignment):
+        for number in slots:
+            assert day - served.get(number, -solver.variety_window) >= solver.variety_window
+            served[number] = day
+    assert elapsed_ms < 50, elapsed_ms
+    print(f"✅ 30-day start plan over {len(meals)} meals in {elapsed_ms:.1f}ms, no close repeats")
+
+def test_time_budget():
+    """A 28-day plan over a large catalog comes back within the budget"""
+    print("🧪 Meal Plan Solver - Time Budget")
+    print("=" * 40)
+    meals = synthetic_meals(2000)
+    solver = MealPlanSolver(meals, TARGETS, max_prep_time=45)
+    start = time.perf_counter()
+    result = solver.solve(28, time_budget_ms=150, seed=2)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert elapsed_ms < 150 + 100, elapsed_ms
+    assert result.diagnostics['stopped'] in ('time_budget', 'converged')
+    assert result.objective <= result.diagnostics['initial_objective']
+    print(f"✅ {result.diagnostics['iterations']} moves in {elapsed_ms:.0f}ms")
+
+def test_regenerate_day_and_slot():
+    """Regenerating one day or one meal keeps every other slot and the variety rules"""
+    print("🧪 Meal Plan Solver - Regenerate")
+    print("=" * 40)
+    meals = synthetic_meals(400)
+    solver = MealPlanSolver(meals, TARGETS, dietary_tags=['vegetarian'])
+    plan = solver.solve(7, max_iterations=2000, seed=4).plan
+
+    result = solver.regenerate(plan, 3, seed=5, max_iterations=1000)
+    for day_name, day_plan in result.plan.items():
+        for meal_type, meal in day_plan.items():
+            if day_name == 'Day 3':
+                assert meal is not plan[day_name][meal_type]
+            else:
+                assert meal is plan[day_name][meal_type]
+    assert result.diagnostics['close_repeats'] == 0
+    print("✅ Day 3 is new, the other six days are untouched")
+
+    result = solver.regenerate(plan, 5, 'dinner', seed=5, max_iterations=500)
+    changed = [(day_name, meal_type) for day_name, day_plan in result.plan.items()
+               for meal_type, meal in day_plan.items() if meal is not plan[day_name][meal_type]]
+    assert changed == [('Day 5', 'dinner')]
+    assert 'dinner' in result.plan['Day 5']['dinner']['meal_type']
+    print("✅ Only dinner on day 5 changed")
+
+    for bad in ((8, None), (1, 'brunch')):
+        try:
+            solver.regenerate(plan, *bad)
+            assert False, f"Expected ValueError for {bad}"
+        except ValueError:
+            pass
+    print("✅ Unknown days and meal types are rejected")
+
+def test_journey_uses_solver():
+    """MealPlanningJourney plans through the solver and keeps its diagnostics"""
+    print("🧪 Meal Plan Solver - Journey")
+    print("=" * 40)
+    journey = MealPlanningJourney(DataLoader(), SessionManager())
+    journey.planning_duration = 3
+    journey.meal_types = ['breakfast', 'lunch', 'dinner', 'snack']
+    journey.daily_calorie_target = 1800
+    journey.dietary_restrictions = []
+    journey.time_constraints = 60
+    journey.plan_time_budget_ms = 50
+
+    plan = journey._generate_meal_plan()
+    assert len(plan) == 3 and all(len(day) == 4 for day in plan.values())
+    assert not any(meal['id'].startswith('placeholder_') for day in plan.values() for meal in day.values())
+    assert journey.plan_diagnostics['daily_calorie_target'] == 1800
+    journey.meal_plan = plan
+    assert 'YOUR PERSONALIZED MEAL PLAN' in str(journey._display_meal_plan())
+    print("✅ Journey plan is complete and displayable")
+
+def test_streamed_plan_display():
+    """A 30-day plan renders as whole-day, Markdown-safe message chunks"""
+    print("🧪 Meal Plan Solver - Streamed Display")
+    print("=" * 40)
+    from core.outbound import MAX_MESSAGE_LENGTH, StreamedReply, is_valid_markdown
+    journey = MealPlanningJourney(DataLoader(), SessionManager())
+    journey.planning_duration = 30
+    journey.meal_types = ['breakfast', 'lunch', 'dinner', 'snack']
+    journey.daily_calorie_target = 2000
+    journey.dietary_restrictions = []
+    journey.time_constraints = None
+    journey.plan_time_budget_ms = 50
+    journey.meal_plan = journey._generate_meal_plan()
+
+    reply = journey._display_meal_plan()
+    assert isinstance(reply, StreamedReply) and journey.current_step == "plan_display"
+    first = next(iter(reply))
+    assert first.startswith('🎉') and '**DAY 1:**' in first and '**DAY 2:**' not in first
+    messages = list(reply.messages())
+    assert '\n'.join(messages) == str(reply)
+    assert len(messages) > 1 and all(len(message) <= MAX_MESSAGE_LENGTH for message in messages)
+    assert all(is_valid_markdown(message) for message in messages)
+    assert all(message.startswith('**DAY') for message in messages[1:-1])
+    assert messages[-1].rstrip().endswith('What would you like to do?')
+    print(f"✅ {len(messages)} messages, day 1 ready after the first block")
+
+if __name__ == "__main__":
+    test_hard_constraints()
+    test_relaxation_and_placeholders()
+    test_variety_and_determinism()
+    test_candidate_pools()
+    test_time_budget()
+    test_regenerate_day_and_slot()
+    test_journey_uses_solver()
+    test_streamed_plan_display()
+    print("\n🎉 All meal plan solver tests passed!")
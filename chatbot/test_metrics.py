@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Test the metrics registry and the /metrics endpoint"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.metrics import (Histogram, MetricsRegistry, MetricsServer, REGISTRY,
+                          JOURNEY_STEP_SECONDS)
+
+def test_metric_types():
+    """Counters, gauges and labeled histograms"""
+    print("🧪 Metrics - Types")
+    print("=" * 40)
+    registry = MetricsRegistry()
+
+    requests = registry.counter('test_requests_total', 'Requests', ('path',))
+    requests.inc(path='/a')
+    requests.inc(2, path='/a')
+    requests.inc(path='/b')
+    assert requests.value(path='/a') == 3 and requests.value(path='/b') == 1
+    try:
+        requests.inc(-1, path='/a')
+        assert False, "Counters must not decrease"
+    except ValueError:
+        pass
+    try:
+        requests.inc(route='/a')
+        assert False, "Unknown labels must be rejected"
+    except ValueError:
+        pass
+    print("✅ Counters add up per label and never decrease")
+
+    sessions = {'live': 5}
+    active = registry.gauge('test_active', 'Active things')
+    active.set(3)
+    active.dec()
+    assert active.value() == 2
+    active.set_function(lambda: sessions['live'])
+    sessions['live'] = 7
+    assert active.value() == 7
+    print("✅ Gauges can be set or read from a function at scrape time")
+
+    assert registry.counter('test_requests_total', 'Requests', ('path',)) is requests
+    try:
+        registry.gauge('test_requests_total', 'Requests', ('path',))
+        assert False, "A name cannot change type"
+    except ValueError:
+        pass
+    print("✅ Registering a name again returns the same metric")
+
+    latency = registry.histogram('test_step_seconds', 'Step time', ('journey', 'step'), buckets=(0.1, 1.0))
+    latency.observe(0.05, journey='A', step='handle_step_1')
+    latency.observe(0.5, journey='A', step='handle_step_1')
+    latency.observe(5, journey='B', step='start_journey')
+    with latency.time(journey='B', step='start_journey'):
+        pass
+    assert latency.labels(journey='A', step='handle_step_1').count == 2
+    assert latency.labels(journey='B', step='start_journey').count == 2
+    shared = Histogram((0.1, 1.0))
+    registry.histogram('test_send_seconds', 'Send time').attach(shared)
+    shared.observe(0.2)
+    print("✅ Histograms per label combination, including attached ones")
+
+    text = registry.exposition()
+    lines = text.splitlines()
+    assert '# TYPE test_requests_total counter' in lines
+    assert 'test_requests_total{path="/a"} 3.0' in lines
+    assert 'test_active 7.0' in lines
+    assert 'test_step_seconds_bucket{journey="A",step="handle_step_1",le="0.1"} 1' in lines
+    assert 'test_step_seconds_bucket{journey="A",step="handle_step_1",le="+Inf"} 2' in lines
+    assert 'test_step_seconds_count{journey="B",step="start_journey"} 2' in lines
+    assert 'test_send_seconds_bucket{le="1.0"} 1' in lines
+    assert text.endswith('\n')
+
+    registry.counter('test_escape_total', 'Escaping', ('text',)).inc(text='say "hi"\\now')
+    assert 'test_escape_total{text="say \\"hi\\"\\\\now"} 1.0' in registry.exposition().splitlines()
+    print("✅ Text exposition format")
+
+def test_metrics_endpoint():
+    """GET /metrics serves the registry"""
+    print("🧪 Metrics - Endpoint")
+    print("=" * 40)
+    registry = MetricsRegistry()
+    registry.counter('test_hits_total', 'Hits').inc(4)
+
+    async def get(server, path):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        head, _, body = raw.partition(b'\r\n\r\n')
+        return int(head.split()[1]), head.decode(), body.decode()
+
+    async def scenario():
+        server = MetricsServer(registry, host='127.0.0.1', port=0)
+        await server.start()
+        try:
+            status, head, body = await get(server, '/metrics')
+            assert status == 200 and 'text/plain; version=0.0.4' in head
+            assert 'test_hits_total 4.0' in body.splitlines()
+            status, _, _ = await get(server, '/other')
+            assert status == 404
+            assert server.scrapes == 1
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+    print("✅ Scrapes return the exposition, other paths 404")
+
+def test_catalog_load_time():
+    """Loading a catalog folder is timed by source"""
+    print("🧪 Metrics - Catalog Load")
+    print("=" * 40)
+    from data.data_loader import get_data_dir
+    from data.data_registry import CATALOG_LOAD_SECONDS, DataRegistry
+
+    DataRegistry(use_snapshot=False).get_folder(get_data_dir())
+    assert CATALOG_LOAD_SECONDS.value(source='json') > 0
+    assert 'chatbot_catalog_load_seconds{source="json"}' in REGISTRY.exposition()
+    assert JOURNEY_STEP_SECONDS.name in REGISTRY.exposition()
+    print(f"✅ Catalog parsed in {CATALOG_LOAD_SECONDS.value(source='json') * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    test_metric_types()
+    test_metrics_endpoint()
+    test_catalog_load_time()
+    print("\n🎉 All metrics tests passed!")
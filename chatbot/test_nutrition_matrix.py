@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Test the nutrition matrix behind meal scoring and ranking"""
+
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from data.nutrition_matrix import NutritionMatrix, np
+
+MODES = [False, True] if np is not None else [False]
+
+def reference_calorie_search(meals, calorie_range, calorie_target, meal_types, dietary_tags):
+    """The SimpleCalorieMeals scan and _calculate_meal_score before the matrix"""
+    matching = []
+    for meal in meals:
+        if not (calorie_range[0] <= meal['calories'] <= calorie_range[1]):
+            continue
+        if meal_types is not None and not any(mt in meal.get('meal_type', []) for mt in meal_types):
+            continue
+        meal_tags = meal.get('dietary_tags', [])
+        if not all(pref in meal_tags for pref in dietary_tags):
+            continue
+        score = max(0, 100 - abs(meal['calories'] - calorie_target))
+        score += max(0, 50 - meal.get('prep_time', 30))
+        score += len([tag for tag in dietary_tags if tag in meal_tags]) * 10
+        nutrition = meal.get('nutrition', {})
+        if nutrition.get('protein', 0) >= 20:
+            score += 15
+        if nutrition.get('fiber', 0) >= 8:
+            score += 10
+        matching.append((meal, score))
+    matching.sort(key=lambda x: x[1], reverse=True)
+    return matching[:5]
+
+def reference_optimal_meal(meals, target_calories, used_meals):
+    """MealPlanningJourney._select_optimal_meal before the matrix"""
+    scored = []
+    for meal in meals:
+        score = max(0, 100 - (abs(meal['calories'] - target_calories) / 75 * 100)) * 0.6
+        score += (100 if meal['id'] not in used_meals else 20) * 0.4
+        scored.append((meal, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[0][0]
+
+def reference_similar_meals(meals, reference_meal, limit):
+    """DataLoader.find_similar_meals before the matrix"""
+    similar = []
+    for meal in meals:
+        if meal.get('id') == reference_meal.get('id'):
+            continue
+        diff = abs(meal.get('calories', 0) - reference_meal.get('calories', 0))
+        score = 3 if diff <= 50 else 2 if diff <= 100 else 1 if diff <= 150 else 0
+        score += len(set(reference_meal.get('dietary_tags', [])) & set(meal.get('dietary_tags', [])))
+        score += len(set(reference_meal.get('meal_type', [])) & set(meal.get('meal_type', []))) * 2
+        if score > 0:
+            similar.append((meal, score))
+    similar.sort(key=lambda x: x[1], reverse=True)
+    return [meal for meal, score in similar[:limit]]
+
+def synthetic_meals(count, seed=11):
+    """Meals with coarse values so scores tie often"""
+    rng = random.Random(seed)
+    tags = ['vegan', 'vegetarian', 'gluten_free', 'dairy_free', 'high_protein', 'low_carb'] + \
+           [f'tag_{i}' for i in range(70)]  # More tags than one bitmask word
+    types = ['breakfast', 'lunch', 'dinner', 'snack']
+    return [{'id': f'meal_{i}', 'name': f'Meal {i}', 'calories': rng.randrange(100, 900, 25),
+             'meal_type': rng.sample(types, rng.randint(1, 2)), 'prep_time': rng.randrange(5, 60, 5),
+             'nutrition': {'protein': rng.randint(5, 40), 'carbs': rng.randint(5, 90),
+                           'fat': rng.randint(2, 40), 'fiber': rng.randint(0, 12)},
+             'dietary_tags': rng.sample(tags[:6], 2) + rng.sample(tags[6:], 1)}
+            for i in range(count)]
+
+def test_matrix_matches_reference():
+    """Both matrix paths rank exactly like the loops they replace"""
+    print("🧪 Nutrition Matrix - Equivalence")
+    print("=" * 40)
+    catalogs = [DataLoader().get_meals(), synthetic_meals(3000)]
+    searches = [((300, 500), 400, ['lunch'], []),
+                ((200, 700), 450, ['breakfast', 'snack'], ['vegan']),
+                ((100, 900), 500, None, ['tag_65']),
+                ((100, 900), 500, None, ['no_such_tag']),
+                ((0, 2000), 600, [], [])]
+
+    for use_numpy in MODES:
+        for meals in catalogs:
+            matrix = NutritionMatrix(meals, use_numpy=use_numpy)
+            for calorie_range, target, meal_types, tags in searches:
+                expected = reference_calorie_search(meals, calorie_range, target, meal_types, tags)
+                assert matrix.calorie_search(calorie_range, target, meal_types, tags) == expected
+
+            rng = random.Random(1)
+            for _ in range(20):
+                subset = rng.sample(meals, min(len(meals), 40))
+                used = {meal['id'] for meal in rng.sample(subset, 5)}
+                target = rng.randrange(200, 800)
+                expected = reference_optimal_meal(subset, target, used)
+                assert matrix.closest_calorie_meal(matrix.positions_of(subset), target, used) is expected
+
+            for reference in meals[:15]:
+                assert matrix.similar_meals(reference, 5) == reference_similar_meals(meals, reference, 5)
+        print(f"  ✅ {'numpy' if use_numpy else 'pure Python'} path matches")
+
+def test_journey_hooks():
+    """DataLoader and meal planning go through the shared matrix"""
+    loader = DataLoader()
+    meals = loader.get_meals()
+    assert loader.get_nutrition_matrix() is loader.get_nutrition_matrix()
+    assert loader.find_similar_meals(meals[0], 3) == reference_similar_meals(meals, meals[0], 3)
+
+    # Meals from outside the catalog are not mapped to matrix rows
+    outside = [dict(meals[0])]
+    assert loader.get_nutrition_matrix().positions_of(outside) is None
+    print("✅ Shared matrix wired into DataLoader")
+
+def test_large_catalog_scoring():
+    """Scoring a 200k-meal catalog stays interactive"""
+    meals = synthetic_meals(200000, seed=4)
+    for use_numpy in MODES:
+        matrix = NutritionMatrix(meals, use_numpy=use_numpy)
+        start = time.perf_counter()
+        results = matrix.calorie_search((300, 600), 450, ['lunch', 'dinner'], ['vegan'])
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"⏱️ {'numpy' if use_numpy else 'pure Python'}: {elapsed:.1f}ms for top {len(results)}")
+        assert len(results) == 5
+
+if __name__ == "__main__":
+    test_matrix_matches_reference()
+    test_journey_hooks()
+    test_large_catalog_scoring()
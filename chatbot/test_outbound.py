@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Test the outbound send queue"""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.metrics import Histogram
+from core.outbound import (OutboundQueue, SendError, StreamedReply, escape_markdown, is_valid_markdown,
+                           pack_messages, split_message)
+
+class FakeBotApi:
+    """Records sendMessage calls; failures[i] is raised on the i-th call"""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = dict(failures or {})
+
+    async def send(self, chat_id, text, parse_mode=None, **options):
+        number = len(self.calls)
+        self.calls.append((time.perf_counter(), chat_id, text, parse_mode, options))
+        if number in self.failures:
+            raise self.failures[number]
+
+def test_markdown_and_splitting():
+    """Markdown validation and line-aware splitting"""
+    print("🧪 Outbound Queue - Markdown and Splitting")
+    print("=" * 40)
+    assert is_valid_markdown("🥗 **Step 1** pick a _meal_ or `code` [link](http://x.y)")
+    assert is_valid_markdown("```\nraw_text * here\n``` and \\_escaped")
+    assert is_valid_markdown("*bold with_underscore*")
+    assert not is_valid_markdown("• **keto_friendly** - low carb")
+    assert not is_valid_markdown("unclosed *bold")
+    assert not is_valid_markdown("[broken link")
+
+    text = '\n'.join(f"line {n:04d} " + 'x' * 90 for n in range(100))
+    chunks = split_message(text, 1000)
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert '\n'.join(chunks) == text
+    assert split_message('y' * 2500, 1000) == ['y' * 1000, 'y' * 1000, 'y' * 500]
+    assert split_message('') == ['']
+    print(f"✅ Validator and splitter work ({len(chunks)} chunks)")
+
+def test_coalescing_and_order():
+    """Queued chunks for a chat merge; chats keep their own order"""
+    print("\n🧪 Outbound Queue - Coalescing")
+    print("=" * 40)
+
+    async def scenario():
+        api = FakeBotApi()
+        outbox = OutboundQueue(api.send, per_chat_rate=100, global_rate=1000)
+        results = [outbox.submit(1, f"part {n}", 'Markdown') for n in range(3)]
+        results.append(outbox.submit(1, "menu", 'Markdown', reply_markup='kb'))  # Options: sent alone
+        results.append(outbox.submit(1, "bad *markdown", 'Markdown'))  # Plain: not merged with Markdown
+        results.append(outbox.submit(2, "other chat"))
+        assert await asyncio.gather(*results) == [True] * 6
+        await outbox.close()
+        return api, outbox.get_stats()
+
+    api, stats = asyncio.run(scenario())
+    sent = [(chat, text, mode, options) for _, chat, text, mode, options in api.calls]
+    chat_1 = [call for call in sent if call[0] == 1]
+    assert chat_1 == [(1, "part 0\npart 1\npart 2", 'Markdown', {}),
+                      (1, "menu", 'Markdown', {'reply_markup': 'kb'}),
+                      (1, "bad *markdown", None, {})]
+    assert (2, "other chat", None, {}) in sent
+    assert stats['coalesced'] == 2 and stats['markdown_fallbacks'] == 1 and stats['sent'] == 4
+    print(f"✅ 6 submits became 4 sends: {stats['sent']} sent, {stats['coalesced']} coalesced")
+
+def render_days(days, rendered):
+    """Stand-in plan renderer: one Markdown block per day, counting what was rendered"""
+    for day in range(1, days + 1):
+        rendered.append(day)
+        yield f"**DAY {day}:**\n" + ''.join(f"🍽️ **Meal {n}**: {escape_markdown('keto_friendly bowl')}\n"
+                                            for n in range(8))
+
+def test_streamed_replies():
+    """Blocks are packed whole, and streamed sends start before rendering ends"""
+    print("\n🧪 Outbound Queue - Streamed Replies")
+    print("=" * 40)
+    assert escape_markdown("a_b *c* `d` [e]") == "a\\_b \\*c\\* \\`d\\` \\[e]"
+    assert list(pack_messages(['aaa', 'bb', 'c' * 7, 'dd'], 6)) == ['aaa\nbb', 'cccccc', 'c\ndd']
+    assert list(pack_messages([])) == []
+
+    reply = StreamedReply(render_days, 30, [])
+    messages = list(reply.messages(1000))
+    assert '\n'.join(messages) == str(reply)
+    assert all(len(message) <= 1000 and message.startswith('**DAY') for message in messages)
+    assert all(is_valid_markdown(message) for message in messages)
+    print(f"✅ 30 day blocks packed into {len(messages)} Markdown-safe messages")
+
+    async def scenario():
+        rendered = []
+        calls = []
+
+        async def send(chat_id, text, parse_mode=None, **options):
+            calls.append((len(rendered), text, parse_mode, options))
+            await asyncio.sleep(0.01)  # The first message is in flight while the rest renders
+
+        outbox = OutboundQueue(send, per_chat_rate=1000, per_chat_burst=1000, global_rate=1000)
+        done = await outbox.submit_stream(5, StreamedReply(render_days, 30, rendered), 'Markdown',
+                                          reply_markup='kb')
+        assert await done
+        assert await (await outbox.submit_stream(6, iter(())))
+        return calls, outbox.get_stats()
+
+    calls, stats = asyncio.run(scenario())
+    assert calls[0][0] < 30, "The first part went out before the plan was fully rendered"
+    assert calls[0][1].startswith('**DAY 1:**')
+    assert '\n'.join(text for _, text, _, _ in calls) == str(StreamedReply(render_days, 30, []))
+    assert all(mode == 'Markdown' for _, _, mode, _ in calls)
+    assert [options for _, _, _, options in calls] == [{}] * (len(calls) - 1) + [{'reply_markup': 'kb'}]
+    assert len(calls) < 30 and stats['coalesced'] == 30 - len(calls)
+    print(f"✅ First part sent after {calls[0][0]} of 30 days, {len(calls)} sends in total")
+
+def test_rate_limits():
+    """Per-chat and global token buckets space out sends"""
+    print("\n🧪 Outbound Queue - Rate Limits")
+    print("=" * 40)
+
+    async def scenario():
+        api = FakeBotApi()
+        outbox = OutboundQueue(api.send, per_chat_rate=20, per_chat_burst=1, global_rate=1000, global_burst=1)
+        start = time.perf_counter()
+        await asyncio.gather(*(outbox.submit(1, f"m{n}", reply_markup=n) for n in range(5)))
+        per_chat = time.perf_counter() - start
+
+        outbox = OutboundQueue(api.send, per_chat_rate=1000, global_rate=50, global_burst=1)
+        start = time.perf_counter()
+        await asyncio.gather(*(outbox.submit(chat, "hi") for chat in range(10, 20)))
+        overall = time.perf_counter() - start
+        return per_chat, overall, api
+
+    per_chat, overall, api = asyncio.run(scenario())
+    assert per_chat >= 4 / 20 * 0.9, per_chat
+    assert overall >= 9 / 50 * 0.9, overall
+    assert [text for _, chat, text, _, _ in api.calls if chat == 1] == [f"m{n}" for n in range(5)]
+    print(f"✅ 5 sends to one chat took {per_chat*1000:.0f} ms, 10 chats under the global limit {overall*1000:.0f} ms")
+
+def test_retries_and_failures():
+    """429 and 5xx are retried, parse errors resent plain, 403 fails"""
+    print("\n🧪 Outbound Queue - Retries")
+    print("=" * 40)
+
+    async def scenario():
+        api = FakeBotApi({
+            0: SendError(429, 'Too Many Requests', retry_after=0.05),
+            2: SendError(502, 'Bad Gateway'),
+            3: SendError(502, 'Bad Gateway'),
+            5: SendError(400, "Bad Request: can't parse entities"),
+            7: SendError(403, 'Forbidden: bot was blocked by the user'),
+        })
+        outbox = OutboundQueue(api.send, per_chat_rate=1000, global_rate=1000, base_backoff=0.01)
+        first = await outbox.submit(1, "flooded")
+        second = await outbox.submit(1, "flaky")
+        third = await outbox.submit(1, "*looks valid*", 'Markdown')
+        blocked = await outbox.submit(1, "blocked")
+        return api, outbox, (first, second, third, blocked)
+
+    api, outbox, results = asyncio.run(scenario())
+    assert results == (True, True, True, False)
+    assert api.calls[1][0] - api.calls[0][0] >= 0.045  # Waited retry_after
+    assert [call[3] for call in api.calls[5:7]] == ['Markdown', None]
+    stats = outbox.get_stats()
+    assert (stats['sent'], stats['failed'], stats['retries']) == (3, 1, 3)
+    assert stats['send_latency']['count'] == 3 and stats['latency']['count'] == 4
+    print(f"✅ Retried and delivered: {stats}")
+
+def test_histogram():
+    """Percentiles are interpolated inside buckets"""
+    print("\n🧪 Outbound Queue - Latency Histogram")
+    print("=" * 40)
+    histogram = Histogram(buckets=(0.1, 0.2, 0.4))
+    assert histogram.summary()['p50_ms'] is None
+    for value in (0.05,) * 50 + (0.15,) * 40 + (0.3,) * 9 + (1.0,):
+        histogram.observe(value)
+    assert histogram.cumulative_counts() == [50, 90, 99, 100]
+    assert abs(histogram.percentile(0.5) - 0.1) < 1e-9
+    assert abs(histogram.percentile(0.7) - 0.15) < 1e-9
+    assert histogram.percentile(0.999) == 0.4
+    print(f"✅ {histogram.summary()}")
+
+if __name__ == "__main__":
+    test_markdown_and_splitting()
+    test_coalescing_and_order()
+    test_streamed_replies()
+    test_rate_limits()
+    test_retries_and_failures()
+    test_histogram()
+    print("\n🎉 All outbound queue tests passed!")
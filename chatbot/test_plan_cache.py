@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Test the meal plan cache and incremental regeneration in the meal planning journey"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from core.session_manager import SessionManager
+from journeys.meal_planning import MealPlanningJourney
+from utils.meal_plan_solver import MealPlanSolver
+from utils.plan_cache import PlanCache, get_plan_cache, plan_fingerprint
+
+def make_journey():
+    journey = MealPlanningJourney(DataLoader(), SessionManager())
+    journey.planning_duration = 5
+    journey.meal_types = ['breakfast', 'lunch', 'dinner']
+    journey.daily_calorie_target = 1700
+    journey.dietary_restrictions = []
+    journey.time_constraints = 45
+    journey.plan_time_budget_ms = 30
+    return journey
+
+def test_fingerprint_and_cache():
+    """Fingerprints follow the preferences; the cache is a bounded LRU of copies"""
+    print("🧪 Plan Cache - Fingerprint")
+    print("=" * 40)
+    distribution = {'breakfast': 0.2, 'lunch': 0.35, 'dinner': 0.35, 'snack': 0.1}
+    args = (7, ['breakfast', 'lunch'], 1800, distribution, ['vegan', 'gluten_free'], 30, 'v1')
+    key = plan_fingerprint(*args)
+    assert key == plan_fingerprint(7, ['breakfast', 'lunch'], 1800, dict(distribution, snack=0.5),
+                                   ['gluten_free', 'vegan'], 30, 'v1')
+    for changed in ((8,), (7, ['lunch', 'breakfast']), (7, ['breakfast', 'lunch'], 1900)):
+        assert plan_fingerprint(*changed, *args[len(changed):]) != key
+    assert plan_fingerprint(*args[:-1], 'v2') != key
+    print("✅ Same preferences share a key; any change, or a new catalog, does not")
+
+    meals = DataLoader().get_meals()
+    solver = MealPlanSolver(meals, {'breakfast': 350, 'lunch': 600})
+    result = solver.solve(2, max_iterations=100, seed=1)
+    cache = PlanCache(max_size=2)
+    assert cache.get('a') is None
+    cache.put('a', solver, result)
+    cached = cache.get('a')
+    assert cached.solver is solver and cached.result.plan == result.plan
+    cached.result.plan['Day 1']['breakfast'] = None
+    assert cache.get('a').result.plan['Day 1']['breakfast'] is result.plan['Day 1']['breakfast']
+    cache.put('b', solver, result)
+    cache.put('c', solver, result)
+    assert cache.get('a') is None and len(cache) == 2
+    assert cache.get_stats()['hits'] == 2 and cache.get_stats()['misses'] == 2
+    print("✅ Copies in and out, least recently used plan evicted")
+
+def test_journey_cache_and_regeneration():
+    """Generating reuses the cached plan; plan-display actions regenerate days and meals"""
+    print("🧪 Plan Cache - Journey")
+    print("=" * 40)
+    get_plan_cache().clear()
+    journey = make_journey()
+    journey.current_step = "generate_plan"
+    first = journey.process_user_input('yes')
+    assert 'YOUR PERSONALIZED MEAL PLAN' in str(first) and journey.current_step == "plan_display"
+    plan = journey.meal_plan
+
+    other = make_journey()
+    assert other._generate_meal_plan() == plan
+    assert other.plan_solver is journey.plan_solver
+    print("✅ Same preferences are served from the cache")
+
+    other.time_constraints = 30
+    assert other._plan_fingerprint() != journey._plan_fingerprint()
+    quicker = other._generate_meal_plan()
+    assert other.plan_diagnostics['relaxed'] == {}
+    assert all(meal['prep_time'] <= 30 for day in quicker.values() for meal in day.values())
+    print("✅ Changing a preference plans again")
+
+    reply = str(journey.process_user_input('regenerate day 2'))
+    assert reply.startswith("🔄 **Here's a new version of day 2:**")
+    for day_name in plan:
+        unchanged = journey.meal_plan[day_name] == plan[day_name]
+        assert unchanged == (day_name != 'Day 2'), day_name
+    assert get_plan_cache().get(journey._plan_fingerprint()).result.plan == journey.meal_plan
+    print("✅ Day 2 regenerated, the rest kept, and the cache follows")
+
+    before = journey.meal_plan
+    reply = str(journey.process_user_input('Change dinner on day 4'))
+    assert "new version of dinner on day 4" in reply
+    assert journey.meal_plan['Day 4']['dinner'] != before['Day 4']['dinner']
+    assert all(journey.meal_plan[day_name] == before[day_name] for day_name in before if day_name != 'Day 4')
+    assert journey.meal_plan['Day 4']['lunch'] == before['Day 4']['lunch']
+    print("✅ One meal regenerated")
+
+    assert 'days 1 to 5' in journey.process_user_input('regenerate day 9')
+    reply = str(journey.process_user_input('2'))
+    assert reply.startswith("🔄 **Here's a new meal plan for you:**")
+    assert journey.current_step == "plan_display"
+    print("✅ Out-of-range days are refused; '2' still regenerates everything")
+
+if __name__ == "__main__":
+    test_fingerprint_and_cache()
+    test_journey_cache_and_regeneration()
+    print("\n🎉 All plan cache tests passed!")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test the inverted ingredient index behind filter_recipes_by_ingredients"""
+
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader
+from data.recipe_index import RecipeIngredientIndex
+
+def reference_coverage(recipes, available_ingredients):
+    """The substring scan DataLoader used before the index existed"""
+    available_lower = [ing.lower() for ing in available_ingredients]
+    results = {}
+    for pos, recipe in enumerate(recipes):
+        recipe_ingredients = [ing.get('name', '').lower() for ing in recipe.get('ingredients', [])]
+        matching = sum(1 for ing in recipe_ingredients
+                       if any(avail in ing for avail in available_lower))
+        if recipe_ingredients and matching / len(recipe_ingredients) >= 0.7:
+            results[pos] = matching / len(recipe_ingredients)
+    return results
+
+QUERIES = [
+    ['chicken', 'quinoa', 'cucumber', 'tomato', 'onion', 'olive oil', 'lemon', 'yogurt'],
+    ['Egg', 'SPINACH', 'cheese', 'salt', 'pepper', 'butter'],
+    ['ve oil', 'garlic', 'rice', 'soy sauce', 'ginger', 'broccoli'],
+    ['oil'],
+    ['live', 'extra virgin olive oil', 'ed bell pepp', 'ppe'],
+    [''],
+    [],
+]
+
+def test_index_matches_reference():
+    """Same recipes and coverages as the substring scan, ranked by coverage"""
+    print("🧪 Recipe Ingredient Index - Equivalence")
+    print("=" * 40)
+    recipes = DataLoader().get_recipes()
+    index = RecipeIngredientIndex(recipes)
+
+    for query in QUERIES:
+        expected = reference_coverage(recipes, query)
+        ranked = index.rank(query)
+        actual = {recipes.index(recipe): coverage for recipe, coverage in ranked}
+        assert actual == expected, query
+
+        coverages = [coverage for recipe, coverage in ranked]
+        assert coverages == sorted(coverages, reverse=True)
+        print(f"  ✅ {query} → {len(ranked)} recipes")
+
+def test_data_loader_uses_index():
+    """filter_recipes_by_ingredients returns the ranked recipes"""
+    loader = DataLoader()
+    query = QUERIES[0]
+    ranked = loader.rank_recipes_by_ingredients(query)
+    assert loader.filter_recipes_by_ingredients(query) == [recipe for recipe, coverage in ranked]
+    assert len(loader.rank_recipes_by_ingredients(query, min_coverage=0.0)) >= len(ranked)
+    print("✅ DataLoader routes through the index")
+
+def test_large_catalog_lookup():
+    """Lookups over a 250k-recipe catalog stay interactive"""
+    rng = random.Random(3)
+    pantry = ['chicken breast', 'brown rice', 'olive oil', 'garlic', 'red onion', 'cherry tomatoes',
+              'spinach', 'eggs', 'feta cheese', 'lemon', 'black beans', 'bell pepper', 'tofu',
+              'soy sauce', 'ginger', 'basil', 'pasta', 'greek yogurt', 'salmon fillet', 'quinoa']
+    extras = [f'spice blend {i}' for i in range(2000)]
+    recipes = [{'ingredients': [{'name': name} for name in rng.sample(pantry, 5) + rng.sample(extras, 1)]}
+               for _ in range(250000)]
+
+    start = time.perf_counter()
+    index = RecipeIngredientIndex(recipes)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    ranked = index.rank(['chicken', 'rice', 'garlic', 'onion', 'tomato', 'spinach', 'egg'])
+    query_ms = (time.perf_counter() - start) * 1000
+    print(f"⏱️ build {build_ms:.0f}ms, query {query_ms:.1f}ms, {len(ranked)} matches")
+
+if __name__ == "__main__":
+    test_index_matches_reference()
+    test_data_loader_uses_index()
+    test_large_catalog_lookup()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Test the slotted record layer over the catalog"""
+
+import sys
+import os
+import copy
+import json
+import pickle
+import random
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_registry import DATA_FILES, DataRegistry
+from data.data_loader import DataLoader
+from data.nutrition_matrix import NutritionMatrix
+from data.records import Meal, Food, Recipe, CookingStep
+from utils.meal_plan_solver import meal_values
+from utils.nutrition_utils import NutritionCalculator
+
+def test_records_round_trip():
+    """The catalog holds records, and each record's dict view equals its source JSON"""
+    print("🧪 Catalog Records - Dict View")
+    print("=" * 40)
+    loader = DataLoader(registry=DataRegistry(use_snapshot=False))
+
+    def source(data_key, list_key):
+        with open(loader.base_path / DATA_FILES[data_key], encoding='utf-8') as f:
+            return json.load(f)[list_key]
+
+    pairs = [
+        (source('meal_suggestions', 'meal_suggestions'), loader.get_meals(), Meal),
+        (source('foods_nutrition', 'foods'), loader.get_foods_nutrition(), Food),
+        (source('recipes', 'recipes'), loader.get_recipes(), Recipe),
+    ]
+    for raw_records, records, record_type in pairs:
+        assert len(raw_records) == len(records)
+        for raw, record in zip(raw_records, records):
+            assert type(record) is record_type and record._extra is None  # Nothing left unpacked
+            assert record.to_dict() == raw
+            assert dict(record) == raw
+            assert record.get('missing_key', 'default') == 'default'
+
+    for raw, instruction in zip(source('cooking_instructions', 'cooking_instructions'),
+                                loader.get_cooking_instructions()):
+        assert all(type(step) is CookingStep for step in instruction['steps'])
+        assert [step.to_dict() for step in instruction['steps']] == raw['steps']
+
+    print(f"✅ {sum(len(records) for _, records, _ in pairs)} records match their JSON")
+
+def test_record_access():
+    """Attributes, interned tags, read-only records and pickling"""
+    meal = Meal({'id': 'm1', 'name': 'Bowl', 'calories': 450, 'meal_type': ['lunch'],
+                 'nutrition': {'protein': 30, 'carbs': 41.5, 'fat': 12}, 'dietary_tags': ['vegan']})
+    other = Meal({'id': 'm2', 'meal_type': ['lun' + 'ch']})
+
+    assert meal.calories == 450 and meal.protein == 30 and meal.carbs == 41.5
+    assert meal.fiber == 0  # Missing in the source
+    assert meal['nutrition'] == {'protein': 30, 'carbs': 41.5, 'fat': 12}
+    assert meal.meal_type[0] is other.meal_type[0]
+    assert not hasattr(meal, '__dict__')
+
+    try:
+        meal.calories = 0
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("record accepted a write")
+
+    editable = meal.copy()
+    editable['calories'] = 0
+    assert meal['calories'] == 450
+
+    restored = pickle.loads(pickle.dumps(meal))
+    assert restored.to_dict() == meal.to_dict()
+    state = copy.deepcopy({'plan': {'Day 1': {'lunch': meal}}, 'candidates': [meal, other]})
+    assert state['plan']['Day 1']['lunch'] is meal and state['candidates'][1] is other
+
+    odd = Food({'id': 'f1', 'per_100g': {'calories': 10, 'unknown': 'x'}})
+    assert odd['per_100g'] == {'calories': 10, 'unknown': 'x'}
+    assert odd.numeric('per_100g', 'calories') == 10
+    print("✅ Record access behaves like the dicts it replaces")
+
+def test_hot_paths_on_records():
+    """Scoring, planning and serving math read the records and give the same answers"""
+    loader = DataLoader(registry=DataRegistry(use_snapshot=False))
+    meals = loader.get_meals()
+    plain = [meal.to_dict() for meal in meals]
+    for reference in meals[:10]:
+        similar = loader.find_similar_meals(reference, limit=5)
+        assert all(meal is loader.get_meal_by_id(meal['id']) for meal in similar)
+        assert reference not in similar
+    assert list(NutritionMatrix(plain).columns['protein']) == list(loader.get_nutrition_matrix().columns['protein'])
+    assert [meal_values(meal) for meal in meals] == [meal_values(meal) for meal in plain]
+    print("✅ Matrix and solver values match between records and dicts")
+
+    food = loader.get_food_by_id('food_001')
+    servings = loader.get_food_serving_options('food_001')
+    nutrition = NutritionCalculator.calculate_serving_nutrition(food, servings[-1]['id'], 2.0)
+    assert nutrition['calories'] == int(servings[-1]['calories'] * 2)
+    assert nutrition['macros']['protein'] == round(servings[-1]['macros']['protein'] * 2, 1)
+    print("✅ Catalog foods scale servings straight from the packed per-100g values")
+
+def test_memory_per_record():
+    """Records take less memory than the dicts they are built from"""
+    rng = random.Random(5)
+    tags = ['vegan', 'vegetarian', 'gluten_free', 'dairy_free', 'high_protein', 'low_carb']
+    types = ['breakfast', 'lunch', 'dinner', 'snack']
+
+    def raw_meals(count):
+        # Tags are rebuilt per meal, as json.load does
+        return [{'id': f'meal_{i}', 'name': f'Meal {i}', 'calories': rng.randint(100, 900),
+                 'meal_type': [''.join(t) for t in rng.sample(types, 2)], 'prep_time': rng.randint(5, 60),
+                 'nutrition': {'protein': rng.randint(5, 50), 'carbs': rng.randint(5, 90),
+                               'fat': rng.randint(2, 40), 'fiber': rng.randint(0, 15)},
+                 'dietary_tags': [''.join(t) for t in rng.sample(tags, 3)]}
+                for i in range(count)]
+
+    tracemalloc.start()
+    meals = raw_meals(20000)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    records = [Meal(meal) for meal in meals]
+    del meals
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"📦 dicts {dict_bytes / 20000:.0f} B/meal, records {record_bytes / 20000:.0f} B/meal")
+    assert record_bytes < dict_bytes
+    assert len(records) == 20000
+
+if __name__ == "__main__":
+    test_records_round_trip()
+    test_record_access()
+    test_hot_paths_on_records()
+    test_memory_per_record()
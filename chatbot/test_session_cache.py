@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test the bounded LRU / idle-TTL session cache"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.session_cache import SessionCache
+from core.session_store import SessionStore, MemorySessionBackend
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction():
+    """Going over max_size evicts the least recently used session"""
+    print("🧪 Session Cache - LRU")
+    print("=" * 40)
+    evicted = []
+    cache = SessionCache(max_size=3, idle_ttl=None, on_evict=lambda key, session: evicted.append(key))
+
+    for user_id in (1, 2, 3):
+        cache.put(user_id, f"session {user_id}")
+    assert cache.get(1) == "session 1"  # 1 is now the most recent
+    cache.put(4, "session 4")
+
+    assert evicted == [2]
+    assert 2 not in cache and len(cache) == 3
+    assert cache.get(2) is None
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['evictions'] == 1
+    assert stats['hit_rate'] == 0.5
+    print(f"✅ LRU eviction: {stats}")
+
+def test_idle_ttl():
+    """Sessions idle for longer than idle_ttl are evicted on the next access"""
+    clock = FakeClock()
+    evicted = []
+    cache = SessionCache(max_size=100, idle_ttl=60, clock=clock,
+                         on_evict=lambda key, session: evicted.append(key))
+    cache.put('a', 1)
+    cache.put('b', 2)
+    clock.now = 30
+    cache.get('a')
+    clock.now = 75  # 'b' idle 75s, 'a' idle 45s
+    cache.put('c', 3)
+
+    assert evicted == ['b']
+    assert cache.get_stats()['expirations'] == 1
+    clock.now = 200
+    assert cache.expire_idle() == 2
+    assert len(cache) == 0
+    print("✅ Idle sessions expire")
+
+def test_reset_does_not_spill():
+    """Deleting a session (e.g. /reset) does not hand it to on_evict"""
+    evicted = []
+    cache = SessionCache(max_size=2, on_evict=lambda key, session: evicted.append(key))
+    cache.put(1, 'one')
+    del cache[1]
+    assert cache.pop(1) is None and evicted == []
+    print("✅ Explicit deletes are not evictions")
+
+def test_evicted_sessions_spill_to_store():
+    """An evicted session comes back with its diary from the store"""
+    backend = MemorySessionBackend()
+    store = SessionStore(backend, lambda session: {'logged_foods': session})
+    cache = SessionCache(max_size=1, on_evict=store.mark_dirty)
+
+    cache.put(1, [{'name': 'banana', 'calories': 105}])
+    cache.put(2, [])  # Evicts user 1 into the store's dirty set
+    assert store.load(1) == {'logged_foods': [{'name': 'banana', 'calories': 105}]}
+
+    store.flush()
+    assert store.load(1) == {'logged_foods': [{'name': 'banana', 'calories': 105}]}
+    print("✅ Evicted sessions spill to the store")
+
+def test_memory_stays_bounded():
+    """Many distinct users never grow the cache past max_size"""
+    cache = SessionCache(max_size=500)
+    for user_id in range(20000):
+        if cache.get(user_id) is None:
+            cache.put(user_id, {'user_id': user_id})
+    assert len(cache) == 500
+    assert cache.get_stats()['evictions'] == 19500
+    print(f"✅ 20000 users, {len(cache)} live sessions")
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_idle_ttl()
+    test_reset_does_not_spill()
+    test_evicted_sessions_spill_to_store()
+    test_memory_stays_bounded()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Test the write-behind session store"""
+
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.session_store import SessionStore, SQLiteSessionBackend, MemorySessionBackend
+from core.session_manager import SessionManager
+from data.data_loader import DataLoader
+from journeys.base_journey import get_journey_state, restore_journey_state
+from journeys.grocery_assistance import GroceryAssistanceJourney
+from journeys.meal_planning import MealPlanningJourney
+
+class FakeSession:
+    """Stands in for a bot session object"""
+    def __init__(self, foods=None):
+        self.logged_foods = foods or []
+
+def export_state(session):
+    return {'logged_foods': session.logged_foods}
+
+def test_write_behind_batches():
+    """Marking sessions dirty writes nothing until flush, then one batch"""
+    print("🧪 Session Store - Write-Behind")
+    print("=" * 40)
+    backend = MemorySessionBackend()
+    store = SessionStore(backend, export_state)
+
+    sessions = {user_id: FakeSession() for user_id in range(50)}
+    for user_id, session in sessions.items():
+        session.logged_foods.append({'name': 'apple', 'calories': 95})
+        store.mark_dirty(user_id, session)
+        store.mark_dirty(user_id, session)  # Repeated messages coalesce
+    assert backend.batches == 0 and not backend.rows
+    assert store.pending_count() == 50
+
+    # A pending session is served from memory, newest state first
+    sessions[3].logged_foods.append({'name': 'toast', 'calories': 80})
+    assert len(store.load(3)['logged_foods']) == 2
+
+    assert store.flush() == 50
+    assert backend.batches == 1 and len(backend.rows) == 50
+    assert store.load(7) == {'logged_foods': [{'name': 'apple', 'calories': 95}]}
+    print(f"✅ 50 sessions written in {backend.batches} batch: {store.get_stats()}")
+
+def test_sqlite_survives_restart():
+    """State written by one store is read back by a fresh one"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sessions.db')
+        store = SessionStore(SQLiteSessionBackend(path, 'telegram_sessions'), export_state)
+        store.mark_dirty(42, FakeSession([{'name': 'oats', 'calories': 150}]))
+        store.mark_dirty(43, FakeSession())
+        store.close()  # Clean shutdown flushes synchronously
+
+        restarted = SessionStore(SQLiteSessionBackend(path, 'telegram_sessions'), export_state)
+        assert restarted.load(42) == {'logged_foods': [{'name': 'oats', 'calories': 150}]}
+        assert restarted.load(99) is None
+
+        restarted.delete(43)
+        assert restarted.load(43) is None
+        restarted.close()
+
+        again = SessionStore(SQLiteSessionBackend(path, 'telegram_sessions'), export_state)
+        assert again.load(43) is None and again.load(42) is not None
+        again.close()
+    print("✅ Sessions survive a restart, deletes are persisted")
+
+def test_session_manager_state():
+    """SessionManager state round-trips through the store"""
+    manager = SessionManager()
+    manager.start_journey('meal_planning')
+    manager.add_message('user', 'plan my week')
+    store = SessionStore(MemorySessionBackend(), lambda m: {'session_data': m.session_data})
+    store.mark_dirty(1, manager)
+    store.flush()
+    assert store.load(1)['session_data'] == manager.session_data
+    print("✅ SessionManager state persisted")
+
+def test_journey_survives_restart():
+    """A journey interrupted mid-flow resumes at the same step after a restart"""
+    data_loader = DataLoader()
+
+    def build():
+        # What ChatbotManager builds for a new user
+        manager = SessionManager()
+        return manager, {'meal_planning': MealPlanningJourney(data_loader, manager),
+                         'grocery_assistance': GroceryAssistanceJourney(data_loader, manager)}
+
+    def export(session):
+        # ChatbotManager.get_state
+        manager, journeys = session
+        return {'session_data': manager.session_data,
+                'journeys': {name: get_journey_state(journey) for name, journey in journeys.items()}}
+
+    def restore(state):
+        # ChatbotManager.restore_state on a fresh manager
+        manager, journeys = build()
+        manager.session_data = state['session_data']
+        for name, journey_state in state['journeys'].items():
+            restore_journey_state(journeys[name], journey_state)
+        return manager, journeys
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sessions.db')
+        manager, journeys = session = build()
+        manager.start_journey('meal_planning')
+        planner = journeys['meal_planning']
+        planner.start_journey()
+        for reply in ['3', '1', '2000', 'none', 'beginner, 30 minutes']:
+            planner.process_input(reply)
+        assert planner.current_step == 'generate_plan'
+        store = SessionStore(SQLiteSessionBackend(path, 'chatbot_sessions'), export)
+        store.mark_dirty(5, session)
+        store.close()
+
+        restarted = SessionStore(SQLiteSessionBackend(path, 'chatbot_sessions'), export)
+        manager, journeys = session = restore(restarted.load(5))
+        planner = journeys['meal_planning']
+        assert manager.get_current_journey() == 'meal_planning'
+        assert planner.current_step == 'generate_plan' and planner.planning_duration == 3
+        assert planner.daily_calorie_target == 2000 and planner.session_manager is manager
+        assert 'plan_solver' not in get_journey_state(planner)
+        assert 'ingredient_extractor' not in get_journey_state(journeys['grocery_assistance'])
+        print("✅ Preferences and step restored mid-journey")
+
+        planner.process_input('yes')
+        assert planner.current_step == 'plan_display' and len(planner.meal_plan) == 3
+        plan_ids = {day: [meal['id'] for meal in meals.values()] for day, meals in planner.meal_plan.items()}
+        restarted.mark_dirty(5, session)
+        restarted.close()
+
+        again = SessionStore(SQLiteSessionBackend(path, 'chatbot_sessions'), export)
+        manager, journeys = restore(again.load(5))
+        planner = journeys['meal_planning']
+        assert {day: [meal['id'] for meal in meals.values()] for day, meals in planner.meal_plan.items()} == plan_ids
+        assert planner.plan_solver is None
+        assert 'DAY 2' in str(planner.process_input('regenerate day 2'))
+        again.close()
+    print("✅ Generated plan survives a restart and can still be regenerated")
+
+def test_failed_flush_is_retried():
+    """A failing backend keeps the batch for the next flush"""
+    class FlakyBackend(MemorySessionBackend):
+        fail = True
+        def save_many(self, items):
+            if self.fail:
+                raise OSError("disk full")
+            super().save_many(items)
+
+    backend = FlakyBackend()
+    store = SessionStore(backend, export_state)
+    store.mark_dirty(1, FakeSession([{'name': 'egg'}]))
+    store.flush()
+    assert store.get_stats()['errors'] == 1 and store.pending_count() == 1
+    assert store.load(1) == {'logged_foods': [{'name': 'egg'}]}
+
+    backend.fail = False
+    store.flush()
+    assert backend.rows and store.pending_count() == 0
+    print("✅ Failed flush retried")
+
+def test_periodic_flush_on_event_loop():
+    """start() flushes in the background; stop() writes the rest"""
+    backend = MemorySessionBackend()
+    store = SessionStore(backend, export_state, flush_interval=0.01)
+
+    async def run():
+        store.start()
+        store.mark_dirty(1, FakeSession())
+        await asyncio.sleep(0.1)
+        assert '1' in backend.rows
+        store.mark_dirty(2, FakeSession())
+        await store.stop()
+
+    asyncio.run(run())
+    assert '2' in backend.rows
+    print("✅ Periodic and shutdown flushes")
+
+if __name__ == "__main__":
+    test_write_behind_batches()
+    test_sqlite_survives_restart()
+    test_session_manager_state()
+    test_journey_survives_restart()
+    test_failed_flush_is_retried()
+    test_periodic_flush_on_event_loop()
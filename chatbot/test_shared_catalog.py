@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Test the shared, path-configurable catalog used by the Telegram journeys"""
+
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.data_loader import DataLoader, get_shared_data_loader, get_data_dir, DEFAULT_DATA_DIR
+
+def test_shared_loader_is_reused():
+    """Every caller gets the same loader and the same read-only datasets"""
+    print("🧪 Shared Catalog")
+    print("=" * 40)
+    loader = get_shared_data_loader()
+    assert get_shared_data_loader() is loader
+    assert get_shared_data_loader(DEFAULT_DATA_DIR) is loader
+
+    recipes_db = loader.get_dataset('recipes')
+    assert recipes_db is get_shared_data_loader().get_dataset('recipes')
+    assert recipes_db['recipes'] is loader.get_recipes()
+    try:
+        recipes_db['recipes'] = []
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("shared dataset accepted a write")
+
+    assert loader.get_dataset('no_such_dataset', {'recipes': []}) == {'recipes': []}
+    print("✅ One loader, shared read-only views")
+
+def test_data_dir_is_configurable():
+    """NUTRITION_DATA_DIR points the catalog at another folder"""
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(DEFAULT_DATA_DIR / 'meal_suggestions_raw.json', tmp)
+        previous = os.environ.get('NUTRITION_DATA_DIR')
+        os.environ['NUTRITION_DATA_DIR'] = tmp
+        try:
+            assert str(get_data_dir()) == tmp
+            loader = get_shared_data_loader()
+            assert loader.base_path.resolve() == DataLoader(tmp).base_path.resolve()
+            assert loader.get_meals() and loader.get_recipes() == []
+        finally:
+            if previous is None:
+                del os.environ['NUTRITION_DATA_DIR']
+            else:
+                os.environ['NUTRITION_DATA_DIR'] = previous
+    assert get_data_dir() == DEFAULT_DATA_DIR
+    print("✅ Catalog folder follows NUTRITION_DATA_DIR")
+
+if __name__ == "__main__":
+    test_shared_loader_is_reused()
+    test_data_dir_is_configurable()
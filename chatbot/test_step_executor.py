@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Test the journey step executor"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.step_executor import StepExecutor, StepTimeout
+
+def slow_step(seconds, value):
+    time.sleep(seconds)
+    return value, threading.current_thread().name
+
+def add(a, b):
+    return a + b
+
+def append_slowly(items, seconds):
+    time.sleep(seconds)
+    items.append('step')
+    return items
+
+def test_offload_threshold():
+    """Unmeasured and slow steps go to the pool, fast ones stay inline"""
+    print("🧪 Step Executor - Offload Threshold")
+    print("=" * 40)
+
+    async def scenario():
+        executor = StepExecutor('thread', max_workers=2, offload_threshold=0.02)
+        loop_thread = threading.current_thread().name
+
+        value, thread = await executor.run('fast', slow_step, 0, 'a')
+        assert value == 'a' and thread != loop_thread  # First run is measured in the pool
+        value, thread = await executor.run('fast', slow_step, 0, 'b')
+        assert thread == loop_thread  # Known to be fast: inline
+
+        for _ in range(2):
+            value, thread = await executor.run('slow', slow_step, 0.03, 'c')
+            assert thread != loop_thread
+        assert executor.should_offload('slow') and not executor.should_offload('fast')
+
+        stats = executor.get_stats()
+        assert (stats['inline_runs'], stats['offloaded_runs']) == (1, 3)
+        assert list(stats['slowest_steps_ms']) == ['slow', 'fast']
+        executor.shutdown()
+        return stats
+
+    stats = asyncio.run(scenario())
+    print(f"✅ Steps routed by latency: {stats}")
+
+def test_loop_stays_responsive():
+    """Other coroutines keep running while a slow step is offloaded"""
+    print("\n🧪 Step Executor - Responsive Loop")
+    print("=" * 40)
+
+    async def scenario():
+        executor = StepExecutor('thread', max_workers=2)
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await executor.run('heavy', slow_step, 0.2, None)
+        task.cancel()
+        executor.shutdown()
+        return ticks
+
+    ticks = asyncio.run(scenario())
+    assert len(ticks) >= 10, f"loop was blocked ({len(ticks)} ticks)"
+    print(f"✅ Loop ticked {len(ticks)} times during a 200 ms step")
+
+def test_timeout_and_modes():
+    """Timeouts raise StepTimeout; process and inline modes return results"""
+    print("\n🧪 Step Executor - Timeouts and Modes")
+    print("=" * 40)
+
+    async def scenario():
+        executor = StepExecutor('thread', max_workers=1, timeout=0.05)
+        try:
+            await executor.run('stuck', slow_step, 0.3, None)
+            assert False, "expected a timeout"
+        except StepTimeout:
+            pass
+        assert executor.get_stats()['timeouts'] == 1
+        assert executor.should_offload('stuck')
+        executor.shutdown()
+
+        # Offloaded thread steps work on a copy, so an abandoned worker never reaches live state
+        isolated = StepExecutor('thread', max_workers=1, timeout=0.05, offload_threshold=0)
+        live = []
+        assert await isolated.run('append', append_slowly, live, 0) == ['step'] and live == []
+        try:
+            await isolated.run('append', append_slowly, live, 0.1)
+            assert False, "expected a timeout"
+        except StepTimeout:
+            pass
+        isolated.shutdown()
+        assert live == []
+
+        inline = StepExecutor('inline')
+        assert await inline.run('add', add, 2, 3) == 5
+        assert inline.get_stats()['offloaded_runs'] == 0
+
+        process = StepExecutor('process', max_workers=1)
+        assert await process.run('add', add, 4, 5) == 9
+        process.shutdown()
+
+    asyncio.run(scenario())
+    try:
+        StepExecutor('fibers')
+        assert False, "unknown mode should be rejected"
+    except ValueError:
+        pass
+    print("✅ Timeouts reported, all modes work")
+
+if __name__ == "__main__":
+    test_offload_threshold()
+    test_loop_stays_responsive()
+    test_timeout_and_modes()
+    print("\n🎉 All step executor tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test per-user ordered concurrent update processing"""
+
+import sys
+import os
+import asyncio
+import random
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.update_dispatcher import UserOrderedDispatcher
+
+def test_per_user_order():
+    """Each user's updates run in arrival order and never overlap"""
+    print("🧪 Update Dispatcher - Per-User Order")
+    print("=" * 40)
+
+    async def scenario():
+        dispatcher = UserOrderedDispatcher(max_in_flight=8, shards=4)
+        rng = random.Random(15)
+        seen = {}
+        running = set()
+
+        async def update(user, number):
+            assert user not in running, f"user {user} overlapped"
+            running.add(user)
+            await asyncio.sleep(rng.random() / 500)
+            seen.setdefault(user, []).append(number)
+            running.discard(user)
+
+        arrivals = [(rng.randrange(10), n) for n in range(300)]
+        await asyncio.gather(*(dispatcher.run(user, update(user, n)) for user, n in arrivals))
+        for user, numbers in seen.items():
+            assert numbers == [n for u, n in arrivals if u == user], user
+        return dispatcher.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['processed'] == 300 and stats['active_users'] == 0
+    assert stats['shard_depths'] == [0, 0, 0, 0]
+    print(f"✅ 300 updates, 10 users, order kept: {stats}")
+
+def test_slow_user_does_not_stall_others():
+    """Users run concurrently; the global cap is respected"""
+    print("\n🧪 Update Dispatcher - Concurrency")
+    print("=" * 40)
+
+    async def scenario():
+        dispatcher = UserOrderedDispatcher(max_in_flight=3, shards=2)
+        finished = {}
+        start = time.perf_counter()
+
+        async def update(user, seconds):
+            await asyncio.sleep(seconds)
+            finished.setdefault(user, time.perf_counter() - start)
+
+        slow = [dispatcher.run('slow', update('slow', 0.1)) for _ in range(3)]
+        fast = [dispatcher.run(user, update(user, 0.01)) for user in range(6)]
+        tasks = [asyncio.create_task(c) for c in slow + fast]
+        await asyncio.sleep(0.005)
+        assert dispatcher.user_depth('slow') == 3
+        assert sum(dispatcher.queue_depths()) == 9
+        assert dispatcher.in_flight == 3
+        await asyncio.gather(*tasks)
+        return dispatcher, finished
+
+    dispatcher, finished = asyncio.run(scenario())
+    assert dispatcher.peak_in_flight == 3
+    assert all(finished[user] < 0.1 for user in range(6)), finished
+    print(f"✅ Fast users done in {max(finished[u] for u in range(6))*1000:.0f} ms "
+          f"while the slow user queued 3 updates")
+
+def test_unkeyed_updates_and_errors():
+    """Updates without a user only take a slot; failures release the user"""
+    print("\n🧪 Update Dispatcher - Edge Cases")
+    print("=" * 40)
+
+    async def scenario():
+        dispatcher = UserOrderedDispatcher(max_in_flight=2)
+
+        async def fail():
+            raise RuntimeError("handler failed")
+
+        async def value(v):
+            return v
+
+        assert await dispatcher.run(None, value(1)) == 1
+        try:
+            await dispatcher.run('u', fail())
+            assert False, "error should propagate"
+        except RuntimeError:
+            pass
+        assert await dispatcher.run('u', value(2)) == 2
+        assert dispatcher.user_depth('u') == 0 and dispatcher.in_flight == 0
+
+    asyncio.run(scenario())
+    try:
+        UserOrderedDispatcher(max_in_flight=0)
+        assert False, "max_in_flight=0 should be rejected"
+    except ValueError:
+        pass
+    print("✅ Unkeyed updates and handler errors handled")
+
+if __name__ == "__main__":
+    test_per_user_order()
+    test_slow_user_does_not_stall_others()
+    test_unkeyed_updates_and_errors()
+    print("\n🎉 All update dispatcher tests passed!")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Test the webhook server with recorded Telegram updates"""
+
+import sys
+import os
+import asyncio
+import http.client
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.webhook_server import WebhookServer, SECRET_HEADER, create_webhook_server
+
+SECRET = 'test-secret'
+
+def recorded_update(update_id, user_id=42, text='log my breakfast'):
+    """A message update shaped like the ones Telegram posts"""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 1700000000,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'},
+            'text': text
+        }
+    }
+
+def request(port, method, path, body=None, secret=SECRET, connection=None):
+    """Blocking HTTP call; returns (status, JSON payload)"""
+    conn = connection or http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    headers = {'Content-Type': 'application/json'}
+    if secret is not None:
+        headers[SECRET_HEADER] = secret
+    payload = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode()
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read())
+    if connection is None:
+        conn.close()
+    return result
+
+async def call(*args, **kwargs):
+    return await asyncio.to_thread(request, *args, **kwargs)
+
+def test_accepts_and_processes_updates():
+    """Valid updates are acknowledged and processed; bad requests are refused"""
+    print("🧪 Webhook Server - Requests")
+    print("=" * 40)
+
+    async def scenario():
+        processed = []
+
+        async def handle(data):
+            processed.append(data['update_id'])
+
+        server = WebhookServer(handle, path='/telegram', secret_token=SECRET, host='127.0.0.1', port=0,
+                               max_body=4096)
+        await server.start()
+        port = server.port
+
+        assert await call(port, 'GET', '/healthz') == (200, {'status': 'ok'})
+        assert (await call(port, 'GET', '/readyz'))[0] == 503  # Not ready yet
+        server.ready = True
+        assert (await call(port, 'GET', '/readyz'))[0] == 200
+
+        # Several updates over one keep-alive connection
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        for update_id in range(1, 4):
+            status, _ = await asyncio.to_thread(request, port, 'POST', '/telegram',
+                                                recorded_update(update_id), SECRET, conn)
+            assert status == 200
+        conn.close()
+
+        assert (await call(port, 'POST', '/telegram', recorded_update(9), secret='wrong'))[0] == 403
+        assert (await call(port, 'POST', '/telegram', recorded_update(9), secret=None))[0] == 403
+        assert (await call(port, 'POST', '/telegram', b'{not json'))[0] == 400
+        assert (await call(port, 'POST', '/other', recorded_update(9)))[0] == 404
+        assert (await call(port, 'GET', '/telegram'))[0] == 405
+        assert (await call(port, 'POST', '/telegram', b'x' * 4097))[0] == 413
+
+        await server.stop()
+        return processed, server.get_stats()
+
+    processed, stats = asyncio.run(scenario())
+    assert processed == [1, 2, 3], processed
+    assert stats['accepted'] == 3 and stats['failed'] == 0
+    print(f"✅ Recorded updates processed, bad requests refused: {stats}")
+
+def test_bounded_queue():
+    """A full queue answers 503 and readiness drops; stop() drains what was accepted"""
+    print("\n🧪 Webhook Server - Backpressure")
+    print("=" * 40)
+
+    async def scenario():
+        release = asyncio.Event()
+        processed = []
+
+        async def handle(data):
+            await release.wait()
+            if data['update_id'] == 3:
+                raise RuntimeError("handler failed")
+            processed.append(data['update_id'])
+
+        server = WebhookServer(handle, secret_token=SECRET, host='127.0.0.1', port=0,
+                               max_queue=2, max_in_flight=1)
+        await server.start()
+        server.ready = True
+        port = server.port
+
+        statuses = [(await call(port, 'POST', '/telegram', recorded_update(n)))[0] for n in range(1, 6)]
+        # One update is running, two fill the queue, the rest are refused
+        assert statuses == [200, 200, 200, 503, 503], statuses
+        assert (await call(port, 'GET', '/readyz'))[0] == 503
+
+        release.set()
+        await server.stop()
+        return processed, server.get_stats()
+
+    processed, stats = asyncio.run(scenario())
+    assert processed == [1, 2]
+    assert (stats['accepted'], stats['rejected'], stats['failed']) == (3, 2, 1)
+    assert stats['queued'] == 0 and stats['running'] == 0
+    print(f"✅ Queue bounded and drained on stop: {stats}")
+
+def test_secret_required():
+    """Webhook mode refuses to start without WEBHOOK_SECRET"""
+    print("\n🧪 Webhook Server - Secret Required")
+    print("=" * 40)
+
+    async def handle(data):
+        pass
+
+    saved = os.environ.pop('WEBHOOK_SECRET', None)
+    try:
+        try:
+            create_webhook_server(handle)
+            assert False, "expected a missing secret to be refused"
+        except ValueError:
+            pass
+        os.environ['WEBHOOK_SECRET'] = SECRET
+        assert create_webhook_server(handle).secret_token == SECRET
+    finally:
+        os.environ.pop('WEBHOOK_SECRET', None)
+        if saved is not None:
+            os.environ['WEBHOOK_SECRET'] = saved
+    print("✅ Missing secret refused")
+
+if __name__ == "__main__":
+    test_accepts_and_processes_updates()
+    test_bounded_queue()
+    test_secret_required()
+    print("\n🎉 All webhook server tests passed!")
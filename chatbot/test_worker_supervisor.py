@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Test sharding updates over worker processes"""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.worker_supervisor import (
+    WorkerSupervisor, aggregate_stats, serve_worker_channel, shard_for, update_user_id
+)
+
+def message_update(update_id, user_id):
+    return {'update_id': update_id,
+            'message': {'message_id': update_id, 'from': {'id': user_id}, 'chat': {'id': user_id}, 'text': 'hi'}}
+
+def recording_worker(index, sock):
+    """Worker that records which users it saw, in order"""
+    seen = {}
+
+    async def handle(update):
+        await asyncio.sleep(0.001)
+        seen.setdefault(update_user_id(update), []).append(update['update_id'])
+
+    def stats():
+        return {'worker_index': index, 'processed': sum(map(len, seen.values())),
+                'cache': {'hits': index, 'misses': 1},
+                'order': {str(user): ids for user, ids in seen.items()}}
+
+    asyncio.run(serve_worker_channel(sock, handle, stats))
+
+def crashing_worker(index, sock):
+    """Worker that dies on its first update"""
+    async def handle(update):
+        os._exit(3)
+
+    asyncio.run(serve_worker_channel(sock, handle, dict))
+
+def test_routing_helpers():
+    """User ids are found in any update type; shards are stable"""
+    print("🧪 Worker Supervisor - Routing")
+    print("=" * 40)
+    assert update_user_id(message_update(1, 77)) == 77
+    assert update_user_id({'update_id': 2, 'callback_query': {'id': 'x', 'from': {'id': 5}}}) == 5
+    assert update_user_id({'update_id': 3, 'my_chat_member': {'chat': {'id': -100}}}) == -100
+    assert update_user_id({'update_id': 4}) is None
+    assert [shard_for(user, 4) for user in (0, 5, 6, 7)] == [0, 1, 2, 3]
+
+    total = aggregate_stats([{'processed': 2, 'cache': {'hits': 3, 'misses': 1, 'hit_rate': 0.75}, 'mode': 'x'},
+                             {'processed': 5, 'cache': {'hits': 1, 'misses': 3, 'hit_rate': 0.25}}])
+    assert total == {'processed': 7, 'cache': {'hits': 4, 'misses': 4, 'hit_rate': 0.5}}
+    print("✅ Routing and aggregation helpers work")
+
+def test_sharded_processing():
+    """Every user's updates reach one worker, in order; stats are aggregated"""
+    print("\n🧪 Worker Supervisor - Processes")
+    print("=" * 40)
+
+    async def scenario():
+        supervisor = WorkerSupervisor(3, recording_worker)
+        await supervisor.start()
+        arrivals = [(n, n * 7 % 20) for n in range(1, 301)]
+        start = time.perf_counter()
+        for update_id, user in arrivals:
+            await supervisor.dispatch(message_update(update_id, user))
+        await supervisor.dispatch({'update_id': 999})  # No user: still delivered
+        for _ in range(100):  # Spawned workers take a moment to start
+            stats = await supervisor.collect_stats()
+            if stats['total'].get('processed') == 301:
+                break
+            await asyncio.sleep(0.1)
+        elapsed = time.perf_counter() - start
+        await supervisor.stop()
+        return arrivals, stats, elapsed
+
+    arrivals, stats, elapsed = asyncio.run(scenario())
+    assert stats['total']['processed'] == 301
+    assert stats['unrouted'] == 1 and stats['dropped'] == 0
+    assert stats['total']['cache'] == {'hits': 3, 'misses': 3, 'hit_rate': 0.5}
+    owners = {}
+    for entry in stats['workers']:
+        for user, ids in entry['stats']['order'].items():
+            if user == 'None':
+                continue
+            assert user not in owners, f"user {user} seen by two workers"
+            owners[user] = entry['worker']
+            assert entry['worker'] == shard_for(int(user), 3)
+            assert ids == [n for n, u in arrivals if u == int(user)]
+    assert len(owners) == 20
+    print(f"✅ 301 updates over 3 workers in {elapsed*1000:.0f} ms, users kept on one worker")
+
+def test_restart_dead_worker():
+    """A crashed worker is replaced"""
+    print("\n🧪 Worker Supervisor - Restart")
+    print("=" * 40)
+
+    async def scenario():
+        supervisor = WorkerSupervisor(1, crashing_worker, monitor_interval=0.05)
+        await supervisor.start()
+        first_pid = supervisor._workers[0].process.pid
+        await supervisor.dispatch(message_update(1, 1))
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if supervisor._workers[0].restarts:
+                break
+        worker = supervisor._workers[0]
+        restarted = (worker.restarts, worker.process.pid != first_pid)
+        await supervisor.stop()
+        return restarted
+
+    restarts, new_pid = asyncio.run(scenario())
+    assert restarts == 1 and new_pid
+    print("✅ Dead worker restarted")
+
+if __name__ == "__main__":
+    test_routing_helpers()
+    test_sharded_processing()
+    test_restart_dead_worker()
+    print("\n🎉 All worker supervisor tests passed!")
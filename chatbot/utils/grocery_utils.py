@@ -6,6 +6,116 @@ Handles ingredient extraction, consolidation, and store organization for grocery
 import re
 from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict
+from collections.abc import Mapping
+
+# Units the grocery list adds up in: every weight becomes grams, every volume millilitres
+BASE_UNITS = ('g', 'ml', 'piece')
+
+# Units counted in pieces
+COUNT_UNITS = ('piece', 'pc', 'item', 'unit', 'whole', 'each', '')
+
+# Other spellings of the units in the conversion tables
+UNIT_ALIASES = {
+    'gram': 'g', 'grams': 'g', 'kilogram': 'kg', 'kilograms': 'kg', 'milligram': 'mg',
+    'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb', 'ounce': 'oz', 'ounces': 'oz',
+    'milliliter': 'ml', 'millilitre': 'ml', 'liter': 'l', 'litre': 'l', 'liters': 'l', 'litres': 'l',
+    'cups': 'cup', 'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'fl_oz': 'fl_oz', 'fluid_ounce': 'fl_oz', 'fluid_ounces': 'fl_oz',
+    'pints': 'pint', 'quarts': 'quart', 'gallons': 'gallon',
+    'pieces': 'piece', 'pcs': 'pc', 'items': 'item', 'units': 'unit'
+}
+
+def build_unit_table(conversions: Dict[str, Any]) -> Dict[str, Tuple[float, str]]:
+    """Unit -> (factor, base unit), from the grocery_support tables (e.g. cup_to_ml: 240)"""
+    table = {'g': (1.0, 'g'), 'mg': (0.001, 'g'), 'ml': (1.0, 'ml'), 'l': (1000.0, 'ml')}
+    for group in ('weight', 'volume'):
+        for key, factor in conversions.get(group, {}).items():
+            unit, _, base = key.rpartition('_to_')
+            if unit and base in BASE_UNITS:
+                table[unit] = (float(factor), base)
+    for unit in COUNT_UNITS:
+        table[unit] = (1.0, 'piece')
+    for alias, unit in UNIT_ALIASES.items():
+        if unit in table:
+            table[alias] = table[unit]
+    return table
+
+def normalize_amount(amount: float, unit: str, unit_table: Dict[str, Tuple[float, str]]) -> Tuple[float, str]:
+    """Amount in its base unit; units the table does not know are kept as given"""
+    unit = (unit or '').strip().lower()
+    factor, base = unit_table.get(unit.replace(' ', '_').rstrip('.'), (1.0, unit))
+    return amount * factor, base
+
+class GroceryAggregator:
+    """
+    Totals meal plan components for a grocery list in one pass.
+
+    Each component is joined to its food through the loader's food id index,
+    and its amount is converted to grams, millilitres or pieces with the
+    grocery_support conversion tables, so "1 cup" and "240 ml" of the same
+    food add up. Totals are created inside their category group, keyed by
+    (food, base unit), so grouping costs nothing extra. Components whose
+    food is unknown fall back to their own name under 'Other'.
+    """
+    
+    def __init__(self, data_loader):
+        self.data_loader = data_loader
+        self.unit_table = build_unit_table(data_loader.get_unit_conversions())
+    
+    def aggregate_meal_plan(self, meal_plan: Dict[str, Any],
+                            servings_multiplier: float = 1.0) -> Dict[str, Dict[Tuple[str, str], Dict[str, Any]]]:
+        """Category -> (food key, unit) -> item with name, food_id, amount, unit, category and sources"""
+        categories: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        
+        for day_name, day_meals in meal_plan.items():
+            if not isinstance(day_meals, dict):
+                continue
+            
+            for meal_type, meal in day_meals.items():
+                if not isinstance(meal, Mapping):  # Catalog meals are read-only records
+                    continue
+                
+                source = f"meal_plan:{day_name}:{meal_type}"
+                for component in meal.get('components') or ():
+                    if isinstance(component, dict):
+                        self._add_component(categories, component, servings_multiplier, source)
+        
+        return categories
+    
+    def _add_component(self, categories: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]],
+                       component: Dict[str, Any], servings_multiplier: float, source: str) -> None:
+        food_id = component.get('food_id')
+        food = self.data_loader.get_food_by_id(food_id) if food_id else None
+        if food:
+            key = food_id
+            name = food.name
+            category = getattr(food, 'category', 'Other')
+        else:
+            name = component.get('name')
+            if not name:
+                if not food_id:
+                    return
+                name = 'Unknown ingredient'
+            key = name.lower()
+            category = 'Other'
+        
+        amount, unit = normalize_amount(component.get('amount', 0) * servings_multiplier,
+                                        component.get('unit', ''), self.unit_table)
+        group = categories.get(category)
+        if group is None:
+            group = categories[category] = {}
+        item = group.get((key, unit))
+        if item is None:
+            item = group[(key, unit)] = {
+                'name': name,
+                'food_id': food_id,
+                'amount': 0.0,
+                'unit': unit,
+                'category': category,
+                'sources': []
+            }
+        item['amount'] += amount
+        item['sources'].append(source)
 
 class IngredientExtractor:
     """Extracts ingredients from recipes, meal plans, and manual input"""
@@ -40,33 +150,9 @@ class IngredientExtractor:
         return ingredients
     
     def extract_from_meal_plan(self, meal_plan: Dict[str, Any], servings_multiplier: float = 1.0) -> List[Dict[str, Any]]:
-        """Extract ingredients from meal plan components"""
-        ingredients = []
-        
-        for day_name, day_meals in meal_plan.items():
-            if not isinstance(day_meals, dict):
-                continue
-                
-            for meal_type, meal in day_meals.items():
-                if not isinstance(meal, dict) or 'components' not in meal:
-                    continue
-                
-                meal_components = meal.get('components', [])
-                for component in meal_components:
-                    # Scale quantities if needed
-                    amount = component.get('amount', 1) * servings_multiplier
-                    
-                    extracted_ingredient = {
-                        'name': component.get('name', ''),
-                        'amount': amount,
-                        'unit': component.get('unit', ''),
-                        'source': f"meal_plan:{day_name}:{meal_type}",
-                        'food_id': component.get('food_id'),
-                        'raw_component': component
-                    }
-                    ingredients.append(extracted_ingredient)
-        
-        return ingredients
+        """Extract ingredients from meal plan components, one total per food and base unit"""
+        categories = GroceryAggregator(self.data_loader).aggregate_meal_plan(meal_plan, servings_multiplier)
+        return [item for items in categories.values() for item in items.values()]
     
     def extract_from_manual_input(self, user_input: str) -> List[Dict[str, Any]]:
         """Extract ingredients from manual text input"""
@@ -197,10 +283,10 @@ class ListConsolidator:
         for ingredient in ingredients:
             amount = ingredient.get('amount', 0)
             unit = ingredient.get('unit', '').lower()
-            source = ingredient.get('source', '')
             
             unit_amounts[unit] += amount
-            sources.add(source)
+            # Meal plan totals already carry every source they were summed from
+            sources.update(ingredient.get('sources') or [ingredient.get('source', '')])
         
         # Try to consolidate units
         consolidated_amount, consolidated_unit = self._consolidate_units(canonical_name, unit_amounts)
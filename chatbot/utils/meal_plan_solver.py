@@ -0,0 +1,490 @@
+"""
+Meal Plan Solver
+Optimizes a whole multi-day meal plan at once with a time-bounded local search
+"""
+
+import heapq
+import math
+import random
+import time
+from typing import Dict, List, Any, NamedTuple, Optional, Sequence, Tuple
+
+from data.records import Meal, as_record
+
+KCAL_PER_GRAM = {'protein': 4, 'carbs': 4, 'fat': 9}
+
+# Share of the planned calories each macro should supply
+DEFAULT_MACRO_SPLIT = {'protein': 0.25, 'carbs': 0.50, 'fat': 0.25}
+
+MACROS = ('protein', 'carbs', 'fat')
+
+
+class PlanResult(NamedTuple):
+    plan: Dict[str, Dict[str, Dict[str, Any]]]  # "Day n" -> meal type -> meal
+    objective: float
+    diagnostics: Dict[str, Any]
+
+
+def meal_values(meal: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """Calories, protein, carbs and fat of a meal"""
+    record = as_record(meal, Meal)
+    return (float(getattr(record, 'calories', 0)), float(record.protein), float(record.carbs), float(record.fat))
+
+
+def placeholder_meal(meal_type: str, day: int, target_calories: float) -> Dict[str, Any]:
+    """Stand-in for a slot no catalog meal can fill"""
+    return {
+        'id': f'placeholder_{meal_type}_{day}',
+        'name': f'Custom {meal_type.title()}',
+        'calories': int(target_calories),
+        'prep_time': 15,
+        'nutrition': {'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0},
+        'components': []
+    }
+
+
+class CandidatePool:
+    """
+    The meals one slot may take, closest to the slot's calories first.
+
+    The order is computed once per solver. take() then hands meals out day
+    by day from a heap: the cheapest meal (calorie distance plus the cost
+    of one more repeat) that was not served within the variety window wins,
+    and recently served meals are skipped but kept. Building a plan costs
+    O(days * log(pool)) per slot instead of a scan of the pool every day.
+    """
+
+    def __init__(self, numbers: Sequence[int], costs: Dict[int, float],
+                 variety_window: int, repeat_weight: float):
+        self.numbers = sorted(numbers, key=costs.__getitem__)
+        self.costs = [costs[number] for number in self.numbers]
+        self.variety_window = variety_window
+        self.repeat_weight = repeat_weight
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def heap(self, rng: random.Random) -> List[Tuple[float, float, int, int]]:
+        """Fresh per-plan state: (cost, tie-break, meal number, uses when pushed)"""
+        # Already sorted by cost, so heapify only has to order random tie-breaks
+        heap = [(cost, rng.random(), number, 0) for cost, number in zip(self.costs, self.numbers)]
+        heapq.heapify(heap)
+        return heap
+
+    def take(self, heap: List[Tuple[float, float, int, int]], day: int,
+             occurrences: Dict[int, List[int]]) -> Optional[int]:
+        """Pop the best meal for this day and push it back with its new repeat cost"""
+        skipped = []
+        chosen = None
+        while heap:
+            entry = heapq.heappop(heap)
+            cost, tie, number, uses = entry
+            used = occurrences.get(number, ())
+            if len(used) != uses:
+                # Served by another slot since it was pushed: reprice and retry
+                heapq.heappush(heap, (cost + self.repeat_weight * (len(used) - uses), tie, number, len(used)))
+                continue
+            if used and day - used[-1] < self.variety_window:
+                skipped.append(entry)
+                continue
+            chosen = entry
+            break
+        if chosen is None and skipped:
+            # Everything was served lately: take the one served longest ago
+            chosen = min(skipped, key=lambda entry: (occurrences[entry[2]][-1], entry[0]))
+            skipped.remove(chosen)
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen is None:
+            return None
+        cost, tie, number, uses = chosen
+        heapq.heappush(heap, (cost + self.repeat_weight * (uses + 1), tie, number, uses + 1))
+        return number
+
+
+class MealPlanSolver:
+    """
+    Plans every day and meal slot as one optimization problem.
+
+    Hard constraints: a slot only gets meals of its meal type that carry
+    every dietary tag and fit max_prep_time. When no meal of a type fits
+    the prep-time cap, the cap is dropped for that type (dietary tags never
+    are); a type with no meal at all gets placeholder meals.
+
+    The objective adds up, per day, how far the calories and the protein /
+    carbs / fat split land from the targets (the whole day counts, so a
+    light breakfast can be balanced by a bigger dinner), and, per meal,
+    a cost for repeating it that grows with every repeat and with how close
+    together the repeats are.
+
+    Each slot's candidates are filtered and sorted once, in CandidatePool.
+    solve() builds a plan day by day from those pools, then improves it
+    by simulated annealing: replace one slot's meal, or swap the meals of
+    two days in the same slot. Moves are scored incrementally, so one costs about the
+    same for a 1-day plan and a 28-day plan. The search returns the best
+    plan seen once the time budget is spent or it stops improving.
+    """
+
+    def __init__(self, meals: Sequence[Dict[str, Any]], slot_targets: Dict[str, float],
+                 dietary_tags: Sequence[str] = (), max_prep_time: Optional[float] = None,
+                 macro_split: Dict[str, float] = DEFAULT_MACRO_SPLIT, variety_window: int = 3,
+                 calorie_weight: float = 10.0, macro_weight: float = 5.0,
+                 repeat_weight: float = 0.3, spacing_weight: float = 1.0):
+        self.slot_types = list(slot_targets)
+        self.slot_targets = [float(slot_targets[meal_type]) for meal_type in self.slot_types]
+        self.daily_target = sum(self.slot_targets)
+        self.variety_window = variety_window
+        self.calorie_weight = calorie_weight
+        self.macro_weight = macro_weight
+        self.repeat_weight = repeat_weight
+        self.spacing_weight = spacing_weight
+        self.macro_targets = [macro_split[macro] * self.daily_target / KCAL_PER_GRAM[macro] for macro in MACROS]
+
+        self.meals: List[Dict[str, Any]] = []  # Candidates of any slot, each once
+        self.values: List[Tuple[float, float, float, float]] = []
+        self.relaxed: Dict[str, List[str]] = {}
+
+        # One pass over the catalog sorts the meals into the slot types, reading
+        # record attributes (catalog meals already are records)
+        required = set(dietary_tags)
+        typed: Dict[str, List[Tuple[Dict[str, Any], Meal]]] = {meal_type: [] for meal_type in self.slot_types}
+        for meal in meals:
+            record = as_record(meal, Meal)
+            if not required.issubset(getattr(record, 'dietary_tags', ())):
+                continue
+            for meal_type in getattr(record, 'meal_type', ()):
+                if meal_type in typed:
+                    typed[meal_type].append((meal, record))
+
+        self.pools: List[CandidatePool] = []
+        numbers: Dict[int, int] = {}
+        for slot, meal_type in enumerate(self.slot_types):
+            eligible = [(meal, record) for meal, record in typed[meal_type]
+                        if max_prep_time is None or getattr(record, 'prep_time', 0) <= max_prep_time]
+            if typed[meal_type] and not eligible:
+                eligible = typed[meal_type]
+                self.relaxed[meal_type] = ['max_prep_time']
+            target = self.slot_targets[slot] or 1.0
+            costs = {}
+            for meal, record in eligible:
+                number = numbers.get(id(meal))
+                if number is None:
+                    number = numbers[id(meal)] = len(self.meals)
+                    self.meals.append(meal)
+                    self.values.append(meal_values(record))
+                costs[number] = self.calorie_weight * abs(self.values[number][0] - target) / target
+            self.pools.append(CandidatePool(list(costs), costs, variety_window, repeat_weight))
+
+    # ========================================
+    # OBJECTIVE
+    # ========================================
+
+    def _day_cost(self, totals: Sequence[float]) -> float:
+        """How far one day's calories and macros are from the targets"""
+        target = self.daily_target
+        if target <= 0:
+            return 0.0
+        cost = self.calorie_weight * abs(totals[0] - target) / target
+        macro_error = sum(abs(totals[index + 1] - self.macro_targets[index]) * KCAL_PER_GRAM[macro]
+                          for index, macro in enumerate(MACROS))
+        return cost + self.macro_weight * macro_error / target
+
+    def _variety_cost(self, days: Sequence[int]) -> float:
+        """Cost of serving one meal on the given days (repeats allowed)"""
+        count = len(days)
+        if count < 2:
+            return 0.0
+        cost = self.repeat_weight * count * (count - 1) / 2
+        window = self.variety_window
+        for i in range(count):
+            for j in range(i + 1, count):
+                gap = abs(days[i] - days[j])
+                if gap < window:
+                    cost += self.spacing_weight * (window - gap)
+        return cost
+
+    def _objective_parts(self, assignment: List[List[Optional[int]]]) -> Tuple[float, float, float]:
+        """Calorie, macro and variety cost of a complete plan"""
+        calorie_cost = macro_cost = 0.0
+        occurrences: Dict[int, List[int]] = {}
+        for day, slots in enumerate(assignment):
+            totals = self._totals(slots)
+            day_cost = self._day_cost(totals)
+            if self.daily_target > 0:
+                calorie_part = self.calorie_weight * abs(totals[0] - self.daily_target) / self.daily_target
+            else:
+                calorie_part = 0.0
+            calorie_cost += calorie_part
+            macro_cost += day_cost - calorie_part
+            for number in slots:
+                if number is not None:
+                    occurrences.setdefault(number, []).append(day)
+        variety_cost = sum(self._variety_cost(days) for days in occurrences.values())
+        return calorie_cost, macro_cost, variety_cost
+
+    def _totals(self, slots: Sequence[Optional[int]]) -> List[float]:
+        totals = [0.0, 0.0, 0.0, 0.0]
+        for slot, number in enumerate(slots):
+            if number is None:
+                totals[0] += self.slot_targets[slot]  # Placeholders count as on target
+            else:
+                for index, value in enumerate(self.values[number]):
+                    totals[index] += value
+        return totals
+
+    # ========================================
+    # SEARCH
+    # ========================================
+
+    def _initial_assignment(self, days: int, rng: random.Random) -> List[List[Optional[int]]]:
+        """Day by day, each slot takes its pool's best meal outside the variety window"""
+        occurrences: Dict[int, List[int]] = {}
+        heaps = [pool.heap(rng) for pool in self.pools]
+        assignment = []
+        for day in range(days):
+            slots = []
+            for pool, heap in zip(self.pools, heaps):
+                number = pool.take(heap, day, occurrences)
+                if number is not None:
+                    occurrences.setdefault(number, []).append(day)
+                slots.append(number)
+            assignment.append(slots)
+        return assignment
+
+    def _occurrences(self, assignment: List[List[Optional[int]]]) -> Dict[int, List[int]]:
+        """Meal number -> days it is served on, in day order"""
+        occurrences: Dict[int, List[int]] = {}
+        for day, slots in enumerate(assignment):
+            for number in slots:
+                if number is not None:
+                    occurrences.setdefault(number, []).append(day)
+        return occurrences
+
+    def _assignment_of(self, plan: Dict[str, Dict[str, Dict[str, Any]]]) -> List[List[Optional[int]]]:
+        """Meal numbers of a plan built by this solver (placeholders become None)"""
+        if not hasattr(self, '_numbers_by_id'):
+            self._numbers_by_id = {meal.get('id'): number for number, meal in enumerate(self.meals)}
+        assignment = []
+        for day_name, day_plan in plan.items():
+            slots = []
+            for meal_type in self.slot_types:
+                meal = day_plan.get(meal_type)
+                if meal is None:
+                    raise ValueError(f"{day_name} has no {meal_type}")
+                number = self._numbers_by_id.get(meal.get('id'))
+                if number is None and not str(meal.get('id', '')).startswith('placeholder_'):
+                    raise ValueError(f"{meal.get('name')} is not a candidate for this plan")
+                slots.append(number)
+            assignment.append(slots)
+        return assignment
+
+    def solve(self, days: int, time_budget_ms: float = 200.0, seed: Optional[int] = None,
+              max_iterations: Optional[int] = None, patience: Optional[int] = None) -> PlanResult:
+        """
+        Best plan found for the given number of days within time_budget_ms
+        (or max_iterations moves, or patience moves without improvement).
+        """
+        started = time.perf_counter()
+        rng = random.Random(seed)
+        assignment = self._initial_assignment(days, rng)
+        cells = [(day, slot) for slot, pool in enumerate(self.pools) if len(pool) > 1 for day in range(days)]
+        return self._search(assignment, cells, {}, rng, started, time_budget_ms, max_iterations, patience)
+
+    def regenerate(self, plan: Dict[str, Dict[str, Dict[str, Any]]], day: int, meal_type: Optional[str] = None,
+                   time_budget_ms: float = 100.0, seed: Optional[int] = None,
+                   max_iterations: Optional[int] = None, patience: Optional[int] = None) -> PlanResult:
+        """
+        Another version of one day of a plan built by this solver, or of one
+        meal of that day (day counts from 1, like the "Day n" keys).
+
+        Every other slot keeps its meal and still counts for variety, so the
+        new meals avoid what the rest of the plan serves nearby. A
+        regenerated slot only gets its old meal back when it has no other
+        candidate.
+        """
+        started = time.perf_counter()
+        rng = random.Random(seed)
+        assignment = self._assignment_of(plan)
+        if not 1 <= day <= len(assignment):
+            raise ValueError(f"day must be between 1 and {len(assignment)}")
+        if meal_type is None:
+            slots = range(len(self.slot_types))
+        elif meal_type in self.slot_types:
+            slots = [self.slot_types.index(meal_type)]
+        else:
+            raise ValueError(f"{meal_type} is not part of this plan")
+        day -= 1
+
+        banned = {(day, slot): assignment[day][slot] for slot in slots if len(self.pools[slot]) > 1}
+        occurrences = self._occurrences(assignment)
+        for (_, slot), old in banned.items():
+            if old is not None:
+                occurrences[old].remove(day)
+            new = self._best_replacement(slot, day, occurrences, old)
+            occurrences.setdefault(new, []).append(day)
+            assignment[day][slot] = new
+        return self._search(assignment, list(banned), banned, rng, started, time_budget_ms, max_iterations, patience)
+
+    def _best_replacement(self, slot: int, day: int, occurrences: Dict[int, List[int]],
+                          exclude: Optional[int]) -> int:
+        """Cheapest other meal for one slot given the rest of the plan"""
+        pool = self.pools[slot]
+        best = best_cost = None
+        for cost, number in zip(pool.costs, pool.numbers):
+            if best_cost is not None and cost >= best_cost:
+                break  # Sorted by calorie cost, and variety only adds to it
+            if number == exclude:
+                continue
+            used = occurrences.get(number)
+            if used:
+                cost += self._variety_cost(used + [day]) - self._variety_cost(used)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = number, cost
+        return best
+
+    def _search(self, assignment: List[List[Optional[int]]], cells: List[Tuple[int, int]],
+                banned: Dict[Tuple[int, int], Optional[int]], rng: random.Random, started: float,
+                time_budget_ms: float, max_iterations: Optional[int], patience: Optional[int]) -> PlanResult:
+        """Simulated annealing over the given (day, slot) cells; every other slot stays as it is"""
+        budget = time_budget_ms / 1000.0
+        open_days: Dict[int, List[int]] = {}
+        for day, slot in cells:
+            open_days.setdefault(slot, []).append(day)
+        open_slots = list(open_days)
+        if patience is None:
+            patience = max(2000, 200 * len(cells))
+
+        totals = [self._totals(slots) for slots in assignment]
+        day_costs = [self._day_cost(day_totals) for day_totals in totals]
+        occurrences = self._occurrences(assignment)
+        current = sum(day_costs) + sum(self._variety_cost(used) for used in occurrences.values())
+        initial = best = current
+        best_assignment = [list(slots) for slots in assignment]
+
+        iterations = accepted = improvements = since_best = 0
+        stopped = 'converged'
+        temperature = start_temperature = 1.0
+        while open_slots:
+            if max_iterations is not None and iterations >= max_iterations:
+                stopped = 'max_iterations'
+                break
+            if since_best >= patience:
+                break
+            if iterations % 128 == 0:
+                elapsed = time.perf_counter() - started
+                if elapsed >= budget:
+                    stopped = 'time_budget'
+                    break
+                progress = (iterations / max_iterations if max_iterations is not None
+                            else elapsed / budget if budget > 0 else 1.0)
+                temperature = start_temperature * (0.01 ** progress)  # Geometric cooling to 1%
+            iterations += 1
+            since_best += 1
+
+            slot = rng.choice(open_slots)
+            slot_days = open_days[slot]
+            day = rng.choice(slot_days)
+            old = assignment[day][slot]
+            if len(slot_days) > 1 and rng.random() < 0.3:
+                # Swap this slot's meals between two days: only the day totals move
+                other_day = rng.choice(slot_days)
+                new = assignment[other_day][slot]
+                if new == old or banned.get((day, slot), -1) == new or banned.get((other_day, slot), -1) == old:
+                    continue
+                changed_days = ((day, old, new), (other_day, new, old))
+            else:
+                new = rng.choice(self.pools[slot].numbers)
+                if new == old or banned.get((day, slot), -1) == new:
+                    continue
+                changed_days = ((day, old, new),)
+
+            # Score the move from the touched days and meals only
+            delta = 0.0
+            new_totals = {}
+            for changed_day, removed, added in changed_days:
+                day_totals = list(totals[changed_day])
+                for index in range(4):
+                    day_totals[index] += self.values[added][index] - self.values[removed][index]
+                new_totals[changed_day] = (day_totals, self._day_cost(day_totals))
+                delta += new_totals[changed_day][1] - day_costs[changed_day]
+            new_days = {}
+            for changed_day, removed, added in changed_days:
+                new_days.setdefault(removed, list(occurrences[removed])).remove(changed_day)
+                new_days.setdefault(added, list(occurrences.get(added, ()))).append(changed_day)
+            for number, used in new_days.items():
+                delta += self._variety_cost(used) - self._variety_cost(occurrences.get(number, ()))
+
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                accepted += 1
+                for changed_day, removed, added in changed_days:
+                    assignment[changed_day][slot] = added
+                    totals[changed_day], day_costs[changed_day] = new_totals[changed_day]
+                for number, used in new_days.items():
+                    if used:
+                        occurrences[number] = used
+                    else:
+                        occurrences.pop(number, None)
+                current += delta
+                if current < best - 1e-9:
+                    best = current
+                    best_assignment = [list(slots) for slots in assignment]
+                    improvements += 1
+                    since_best = 0
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        search = {'initial_objective': round(initial, 4), 'iterations': iterations, 'accepted_moves': accepted,
+                  'improvements': improvements, 'elapsed_ms': round(elapsed_ms, 2), 'stopped': stopped}
+        return self._result(best_assignment, search)
+
+    # ========================================
+    # RESULT
+    # ========================================
+
+    def _result(self, assignment: List[List[Optional[int]]], search: Dict[str, Any]) -> PlanResult:
+        calorie_cost, macro_cost, variety_cost = self._objective_parts(assignment)
+        objective = calorie_cost + macro_cost + variety_cost
+
+        plan = {}
+        day_calories = []
+        macro_kcal = [0.0, 0.0, 0.0]
+        occurrences: Dict[int, List[int]] = {}
+        for day, slots in enumerate(assignment):
+            day_plan = {}
+            for slot, number in enumerate(slots):
+                meal_type = self.slot_types[slot]
+                if number is None:
+                    day_plan[meal_type] = placeholder_meal(meal_type, day + 1, self.slot_targets[slot])
+                else:
+                    day_plan[meal_type] = self.meals[number]
+                    occurrences.setdefault(number, []).append(day)
+            plan[f"Day {day + 1}"] = day_plan
+            totals = self._totals(slots)
+            day_calories.append(totals[0])
+            for index, macro in enumerate(MACROS):
+                macro_kcal[index] += totals[index + 1] * KCAL_PER_GRAM[macro]
+
+        window = self.variety_window
+        close_repeats = sum(1 for days in occurrences.values()
+                            for i in range(len(days)) for j in range(i + 1, len(days))
+                            if abs(days[i] - days[j]) < window)
+        total_kcal = sum(macro_kcal)
+        target = self.daily_target
+        diagnostics = {
+            'objective': round(objective, 4),
+            'calorie_cost': round(calorie_cost, 4),
+            'macro_cost': round(macro_cost, 4),
+            'variety_cost': round(variety_cost, 4),
+            **search,
+            'daily_calorie_target': round(target),
+            'avg_daily_calories': round(sum(day_calories) / len(day_calories)) if day_calories else 0,
+            'max_calorie_deviation_pct': round(max(abs(c - target) for c in day_calories) / target * 100, 1)
+            if day_calories and target > 0 else 0.0,
+            'macro_split_pct': {macro: round(kcal / total_kcal * 100, 1) if total_kcal else 0.0
+                                for macro, kcal in zip(MACROS, macro_kcal)},
+            'unique_meals': len(occurrences),
+            'close_repeats': close_repeats,
+            'candidates': {meal_type: len(pool) for meal_type, pool in zip(self.slot_types, self.pools)},
+            'relaxed': dict(self.relaxed),
+            'unfilled_slots': [meal_type for meal_type, pool in zip(self.slot_types, self.pools) if not pool]
+        }
+        return PlanResult(plan, objective, diagnostics)
@@ -9,6 +9,8 @@ from datetime import datetime, date
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from data.records import Food
+
 @dataclass
 class FoodEntry:
     """Represents a single food entry in the diary"""
@@ -29,7 +31,7 @@ class FoodSearchEngine:
     def __init__(self, data_loader):
         self.data_loader = data_loader
         
-    def search_foods(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def search_foods(self, query: str, limit: int = 10) -> List[Food]:
         """Search foods by name with smart matching"""
         if not query or not query.strip():
             return []
@@ -38,25 +40,25 @@ class FoodSearchEngine:
         foods = self.data_loader.get_foods_nutrition()
         results = []
         
+        # Catalog foods are slotted records: read fields as attributes, not through the dict view
         # Direct name matches (highest priority)
         for food in foods:
-            food_name = food.get('name', '').lower()
+            food_name = getattr(food, 'name', '').lower()
             if query_lower in food_name:
                 score = self._calculate_match_score(query_lower, food_name, food)
                 results.append((food, score))
         
         # Common names matches
         for food in foods:
-            common_names = food.get('common_names', [])
-            for common_name in common_names:
+            for common_name in getattr(food, 'common_names', ()):
                 if query_lower in common_name.lower():
                     score = self._calculate_match_score(query_lower, common_name.lower(), food)
                     results.append((food, score))
         
         # Category matches (lower priority)
         for food in foods:
-            category = food.get('category', '').lower()
-            subcategory = food.get('subcategory', '').lower()
+            category = getattr(food, 'category', '').lower()
+            subcategory = getattr(food, 'subcategory', '').lower()
             if query_lower in category or query_lower in subcategory:
                 score = self._calculate_match_score(query_lower, category, food) * 0.5
                 results.append((food, score))
@@ -65,7 +67,7 @@ class FoodSearchEngine:
         seen_ids = set()
         unique_results = []
         for food, score in results:
-            food_id = food.get('id')
+            food_id = getattr(food, 'id', None)
             if food_id not in seen_ids:
                 seen_ids.add(food_id)
                 unique_results.append((food, score))
@@ -74,7 +76,7 @@ class FoodSearchEngine:
         unique_results.sort(key=lambda x: x[1], reverse=True)
         return [food for food, score in unique_results[:limit]]
     
-    def _calculate_match_score(self, query: str, match_text: str, food: Dict[str, Any]) -> float:
+    def _calculate_match_score(self, query: str, match_text: str, food: Food) -> float:
         """Calculate relevance score for search matches"""
         score = 0.0
         
@@ -97,7 +99,7 @@ class FoodSearchEngine:
         score += len(serving_options) * 0.5
         
         # Category bonus (protein foods get slight boost)
-        category = food.get('category', '').lower()
+        category = getattr(food, 'category', '').lower()
         if category in ['protein', 'dairy']:
             score += 1.0
         
@@ -105,11 +107,7 @@ class FoodSearchEngine:
     
     def get_food_by_id(self, food_id: str) -> Optional[Dict[str, Any]]:
         """Get specific food by ID"""
-        foods = self.data_loader.get_foods_nutrition()
-        for food in foods:
-            if food.get('id') == food_id:
-                return food
-        return None
+        return self.data_loader.get_food_by_id(food_id)
     
     def get_recent_foods(self, diary_manager, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recently logged foods for quick re-entry"""
@@ -124,6 +122,8 @@ class FoodSearchEngine:
             if food_id not in seen_food_ids:
                 food = self.get_food_by_id(food_id)
                 if food:
+                    # Copy before annotating: catalog records are shared by all users
+                    food = dict(food)
                     # Add frequency and last used info
                     food['last_used'] = entry.timestamp
                     food['most_common_serving'] = entry.serving_description
@@ -141,7 +141,10 @@ class NutritionCalculator:
     @staticmethod
     def calculate_serving_nutrition(food: Dict[str, Any], serving_id: str, quantity: float = 1.0) -> Dict[str, Any]:
         """Calculate nutrition for a specific serving and quantity"""
-        serving_options = food.get('serving_options', [])
+        serving_options = food.get('serving_options')
+        if serving_options is None:
+            # Catalog foods carry per-100g values; their servings derive from the packed record
+            serving_options = food.default_servings() if isinstance(food, Food) else []
         
         # Find the specified serving
         selected_serving = None
@@ -0,0 +1,112 @@
+"""
+Plan Cache
+Process-wide cache of generated meal plans keyed by a fingerprint of the preferences
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, NamedTuple, Optional, Sequence
+
+from utils.meal_plan_solver import MealPlanSolver, PlanResult
+
+
+def plan_fingerprint(duration: int, meal_types: Sequence[str], calorie_target: float,
+                     distribution: Dict[str, float], restrictions: Sequence[str],
+                     time_constraint: Optional[float], catalog_version: str) -> str:
+    """Stable hash of everything a plan depends on"""
+    key = {
+        'duration': duration,
+        'meal_types': list(meal_types),  # Order matters: it is the display order
+        'calorie_target': calorie_target,
+        'distribution': {meal_type: distribution.get(meal_type) for meal_type in meal_types},
+        'restrictions': sorted(set(restrictions)),
+        'time_constraint': time_constraint,
+        'catalog_version': catalog_version
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def copy_plan(plan: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """New day dicts over the same (read-only) meals, so callers can edit a plan safely"""
+    return {day_name: dict(day_plan) for day_name, day_plan in plan.items()}
+
+
+class CachedPlan(NamedTuple):
+    solver: MealPlanSolver  # Kept so a day or slot of the plan can be regenerated cheaply
+    result: PlanResult
+
+
+class PlanCache:
+    """
+    Bounded LRU cache of fingerprint -> latest plan for those preferences.
+
+    The entry keeps the solver that made the plan, so going back to earlier
+    preferences shows the plan the user last saw for them, and regenerating
+    one day reuses the solver's candidate pools. Plans are copied on the
+    way in and out; the meals inside are shared catalog records.
+    """
+
+    def __init__(self, max_size: int = 256):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CachedPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedPlan]:
+        """Get the latest plan for a fingerprint; None if not cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return CachedPlan(entry.solver, entry.result._replace(plan=copy_plan(entry.result.plan)))
+
+    def get_solver(self, key: str) -> Optional[MealPlanSolver]:
+        """Get the solver of a fingerprint without counting a lookup"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.solver if entry else None
+
+    def put(self, key: str, solver: MealPlanSolver, result: PlanResult) -> None:
+        """Store a plan as the latest one for its fingerprint"""
+        entry = CachedPlan(solver, result._replace(plan=copy_plan(result.plan)))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit rate counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_plan_cache = PlanCache(int(os.getenv('PLAN_CACHE_SIZE', '256')))
+
+
+def get_plan_cache() -> PlanCache:
+    """Get the process-wide plan cache"""
+    return _plan_cache
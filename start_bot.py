@@ -10,7 +10,12 @@ import sys
 chatbot_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chatbot')
 sys.path.insert(0, chatbot_dir)
 
-# Import and run the bot
+# Import and run the bot (BOT_WORKERS > 1 shards users over worker processes)
 if __name__ == '__main__':
-    from telegram_bot_integrated import main
-    main()
\ No newline at end of file
+    workers = int(os.getenv('BOT_WORKERS', '1'))
+    if workers > 1:
+        from bot_supervisor import main
+        main(workers)
+    else:
+        from telegram_bot_integrated import main
+        main()
\ No newline at end of file